@@ -1,16 +1,29 @@
-from fastapi import APIRouter, Query, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Optional
-import sys
-import os
-
-# Add parent directory to path to import forecast
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from fastapi import APIRouter, Header, Query, HTTPException
+from fastapi.responses import JSONResponse, Response
+import asyncio
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
+
+from app.encoding import NotAcceptable, encode_sweep, forecast_body, forecast_layout, negotiate
+from app.execution import ExecutorSaturated, get_executor
+from app.forecast_sessions import SESSIONS
+from app.response_cache import RESPONSE_CACHE, cached_response, normalize_params
+from app.warmup import DEFAULT_FORECASTS
+from calibration import calibration_cache_info, validate_estimator
+from datasets import get_dataset_store
 from forecast import run_forecast_for_plant
+from goal_seek import solve_parameter, solve_pareto
+from horizon import validate_horizon
+from incremental import ForecastGraph
+from instrumentation import logger, request_timer, stage_timer
+from monte_carlo import run_monte_carlo_forecast
+from network_calibration import calibrate_plants
+from plant_data import PLANT_DATA
+from sweep import run_scenario_sweep
 
 router = APIRouter()
 
-# Fixed forecast period: always 2026-2030
+# Default forecast period (/area-forecast accepts start_year/end_year)
 FORECAST_START_YEAR = 2026
 FORECAST_END_YEAR = 2030
 
@@ -24,14 +37,23 @@ async def area_forecast(
     machine_size_m2: Optional[float] = Query(None, description="Machine footprint in square meters"),
     safety_buffer: Optional[float] = Query(None, description="Safety buffer ratio (e.g., 0.05 for 5%)"),
     warehouse_capacity_units_m2: Optional[float] = Query(None, description="Warehouse capacity (units per m²)"),
-    total_plant_area: Optional[float] = Query(None, description="Total plant area in m²")
+    total_plant_area: Optional[float] = Query(None, description="Total plant area in m²"),
+    dataset_id: Optional[str] = Query(None, description="Uploaded sales forecast dataset to use instead of plant sales"),
+    start_year: int = Query(FORECAST_START_YEAR, description="First forecast fiscal year (inclusive)"),
+    end_year: int = Query(FORECAST_END_YEAR, description="Last forecast fiscal year (inclusive)"),
+    granularity: str = Query("annual", description="Forecast periods: annual, quarterly or monthly"),
+    extrapolate: str = Query("none", description="Sales beyond the provided years: none, flat, linear or cagr"),
+    estimator: str = Query("mean", description="Calibration estimator: mean, recency, trimmed, median or trend"),
+    format: Optional[str] = Query(None, description="Response format: json, columnar, arrow or msgpack (overrides Accept)"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Generate area forecast based on plant name with operational parameters.
     
     All data (sales and historical area) is retrieved from plant_data.py based on the plant name.
-    The forecast uses historical data (FY2024-FY2025) to calibrate parameters and forecasts
-    future years from FY2026 to FY2030.
+    The forecast uses the historical data to calibrate parameters and forecasts the
+    years after the last historical year, FY2026 to FY2030 by default.
     
     Parameters:
         - plant_name: Plant name
@@ -42,23 +64,69 @@ async def area_forecast(
         - safety_buffer: Optional safety buffer ratio (e.g., 0.05 for 5%)
         - warehouse_capacity_units_m2: Optional warehouse capacity (units per m²)
         - total_plant_area: Optional total plant area in m²
+        - dataset_id: Optional uploaded sales forecast (see /api/sales-forecasts)
+        - start_year / end_year: Optional forecast period (default 2026-2030)
+        - granularity: Optional annual (default), quarterly or monthly periods;
+          sub-annual rows carry a 'period' label and the annualized sales rate
+        - extrapolate: Optional sales extrapolation beyond the provided years
+          (none, flat, linear or cagr; see horizon.py)
+        - estimator: Optional reduction of the yearly calibration factors
+          (mean, recency, trimmed, median or trend; see calibration.py)
+        - format: Optional response format (see app/encoding.py); also
+          negotiated from the Accept header. json (default) keeps the
+          list-of-rows forecast; columnar, arrow and msgpack return one
+          array per field.
     
     Returns:
         - plant: Plant name
         - calibration: Calibration parameters (productivity_factor, inventory_days, passage_ratio)
-        - forecast: List of forecast results for FY2026-FY2030
+        - forecast: List of forecast results, one per period
         - historical_debug: Historical data used for calibration
         - operational_params: Operational parameters used for calculation
+
+    Identical requests are served from a server-side cache; responses carry
+    an ETag and `If-None-Match` revalidation returns 304.
     """
+    with request_timer("area-forecast", plant_name):
+        return await _area_forecast(
+            plant_name, cycle_time_hours, base_oee, working_hours_year, machine_size_m2,
+            safety_buffer, warehouse_capacity_units_m2, total_plant_area, dataset_id,
+            if_none_match, accept, format, start_year, end_year, granularity, extrapolate, estimator
+        )
+
+
+def forecast_cache_key(plant_name, operational_params, start_year, end_year, dataset_id, fmt="json",
+                       granularity="annual", extrapolate="none", estimator="mean"):
+    """Normalized cache key; None when the plant is unknown (not cached)."""
+    if plant_name not in PLANT_DATA:
+        return None
+    return (
+        "area-forecast",
+        plant_name,
+        normalize_params(operational_params),
+        start_year,
+        end_year,
+        dataset_id,
+        fmt,
+        granularity,
+        extrapolate,
+        estimator,
+        PLANT_DATA.version(plant_name),
+    )
+
+
+async def _area_forecast(
+    plant_name, cycle_time_hours, base_oee, working_hours_year, machine_size_m2,
+    safety_buffer, warehouse_capacity_units_m2, total_plant_area, dataset_id,
+    if_none_match=None, accept=None, fmt=None, start_year=FORECAST_START_YEAR,
+    end_year=FORECAST_END_YEAR, granularity="annual", extrapolate="none", estimator="mean"
+):
     try:
-        # Debug: Log received parameters
-        print(f"[API DEBUG] Received plant_name: '{plant_name}'")
-        
-        # Use fixed forecast period: 2026-2030
-        start_year = FORECAST_START_YEAR
-        end_year = FORECAST_END_YEAR
-        print(f"[API DEBUG] Using fixed period: {start_year} to {end_year}")
-        
+        fmt = negotiate(accept, fmt)
+        validate_horizon(start_year, end_year, granularity, extrapolate)
+        validate_estimator(estimator)
+        logger.debug("area forecast request", extra={"plant": plant_name, "start_year": start_year, "end_year": end_year})
+
         # Build operational parameters dict if any are provided
         operational_params = None
         if any([cycle_time_hours, base_oee, working_hours_year, machine_size_m2, 
@@ -79,27 +147,378 @@ async def area_forecast(
             if total_plant_area is not None:
                 operational_params["total_plant_area"] = total_plant_area
         
+        # Default parameters: serve the precomputed body (see app/warmup.py)
+        if (operational_params is None and dataset_id is None
+                and granularity == "annual" and extrapolate == "none" and estimator == "mean"):
+            warm = DEFAULT_FORECASTS.get(plant_name, fmt, start_year, end_year)
+            if warm is not None:
+                return cached_response(warm, if_none_match)
+
+        cache_key = forecast_cache_key(
+            plant_name, operational_params, start_year, end_year, dataset_id, fmt, granularity,
+            extrapolate, estimator
+        )
+        cached = RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            return cached_response(cached, if_none_match)
+
+        # Uploaded sales replace the plant's sales; history stays from plant_data.py
+        sales_df = None
+        if dataset_id is not None:
+            sales_df = get_dataset_store().annual_sales(dataset_id, plant_name)
+
         # Run forecast using data from plant_data.py with operational parameters
-        result = run_forecast_for_plant(
+        result = await get_executor().run(
+            run_forecast_for_plant,
             plant_name=plant_name,
+            sales_df=sales_df,
             operational_params=operational_params,
             start_year=start_year,
-            end_year=end_year
+            end_year=end_year,
+            layout=forecast_layout(fmt),
+            granularity=granularity,
+            extrapolate=extrapolate,
+            estimator=estimator
         )
         
-        # Return JSON response
-        return JSONResponse(content={
-            "status": "success",
-            "plant": result["plant"],
-            "operational_params": result.get("operational_params", {}),
-            "calibration": result["calibration"],
-            "policy_params": result.get("policy_params", {}),
-            "forecast": result["forecast"],
-            "historical_debug": result["historical_debug"],
-            "historical_areas": result.get("historical_areas", [])
-        })
-        
+        # Encode in the negotiated format
+        with stage_timer("response", plant_name):
+            body, media_type = forecast_body(result, fmt)
+            entry = RESPONSE_CACHE.put(cache_key, body, media_type)
+        return cached_response(entry, if_none_match)
+
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Forecast computation timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+class SweepRequest(BaseModel):
+    plant_name: str
+    param_ranges: Optional[Dict[str, Union[List[float], Dict[str, float]]]] = None
+    scenarios: Optional[List[Dict[str, float]]] = None
+    base_params: Optional[Dict[str, float]] = None
+
+
+@router.post("/area-forecast/sweep")
+async def area_forecast_sweep(
+    request: SweepRequest,
+    format: Optional[str] = Query(None, description="Response format: json, columnar, arrow or msgpack (overrides Accept)"),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Evaluate many operational-parameter scenarios for one plant in a single call.
+
+    Either `param_ranges` (cartesian grid; each range is a list of values or
+    {start, stop, num|step}) or an explicit `scenarios` list must be given.
+    Parameters not varied come from `base_params`, then the plant defaults.
+    The plant is calibrated once and all scenarios are evaluated as one array
+    computation over FY2026-FY2030.
+
+    Returns:
+        - plant, scenario_count, FY, sales_units
+        - parameters: one list per varied parameter (scenario order)
+        - calibration: one list per calibration factor
+        - areas: per category, one list of yearly values per scenario
+
+    The result is columnar in every format; with `format=arrow` (or the
+    matching Accept) it is an Arrow IPC stream with one row per scenario.
+    """
+    try:
+        fmt = negotiate(accept, format)
+        with request_timer("area-forecast-sweep", request.plant_name):
+            result = await get_executor().run(
+                run_scenario_sweep,
+                plant_name=request.plant_name,
+                param_ranges=request.param_ranges,
+                scenarios=request.scenarios,
+                base_params=request.base_params,
+                start_year=FORECAST_START_YEAR,
+                end_year=FORECAST_END_YEAR,
+                as_arrays=True
+            )
+            with stage_timer("response", request.plant_name):
+                body, media_type = encode_sweep({"status": "success", **result}, fmt)
+            return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
+
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Forecast computation timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+class MonteCarloRequest(BaseModel):
+    plant_name: str
+    param_distributions: Optional[Dict[str, Dict[str, Union[str, float]]]] = None
+    sales_growth: Optional[Dict[str, Union[str, float]]] = None
+    n_samples: int = 100_000
+    seed: Optional[int] = None
+    percentiles: List[float] = [10, 50, 90]
+    base_params: Optional[Dict[str, float]] = None
+
+
+@router.post("/area-forecast/monte-carlo")
+async def area_forecast_monte_carlo(request: MonteCarloRequest):
+    """
+    Stochastic forecast with percentile bands over FY2026-FY2030.
+
+    `param_distributions` maps operational parameters to distribution specs
+    ({"dist": "triangular", "low": .., "mode": .., "high": ..}, normal,
+    uniform, lognormal, fixed); `sales_growth` is the distribution of the
+    yearly sales growth deviation. Use `seed` for reproducible bands.
+
+    Calibration is fitted once at `base_params` and sampled parameters act
+    on the forecast side only. /area-forecast recalibrates on the requested
+    parameters, which cancels every parameter except total_plant_area out
+    of the forecast areas, so the bands of other sampled parameters have no
+    /area-forecast equivalent (responses carry calibration="nominal").
+
+    Returns:
+        - FY, n_samples, method ("exact" or "histogram"), resolution_m2
+        - bands: per category, one list per percentile (p10, p50, p90) and mean
+        - vacant_floor_probability: per FY share of samples at the 8% floor
+        - calibration, calibration_note: how the samples relate to /area-forecast
+    """
+    try:
+        with request_timer("area-forecast-monte-carlo", request.plant_name):
+            result = await get_executor().run(
+                run_monte_carlo_forecast,
+                plant_name=request.plant_name,
+                param_distributions=request.param_distributions,
+                sales_growth=request.sales_growth,
+                n_samples=request.n_samples,
+                seed=request.seed,
+                percentiles=tuple(request.percentiles),
+                base_params=request.base_params,
+                start_year=FORECAST_START_YEAR,
+                end_year=FORECAST_END_YEAR
+            )
+            return JSONResponse(content={"status": "success", **result})
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Forecast computation timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+class GoalSeekRequest(BaseModel):
+    plant_name: str
+    parameter: Optional[str] = None
+    parameters: Optional[List[str]] = None
+    first_range: Optional[Union[List[float], Dict[str, float]]] = None
+    min_vacant_ratio: float = 0.08
+    min_vacant_m2: float = 0.0
+    base_params: Optional[Dict[str, float]] = None
+
+
+@router.post("/area-forecast/goal-seek")
+async def area_forecast_goal_seek(request: GoalSeekRequest):
+    """
+    Solve for the parameter value(s) that keep vacant area on target in every
+    forecast year (FY2026-FY2030).
+
+    Give `parameter` to solve one parameter, or `parameters` (two names) with
+    `first_range` (list or {start, stop, num|step}) for the feasibility
+    frontier over two parameters. The target is the larger of
+    `min_vacant_ratio` x total_plant_area (default 8%, must be in [0, 1))
+    and `min_vacant_m2`.
+
+    Calibration is fitted once at `base_params` and held fixed while the
+    parameter varies. /area-forecast instead recalibrates on the requested
+    parameters, which cancels every parameter except total_plant_area out
+    of the forecast areas; only total_plant_area solutions therefore match
+    /area-forecast (responses carry calibration="nominal").
+
+    Returns:
+        - single: bound ('min'/'max'), value, current_value, binding_FY, feasible
+        - frontier: first-parameter values with the matching limit of the second
+        - calibration, calibration_note: how the solve relates to /area-forecast
+    """
+    try:
+        kwargs = dict(
+            plant_name=request.plant_name,
+            min_vacant_ratio=request.min_vacant_ratio,
+            min_vacant_m2=request.min_vacant_m2,
+            base_params=request.base_params,
+            start_year=FORECAST_START_YEAR,
+            end_year=FORECAST_END_YEAR
+        )
+        with request_timer("area-forecast-goal-seek", request.plant_name):
+            if request.parameters:
+                if request.first_range is None:
+                    raise ValueError("'first_range' is required with 'parameters'")
+                result = await get_executor().run(
+                    solve_pareto, parameters=request.parameters, first_range=request.first_range, **kwargs
+                )
+            elif request.parameter:
+                result = await get_executor().run(solve_parameter, parameter=request.parameter, **kwargs)
+            else:
+                raise ValueError("Provide 'parameter' or 'parameters'")
+            return JSONResponse(content={"status": "success", **result})
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Forecast computation timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+class SessionRequest(BaseModel):
+    plant_name: str
+    operational_params: Optional[Dict[str, float]] = None
+    dataset_id: Optional[str] = None
+
+
+class SessionUpdate(BaseModel):
+    operational_params: Optional[Dict[str, Optional[float]]] = None
+    sales: Optional[Dict[int, float]] = None
+
+
+@router.post("/area-forecast/sessions")
+async def create_forecast_session(request: SessionRequest):
+    """
+    Open a live what-if session for a plant (FY2026-FY2030).
+
+    Returns the full forecast (same fields as /area-forecast) plus a
+    `session_id`. Send changes to PATCH /area-forecast/sessions/{session_id}
+    to get back only what changed.
+    """
+    try:
+        with request_timer("area-forecast-session", request.plant_name):
+            sales_df = None
+            if request.dataset_id is not None:
+                sales_df = get_dataset_store().annual_sales(request.dataset_id, request.plant_name)
+
+            # Graph updates are incremental and cheap, and the graph must stay
+            # in this process, so sessions are evaluated inline.
+            graph = ForecastGraph(
+                request.plant_name,
+                operational_params=request.operational_params,
+                start_year=FORECAST_START_YEAR,
+                end_year=FORECAST_END_YEAR,
+                sales_df=sales_df
+            )
+            session_id = SESSIONS.create(graph)
+            return JSONResponse(content={"status": "success", "session_id": session_id, **graph.result()})
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.patch("/area-forecast/sessions/{session_id}")
+async def update_forecast_session(session_id: str, update: SessionUpdate):
+    """
+    Apply parameter and/or sales changes to a session.
+
+    `operational_params` maps parameters to new values (null resets one to
+    the plant default); `sales` maps forecast FY to sales units.
+
+    Returns:
+        - version: incremented whenever the result changes
+        - changed: only the changed fields; forecast rows are listed by FY
+          with just their changed values
+    """
+    graph = _get_session(session_id)
+    try:
+        with request_timer("area-forecast-session-update", graph.plant_name):
+            delta = graph.update(operational_params=update.operational_params, sales=update.sales)
+            return JSONResponse(content={"status": "success", "session_id": session_id, **delta})
+
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/area-forecast/sessions/{session_id}")
+async def get_forecast_session(session_id: str):
+    """Full current result of a session."""
+    graph = _get_session(session_id)
+    return JSONResponse(content={"status": "success", "session_id": session_id, **graph.result()})
+
+
+@router.delete("/area-forecast/sessions/{session_id}")
+async def delete_forecast_session(session_id: str):
+    if not SESSIONS.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+    return {"status": "success"}
+
+
+def _get_session(session_id):
+    try:
+        return SESSIONS.get(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+
+
+class BatchCalibrationRequest(BaseModel):
+    plants: Optional[List[str]] = None
+    estimator: str = "mean"
+    operational_params: Optional[Dict[str, Dict[str, float]]] = None
+
+
+@router.post("/calibration/batch")
+async def batch_calibration(request: BatchCalibrationRequest):
+    """
+    Recalibrate several plants (default: all) in one vectorized pass.
+
+    Parameters:
+        - plants: Optional list of plant names (omit for all plants)
+        - estimator: mean (default), recency, trimmed, median or trend
+        - operational_params: Optional per-plant parameter overrides
+
+    Returns:
+        - plants: per plant calibration, policy_params, years of history
+          and quality (relative RMSE per factor, flags)
+        - errors: plants that could not be calibrated, with the reason
+    """
+    try:
+        result = await get_executor().run(
+            calibrate_plants,
+            plant_names=request.plants,
+            estimator=request.estimator,
+            operational_params=request.operational_params
+        )
+        return JSONResponse(content={"status": "success", **result})
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Calibration timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/calibration-cache")
+async def calibration_cache_stats():
+    """Hit/miss counters and size of the calibration cache."""
+    return calibration_cache_info()
+
+
+@router.get("/response-cache")
+async def response_cache_stats():
+    """Hit/miss counters and size of the forecast response cache."""
+    return RESPONSE_CACHE.info()
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+import asyncio
+
+from app.execution import ExecutorSaturated, get_executor
+from backtest import backtest_plants, backtest_result, validate_backtest
+from portfolio import resolve_plant_names, split_batches
+
+router = APIRouter()
+
+
+class BacktestRequest(BaseModel):
+    plants: Optional[List[str]] = None
+    cutoffs: Optional[List[int]] = None
+    horizon: int = 3
+    estimator: str = "mean"
+    window: Optional[int] = None
+    operational_params: Optional[Dict[str, Dict[str, float]]] = None
+    detail: bool = False
+
+
+@router.post("/backtest")
+async def backtest(request: BacktestRequest):
+    """
+    Rolling-origin backtest of the forecast method (see backtest.py).
+
+    Plants are split into one batch per executor worker, like
+    /portfolio-forecast.
+
+    Parameters:
+        - plants: Optional list of plant names (omit for all plants)
+        - cutoffs: Optional cutoff years (omit for every usable year)
+        - horizon: Years forecast after each cutoff
+        - estimator: Calibration estimator (mean, recency, trimmed, median, trend)
+        - window: Optional number of years before the cutoff to calibrate on
+        - operational_params: Optional per-plant parameter overrides
+        - detail: Also return every prediction
+
+    Returns:
+        - by_category / by_horizon: n, mae, rmse, mape, bias_pct
+        - by_plant: cutoffs evaluated and mape per category
+        - errors: plant name -> reason it could not be backtested
+    """
+    try:
+        validate_backtest(request.horizon, request.estimator, request.window)
+        names = resolve_plant_names(request.plants)
+        executor = get_executor()
+        batches = await asyncio.gather(*(
+            executor.run(
+                backtest_plants,
+                batch,
+                request.cutoffs,
+                request.horizon,
+                request.estimator,
+                request.window,
+                request.operational_params
+            )
+            for batch in split_batches(names, executor.max_workers)
+        ))
+
+        rows, errors = {}, {}
+        for batch_rows, batch_errors in batches:
+            rows.update(batch_rows)
+            errors.update(batch_errors)
+
+        return JSONResponse(content={
+            "status": "success",
+            **backtest_result(
+                names, rows, errors, request.horizon, request.estimator, request.window, request.detail
+            )
+        })
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Backtest computation timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
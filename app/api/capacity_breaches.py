@@ -0,0 +1,41 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+
+from breach_index import get_breach_index
+
+router = APIRouter()
+
+
+@router.get("/capacity-breaches")
+async def capacity_breaches(
+    before_fy: Optional[int] = Query(None, description="Only breaches strictly before this FY"),
+    min_shortfall_m2: Optional[float] = Query(None, description="Only shortfalls larger than this (m²)"),
+    plant: Optional[str] = Query(None, description="Only this plant"),
+    scenario: Optional[str] = Query(None, description="Only 'default' forecasts or saved 'run's"),
+    limit: Optional[int] = Query(None, ge=1, le=10000)
+):
+    """
+    Capacity breaches across plants, from the breach index (see breach_index.py).
+
+    A breach is the first forecast period whose allocated areas leave less
+    than the 8% minimum vacant area of total_plant_area. Each plant's
+    default forecast and every saved run are indexed; the index refreshes
+    incrementally (changed plants and new or deleted runs only).
+
+    Returns:
+        - breaches: earliest first; plant, scenario, run_id, name,
+          total_plant_area, stale, breach_FY (breach_period), shortfall_m2,
+          allocated_m2, over_capacity, limiting_category, limiting_increase_m2
+        - index: entry counts (including stale entries whose last refresh
+          failed) and indexing errors
+    """
+    index = get_breach_index()
+    try:
+        await run_in_threadpool(index.refresh)
+        breaches = index.query(before_fy, min_shortfall_m2, plant, scenario, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    return {"status": "success", "count": len(breaches), "breaches": breaches, "index": index.status()}
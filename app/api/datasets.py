@@ -0,0 +1,87 @@
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+import os
+
+from datasets import CsvChunkReader, SalesForecastParser, get_dataset_store, iter_xlsx_rows
+
+router = APIRouter()
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+MAX_UPLOAD_BYTES = int(float(os.environ.get("AREA_FORECAST_MAX_UPLOAD_MB", "100")) * 1024 * 1024)
+
+
+@router.post("/sales-forecasts")
+async def upload_sales_forecast(file: UploadFile = File(..., description="CSV or XLSX sales forecast")):
+    """
+    Upload a sales forecast (CSV or XLSX) and store it as a dataset.
+
+    The file is read in chunks and validated incrementally; columns are
+    `FY`, `sales_units` and optionally `plant` and `month`. The returned
+    `dataset_id` is content-addressed and can be passed to
+    `/api/area-forecast?dataset_id=...` to forecast with the uploaded sales.
+
+    Returns:
+        - dataset_id: ID of the stored dataset
+        - rows, granularity, plants: summary of the parsed data; each plant
+          lists `incomplete_FY`, monthly fiscal years with fewer than 12
+          months, which are rejected when forecasting
+    """
+    filename = (file.filename or "").lower()
+    parser = SalesForecastParser()
+
+    try:
+        if filename.endswith(".xlsx"):
+            await _check_size(file)
+            await run_in_threadpool(_parse_xlsx, file.file, parser)
+        elif filename.endswith(".csv") or file.content_type in ("text/csv", "application/csv"):
+            reader = CsvChunkReader()
+            received = 0
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                received += len(chunk)
+                if received > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Upload exceeds size limit")
+                await run_in_threadpool(_parse_csv_chunk, reader, parser, chunk)
+            await run_in_threadpool(_parse_csv_chunk, reader, parser, None)
+        else:
+            raise HTTPException(status_code=415, detail="Upload must be a .csv or .xlsx file")
+
+        columns = await run_in_threadpool(parser.finish)
+        store = get_dataset_store()
+        dataset_id = await run_in_threadpool(store.put, columns)
+        return {"status": "success", **store.summary(dataset_id)}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await file.close()
+
+
+@router.get("/sales-forecasts/{dataset_id}")
+async def get_sales_forecast(dataset_id: str):
+    """Summary of a previously uploaded sales forecast dataset."""
+    try:
+        return get_dataset_store().summary(dataset_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+async def _check_size(file):
+    # XLSX is a zip archive and cannot be parsed as a stream; the multipart
+    # parser has already spooled it to a temporary file, so only its size
+    # is checked here.
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    if size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Upload exceeds size limit")
+
+
+def _parse_csv_chunk(reader, parser, chunk):
+    # chunk=None flushes the rows left in the reader at end of file
+    for row in reader.feed(chunk) if chunk is not None else reader.close():
+        parser.feed_row(row)
+
+
+def _parse_xlsx(file_obj, parser):
+    for row in iter_xlsx_rows(file_obj):
+        parser.feed_row(row)
@@ -0,0 +1,185 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import asyncio
+
+from app.api.area_forecast import FORECAST_END_YEAR, FORECAST_START_YEAR
+from datasets import get_dataset_store
+from incremental import ForecastGraph, validate_param_updates, validate_sales_updates
+from instrumentation import logger
+
+router = APIRouter()
+
+
+class PendingUpdates:
+    """
+    Latest requested state of one stream, coalesced.
+
+    Parameter and sales updates are merged (the newest value of each wins),
+    and an "open" drops everything queued before it, so a burst of slider
+    moves costs one computation of the final state. Messages are validated
+    like ForecastGraph.update before they are queued, so a malformed one is
+    rejected on its own instead of failing the merged update.
+    """
+
+    def __init__(self):
+        self.open = None
+        self.operational_params = {}
+        self.sales = {}
+        self.seq = None
+        self.ready = asyncio.Event()
+
+    def add(self, message):
+        kind = message.get("type")
+        if kind == "open":
+            if not isinstance(message.get("plant_name"), str):
+                raise ValueError("'plant_name' is required")
+            operational_params = validate_param_updates(message.get("operational_params") or {})
+            self.open = {
+                **message,
+                "operational_params": {k: v for k, v in operational_params.items() if v is not None},
+            }
+            self.operational_params = {}
+            self.sales = {}
+        elif kind == "update":
+            operational_params = validate_param_updates(message.get("operational_params") or {})
+            sales = validate_sales_updates(message.get("sales") or {})
+            self.operational_params.update(operational_params)
+            self.sales.update(sales)
+        else:
+            raise ValueError(f"Unknown message type '{kind}'")
+        self.seq = message.get("seq", self.seq)
+        self.ready.set()
+
+    def has_pending(self):
+        return self.ready.is_set()
+
+    def take(self):
+        taken = (self.open, self.operational_params, self.sales, self.seq)
+        self.open = None
+        self.operational_params = {}
+        self.sales = {}
+        self.ready.clear()
+        return taken
+
+
+def merge_deltas(older, newer):
+    """Combine two 'changed' deltas into one; forecast rows merge by FY."""
+    merged = dict(older)
+    for section, changes in newer.items():
+        if section == "forecast":
+            rows = {row["FY"]: dict(row) for row in merged.get("forecast", [])}
+            for row in changes:
+                rows.setdefault(row["FY"], {}).update(row)
+            merged["forecast"] = [rows[fy] for fy in sorted(rows)]
+        elif isinstance(changes, dict):
+            merged[section] = {**merged.get(section, {}), **changes}
+        else:
+            merged[section] = changes
+    return merged
+
+
+@router.websocket("/area-forecast/ws")
+async def area_forecast_stream(websocket: WebSocket):
+    """
+    Live forecast channel for interactive parameter changes (FY2026-FY2030).
+
+    Client messages (JSON):
+        {"type": "open", "plant_name": .., "operational_params": {..}, "dataset_id": .., "seq": n}
+        {"type": "update", "operational_params": {..}, "sales": {FY: units}, "seq": n}
+
+    Server frames:
+        {"type": "result", "seq": n, ...full forecast...}   after an open
+        {"type": "delta", "seq": n, "version": v, "changed": {..}}
+        {"type": "error", "seq": n, "detail": ..}
+
+    Parameter names must be operational parameters and values finite
+    numbers (null resets a parameter in an update); sales map integer FYs
+    to finite numbers.
+
+    Updates arriving while a frame is being computed are coalesced: only
+    the latest state is computed, and intermediate frames that are already
+    stale are folded into the next one instead of being sent. `seq` echoes
+    the newest client message the frame reflects. Malformed messages get an
+    error frame and the channel stays open.
+    """
+    await websocket.accept()
+    pending = PendingUpdates()
+    worker = asyncio.create_task(_compute_frames(websocket, pending))
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (ValueError, KeyError, TypeError):
+                # Invalid JSON or a binary frame
+                await websocket.send_json({"type": "error", "seq": None, "detail": "Message is not valid JSON"})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "seq": None, "detail": "Message must be a JSON object"})
+                continue
+            try:
+                pending.add(message)
+            except (ValueError, AttributeError, TypeError) as e:
+                await websocket.send_json({"type": "error", "seq": message.get("seq"), "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        worker.cancel()
+
+
+async def _compute_frames(websocket, pending):
+    graph = None
+    needs_full = False
+    unsent = {}
+    version = 0
+    while True:
+        await pending.ready.wait()
+        open_message, operational_params, sales, seq = pending.take()
+        try:
+            if open_message is not None:
+                graph = None
+                graph = await asyncio.to_thread(_open_graph, open_message)
+                needs_full = True
+                unsent = {}
+                version = graph.version
+            if graph is None:
+                raise ValueError("Send an 'open' message first")
+
+            if operational_params or sales:
+                delta = await asyncio.to_thread(
+                    graph.update, operational_params=operational_params, sales=sales
+                )
+                unsent = merge_deltas(unsent, delta["changed"])
+                version = delta["version"]
+
+            if pending.has_pending():
+                # A newer state is already queued; this frame is stale
+                continue
+            if needs_full:
+                await websocket.send_json({"type": "result", "seq": seq, **graph.result()})
+            else:
+                await websocket.send_json({"type": "delta", "seq": seq, "version": version, "changed": unsent})
+            needs_full = False
+            unsent = {}
+
+        except asyncio.CancelledError:
+            raise
+        except ValueError as e:
+            await websocket.send_json({"type": "error", "seq": seq, "detail": str(e)})
+        except Exception as e:
+            logger.exception("forecast stream frame failed")
+            await websocket.send_json({"type": "error", "seq": seq, "detail": f"Internal server error: {str(e)}"})
+
+
+def _open_graph(message):
+    plant_name = message.get("plant_name")
+    if not plant_name:
+        raise ValueError("'plant_name' is required")
+    sales_df = None
+    if message.get("dataset_id"):
+        sales_df = get_dataset_store().annual_sales(message["dataset_id"], plant_name)
+    return ForecastGraph(
+        plant_name,
+        operational_params=message.get("operational_params"),
+        start_year=FORECAST_START_YEAR,
+        end_year=FORECAST_END_YEAR,
+        sales_df=sales_df
+    )
@@ -0,0 +1,100 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+import asyncio
+
+from app.api.area_forecast import FORECAST_END_YEAR, FORECAST_START_YEAR
+from app.execution import ExecutorSaturated, get_executor
+from horizon import validate_horizon
+from portfolio import (
+    aggregate_portfolio,
+    resolve_plant_names,
+    run_forecasts_for_plants,
+    run_plant_batches,
+    split_batches,
+)
+
+router = APIRouter()
+
+
+class PortfolioRequest(BaseModel):
+    plants: Optional[List[str]] = None
+    operational_params: Optional[Dict[str, Dict[str, float]]] = None
+    top_n: int = 5
+    start_year: int = FORECAST_START_YEAR
+    end_year: int = FORECAST_END_YEAR
+    granularity: str = "annual"
+    extrapolate: str = "none"
+
+
+@router.post("/portfolio-forecast")
+async def portfolio_forecast(request: PortfolioRequest):
+    """
+    Forecast several plants (default: all) in one call.
+
+    Plants are forecast in batches on worker processes. With the process
+    executor (AREA_FORECAST_EXECUTOR=process) there is one batch per
+    executor worker and the batches run concurrently, so a portfolio uses
+    every worker but holds at most that many executor slots. Thread workers
+    would share one GIL, so with the thread executor a single slot hands the
+    batches to the shared worker pool instead, one per CPU (see
+    portfolio.run_plant_batches; small plant sets and single-CPU hosts stay
+    inline there). The inline executor forecasts every plant in-process.
+
+    Parameters:
+        - plants: Optional list of plant names (omit for all plants)
+        - operational_params: Optional per-plant parameter overrides
+        - top_n: Number of least-headroom plants to report
+        - start_year / end_year: Optional forecast period (default 2026-2030)
+        - granularity: Optional annual (default), quarterly or monthly periods
+        - extrapolate: Optional sales extrapolation (none, flat, linear, cagr)
+
+    Returns:
+        - results: per-plant forecast results (same shape as /area-forecast)
+        - aggregate: totals_by_fy, per-plant headroom and least_headroom
+    """
+    try:
+        names = resolve_plant_names(request.plants)
+        validate_horizon(request.start_year, request.end_year, request.granularity, request.extrapolate)
+        executor = get_executor()
+        forecast_args = (
+            request.operational_params,
+            request.start_year,
+            request.end_year,
+            request.granularity,
+            request.extrapolate
+        )
+        if executor.mode == "process":
+            batches = await asyncio.gather(*(
+                executor.run(run_forecasts_for_plants, batch, *forecast_args)
+                for batch in split_batches(names, executor.max_workers)
+            ))
+        else:
+            batches = await executor.run(
+                run_plant_batches,
+                run_forecasts_for_plants,
+                names,
+                1 if executor.mode == "inline" else None,
+                *forecast_args
+            )
+
+        results = {}
+        for batch in batches:
+            results.update(batch)
+
+        return JSONResponse(content={
+            "status": "success",
+            "plants": names,
+            "results": results,
+            "aggregate": aggregate_portfolio(results, top_n=request.top_n)
+        })
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Forecast computation timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,188 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+import asyncio
+
+from app.api.area_forecast import FORECAST_END_YEAR, FORECAST_START_YEAR
+from app.execution import ExecutorSaturated, get_executor
+from breach_index import get_breach_index
+from calibration import validate_estimator
+from datasets import get_dataset_store
+from forecast import run_forecast_for_plant
+from horizon import validate_horizon
+from plant_data import PLANT_DATA
+from run_store import get_run_store, run_input_key
+
+router = APIRouter()
+
+
+class RunRequest(BaseModel):
+    plant_name: str
+    name: Optional[str] = None
+    operational_params: Optional[Dict[str, float]] = None
+    dataset_id: Optional[str] = None
+    start_year: int = FORECAST_START_YEAR
+    end_year: int = FORECAST_END_YEAR
+    granularity: str = "annual"
+    extrapolate: str = "none"
+    estimator: str = "mean"
+
+
+@router.post("/runs")
+async def create_run(request: RunRequest):
+    """
+    Run a forecast and save it in the run store (see run_store.py).
+
+    If a run with identical inputs (and unchanged plant data) is already
+    stored, it is returned instead of recomputing.
+
+    Parameters:
+        - plant_name: Plant name
+        - name: Optional display name for the run
+        - operational_params: Optional parameter overrides
+        - dataset_id: Optional uploaded sales forecast
+        - start_year / end_year, granularity, extrapolate: forecast horizon
+          (as for /area-forecast)
+        - estimator: Calibration estimator (mean, recency, trimmed, median, trend)
+
+    Returns:
+        - run: the stored run's summary
+        - existing: True when an identical earlier run was returned
+    """
+    try:
+        validate_horizon(request.start_year, request.end_year, request.granularity, request.extrapolate)
+        validate_estimator(request.estimator)
+        if request.plant_name not in PLANT_DATA:
+            raise ValueError(f"Plant '{request.plant_name}' not found in plant_data")
+
+        store = get_run_store()
+        inputs = {
+            "plant": request.plant_name,
+            "start_year": request.start_year,
+            "end_year": request.end_year,
+            "granularity": request.granularity,
+            "extrapolate": request.extrapolate,
+            "estimator": request.estimator,
+            "dataset_id": request.dataset_id,
+            "plant_version": PLANT_DATA.version(request.plant_name),
+        }
+        input_key = run_input_key(
+            request.plant_name, request.operational_params, request.start_year, request.end_year,
+            request.granularity, request.extrapolate, request.dataset_id, inputs["plant_version"],
+            request.estimator
+        )
+        existing = await run_in_threadpool(store.find, input_key)
+        if existing is not None:
+            return {"status": "success", "run": existing, "existing": True}
+
+        sales_df = None
+        if request.dataset_id is not None:
+            sales_df = get_dataset_store().annual_sales(request.dataset_id, request.plant_name)
+
+        result = await get_executor().run(
+            run_forecast_for_plant,
+            plant_name=request.plant_name,
+            sales_df=sales_df,
+            operational_params=request.operational_params,
+            start_year=request.start_year,
+            end_year=request.end_year,
+            layout="columns",
+            granularity=request.granularity,
+            extrapolate=request.extrapolate,
+            estimator=request.estimator
+        )
+        run_id = await run_in_threadpool(store.record, result, inputs, input_key, request.name)
+        get_breach_index().invalidate()
+        run = await run_in_threadpool(store.summary, run_id)
+        return {"status": "success", "run": run, "existing": False}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Forecast computation timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/runs")
+async def list_runs(
+    plant: Optional[str] = Query(None, description="Only runs of this plant"),
+    fy_from: Optional[int] = Query(None, description="Only runs whose forecast reaches this FY"),
+    fy_to: Optional[int] = Query(None, description="Only runs whose forecast starts by this FY"),
+    param: Optional[List[str]] = Query(None, description="Parameter filter name:value or name:min:max (repeatable, bounds may be empty)"),
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Stored runs, newest first, filtered by plant, FY range and effective
+    operational-parameter values (e.g. `param=base_oee:0.7:0.9`).
+
+    Returns:
+        - total: number of matching runs
+        - runs: run summaries (inputs, parameters, calibration)
+    """
+    try:
+        filters = [_parse_param_filter(text) for text in param or ()]
+        page = await run_in_threadpool(
+            get_run_store().list, plant, fy_from, fy_to, filters, limit, offset
+        )
+        return {"status": "success", **page}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/runs/{run_id}")
+async def get_run(
+    run_id: int,
+    fy_from: Optional[int] = Query(None, description="First forecast FY to return"),
+    fy_to: Optional[int] = Query(None, description="Last forecast FY to return")
+):
+    """A stored run in the /area-forecast response shape, plus its summary under `run`."""
+    try:
+        run = await run_in_threadpool(get_run_store().get, run_id, fy_from, fy_to)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    return {"status": "success", **run}
+
+
+@router.delete("/runs/{run_id}")
+async def delete_run(run_id: int):
+    try:
+        await run_in_threadpool(get_run_store().delete, run_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    get_breach_index().invalidate()
+    return {"status": "success", "deleted": run_id}
+
+
+@router.get("/runs/{run_id}/diff/{other_id}")
+async def diff_run(run_id: int, other_id: int):
+    """
+    Compare two stored runs without recomputing either.
+
+    Returns changed inputs, operational parameters and calibration as
+    {a, b, delta}, and per forecast period (matched by FY, or by period
+    label for sub-annual runs) every area as {a, b, delta}.
+    """
+    try:
+        diff = await run_in_threadpool(get_run_store().diff, run_id, other_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Run {e.args[0]} not found")
+    return {"status": "success", **diff}
+
+
+def _parse_param_filter(text):
+    """'name:value' or 'name:min:max' -> (name, min, max); empty bounds are open."""
+    parts = text.split(":")
+    if len(parts) == 2:
+        parts.append(parts[1])
+    if len(parts) != 3 or not parts[0]:
+        raise ValueError(f"Invalid parameter filter '{text}', expected name:value or name:min:max")
+    try:
+        low, high = (float(value) if value else None for value in parts[1:])
+    except ValueError:
+        raise ValueError(f"Invalid parameter filter '{text}', bounds must be numbers")
+    return parts[0], low, high
@@ -0,0 +1,254 @@
+"""
+Response encodings and content negotiation for forecast results.
+
+Formats (pick with the Accept header or the `format` query parameter):
+
+    json       application/json                              (default)
+               forecast as a list of per-year objects, as before
+    columnar   application/vnd.area-forecast.columnar+json
+               forecast as one array per field
+    arrow      application/vnd.apache.arrow.stream
+               Arrow IPC stream of the result table; the remaining fields
+               are JSON in the schema metadata key "area_forecast"
+    msgpack    application/msgpack
+               MessagePack of the columnar layout
+
+JSON is encoded with orjson when it is installed, which serializes NumPy
+arrays directly; otherwise the stdlib encoder is used. Arrow needs pyarrow
+and MessagePack needs msgpack; both are optional and a request for a
+format whose package is missing gets 406.
+"""
+
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional fast path
+    orjson = None
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.area-forecast.columnar+json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "msgpack": "application/msgpack",
+}
+
+# Extra media types accepted for a format
+MEDIA_TYPE_ALIASES = {
+    "application/x-msgpack": "msgpack",
+    "application/vnd.apache.arrow.file": "arrow",
+}
+
+ARROW_METADATA_KEY = b"area_forecast"
+
+
+class NotAcceptable(ValueError):
+    """No supported (and installed) encoding matches the request."""
+
+
+# =========================================================
+# NEGOTIATION
+# =========================================================
+
+def negotiate(accept=None, fmt=None):
+    """
+    Pick the response format.
+
+    Args:
+        accept: Accept header value
+        fmt: Explicit `format` query parameter (wins over Accept)
+
+    Returns:
+        Format name (key of MEDIA_TYPES).
+    """
+    if fmt:
+        if fmt not in MEDIA_TYPES:
+            raise NotAcceptable(f"Unknown format '{fmt}', expected one of: {', '.join(MEDIA_TYPES)}")
+        _require(fmt)
+        return fmt
+    if not accept:
+        return "json"
+
+    by_media_type = {media_type: name for name, media_type in MEDIA_TYPES.items()}
+    by_media_type.update(MEDIA_TYPE_ALIASES)
+    candidates = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, _, params = item.strip().partition(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, position, media_type))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in ("*/*", "application/*"):
+            return "json"
+        name = by_media_type.get(media_type)
+        if name is not None and _available(name):
+            return name
+    raise NotAcceptable(f"None of the requested media types are supported: {accept}")
+
+
+def _available(name):
+    try:
+        _require(name)
+    except NotAcceptable:
+        return False
+    return True
+
+
+def _require(name):
+    module = {"arrow": "pyarrow", "msgpack": "msgpack"}.get(name)
+    if module is None:
+        return
+    try:
+        __import__(module)
+    except ImportError:
+        raise NotAcceptable(f"Format '{name}' needs the optional '{module}' package")
+
+
+# =========================================================
+# ENCODERS
+# =========================================================
+
+def to_builtin(value):
+    """Recursively replace NumPy arrays and scalars with Python objects."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {key: to_builtin(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(item) for item in value]
+    return value
+
+
+def encode_json(content):
+    """Compact UTF-8 JSON; NumPy arrays are serialized natively by orjson."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        to_builtin(content), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def encode_msgpack(content):
+    import msgpack
+    return msgpack.packb(to_builtin(content), use_bin_type=True)
+
+
+def encode_arrow(table_columns, metadata):
+    """
+    Arrow IPC stream of one table.
+
+    Args:
+        table_columns: Mapping of column name -> 1-D array, or 2-D array
+                       (stored as a fixed-size list per row)
+        metadata: JSON-serializable dict stored in the schema metadata
+
+    int64 columns whose values fit are stored as int32.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    arrays, names = [], []
+    for name, values in table_columns.items():
+        values = np.ascontiguousarray(values)
+        if values.dtype == np.int64 and values.size and np.abs(values).max() < 2**31:
+            # Areas and unit counts fit int32; halves the payload
+            values = values.astype(np.int32)
+        if values.ndim == 2:
+            flat = pa.array(values.reshape(-1))
+            arrays.append(pa.FixedSizeListArray.from_arrays(flat, values.shape[1]))
+        else:
+            arrays.append(pa.array(values))
+        names.append(name)
+
+    table = pa.Table.from_arrays(arrays, names=names)
+    table = table.replace_schema_metadata({ARROW_METADATA_KEY: encode_json(metadata)})
+    sink = pa.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_forecast(content, fmt):
+    """
+    Encode a forecast response built with layout="columns" (or "rows" for json).
+
+    Returns:
+        (body bytes, media type)
+    """
+    if fmt in ("json", "columnar"):
+        body = encode_json(content)
+    elif fmt == "msgpack":
+        body = encode_msgpack(content)
+    elif fmt == "arrow":
+        metadata = {key: value for key, value in content.items() if key != "forecast"}
+        body = encode_arrow(content["forecast"], metadata)
+    else:
+        raise NotAcceptable(f"Unknown format '{fmt}'")
+    return body, MEDIA_TYPES[fmt]
+
+
+def forecast_body(result, fmt):
+    """
+    Encoded /area-forecast response for a run_forecast_for_plant result.
+
+    The result must be built with layout="rows" for json and
+    layout="columns" for every other format.
+
+    Returns:
+        (body bytes, media type)
+    """
+    return encode_forecast({
+        "status": "success",
+        "plant": result["plant"],
+        "operational_params": result.get("operational_params", {}),
+        "calibration": result["calibration"],
+        "policy_params": result.get("policy_params", {}),
+        "forecast": result["forecast"],
+        "historical_debug": result["historical_debug"],
+        "historical_areas": result.get("historical_areas", [])
+    }, fmt)
+
+
+def forecast_layout(fmt):
+    """Forecast layout run_forecast_for_plant must produce for a format."""
+    return "rows" if fmt == "json" else "columns"
+
+
+def encode_sweep(content, fmt):
+    """
+    Encode a sweep response built with as_arrays=True.
+
+    The Arrow table has one row per scenario: the varied parameters, the
+    calibration factors and, per area category, the list of yearly values.
+
+    Returns:
+        (body bytes, media type)
+    """
+    if fmt in ("json", "columnar"):
+        body = encode_json(content)
+    elif fmt == "msgpack":
+        body = encode_msgpack(content)
+    elif fmt == "arrow":
+        table_columns = {**content["parameters"], **content["calibration"], **content["areas"]}
+        metadata = {
+            key: value for key, value in content.items()
+            if key not in ("parameters", "calibration", "areas")
+        }
+        metadata["parameters"] = list(content["parameters"])
+        body = encode_arrow(table_columns, metadata)
+    else:
+        raise NotAcceptable(f"Unknown format '{fmt}'")
+    return body, MEDIA_TYPES[fmt]
@@ -0,0 +1,127 @@
+"""
+Execution backend for CPU-bound forecast work.
+
+Route handlers are async; the forecast itself is synchronous NumPy code.
+ForecastExecutor runs it off the event loop with bounded queue depth,
+backpressure and a per-call timeout.
+
+Configuration (environment variables):
+    AREA_FORECAST_EXECUTOR     "thread" (default), "process" or "inline"
+    AREA_FORECAST_WORKERS      worker count (default: CPU count)
+    AREA_FORECAST_MAX_PENDING  max running + queued calls (default: 4 x workers)
+    AREA_FORECAST_TIMEOUT_S    per-call timeout in seconds (default: 30)
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTOR_MODES = ("thread", "process", "inline")
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the executor already holds max_pending calls."""
+
+
+def _preload_plants():
+    """Process-pool initializer: import the engine and plant registry once per worker."""
+    import forecast  # noqa: F401
+    from plant_data import PLANT_DATA
+    for name in PLANT_DATA:
+        PLANT_DATA[name]
+
+
+class ForecastExecutor:
+    def __init__(self, mode="thread", max_workers=None, max_pending=None, timeout=30.0):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {EXECUTOR_MODES}")
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self.timeout = timeout
+
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="forecast"
+            )
+        elif mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_preload_plants
+            )
+
+    @property
+    def pending(self):
+        return self._pending
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the backend and await its result.
+
+        Raises:
+            ExecutorSaturated: if max_pending calls are already in flight
+            asyncio.TimeoutError: if the call exceeds the configured timeout
+        """
+        if self._pool is None:
+            return fn(*args, **kwargs)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ExecutorSaturated(
+                    f"Forecast executor saturated ({self._pending} calls pending)"
+                )
+            self._pending += 1
+
+        try:
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        # The slot is released when the worker finishes, not when the caller
+        # gives up, so timed-out work still counts against the queue depth.
+        future.add_done_callback(lambda _: self._release())
+
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_executor = None
+
+
+def executor_from_env():
+    workers = os.environ.get("AREA_FORECAST_WORKERS")
+    max_pending = os.environ.get("AREA_FORECAST_MAX_PENDING")
+    return ForecastExecutor(
+        mode=os.environ.get("AREA_FORECAST_EXECUTOR", "thread"),
+        max_workers=int(workers) if workers else None,
+        max_pending=int(max_pending) if max_pending else None,
+        timeout=float(os.environ.get("AREA_FORECAST_TIMEOUT_S", "30")),
+    )
+
+
+def get_executor():
+    """Process-wide executor, created from the environment on first use."""
+    global _executor
+    if _executor is None:
+        _executor = executor_from_env()
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
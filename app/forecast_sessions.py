@@ -0,0 +1,62 @@
+"""
+Live what-if sessions backed by incremental forecast graphs.
+
+A session holds one ForecastGraph, so parameter changes are applied
+incrementally and only the changed fields go back to the client. Sessions
+are kept in memory, in an LRU bounded in size and idle time. They live in
+the API process and are not shared between replicas.
+
+Configuration (environment variables):
+    AREA_FORECAST_SESSIONS        max open sessions (default 256)
+    AREA_FORECAST_SESSION_TTL_S   idle lifetime in seconds (default 1800)
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionStore:
+    """Size- and idle-time-bounded LRU of forecast graphs."""
+
+    def __init__(self, maxsize=256, ttl=1800.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, graph):
+        session_id = secrets.token_urlsafe(16)
+        with self._lock:
+            self._sessions[session_id] = (graph, time.monotonic() + self.ttl)
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+        return session_id
+
+    def get(self, session_id):
+        """The session's graph; KeyError when unknown or expired."""
+        now = time.monotonic()
+        with self._lock:
+            graph, expires_at = self._sessions[session_id]
+            if expires_at <= now:
+                del self._sessions[session_id]
+                raise KeyError(session_id)
+            self._sessions[session_id] = (graph, now + self.ttl)
+            self._sessions.move_to_end(session_id)
+            return graph
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def info(self):
+        with self._lock:
+            return {"size": len(self._sessions), "maxsize": self.maxsize, "ttl": self.ttl}
+
+
+SESSIONS = SessionStore(
+    maxsize=int(os.environ.get("AREA_FORECAST_SESSIONS", "256")),
+    ttl=float(os.environ.get("AREA_FORECAST_SESSION_TTL_S", "1800")),
+)
@@ -0,0 +1,118 @@
+"""
+Server-side cache of encoded forecast responses.
+
+Entries are keyed on the normalized request (endpoint, plant, operational
+parameters, period, dataset, response format) plus the plant's data version, so changing
+plant data never serves a stale body. Bodies are stored already encoded
+together with a strong ETag; a hit costs a dict lookup and no
+serialization, and clients revalidating with If-None-Match get a 304.
+
+Configuration (environment variables):
+    AREA_FORECAST_RESPONSE_CACHE_SIZE   max entries (default 512, 0 disables)
+    AREA_FORECAST_RESPONSE_CACHE_TTL_S  entry lifetime in seconds (default 300)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Response
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "media_type", "expires_at")
+
+    def __init__(self, body, etag, media_type, expires_at):
+        self.body = body
+        self.etag = etag
+        self.media_type = media_type
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """TTL + size-bounded LRU of encoded response bodies."""
+
+    def __init__(self, maxsize=512, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key is None or self.maxsize <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, media_type="application/json"):
+        entry = CachedResponse(body, make_etag(body), media_type, time.monotonic() + self.ttl)
+        if key is None or self.maxsize <= 0:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """RFC 7232 weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def normalize_params(params):
+    """Hashable, order-independent form of an operational-parameter dict."""
+    if not params:
+        return ()
+    return tuple(sorted((name, float(value)) for name, value in params.items() if value is not None))
+
+
+def cached_response(entry, if_none_match=None):
+    """Response for a cache entry, or 304 when the client already has it."""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+
+RESPONSE_CACHE = ResponseCache(
+    maxsize=int(os.environ.get("AREA_FORECAST_RESPONSE_CACHE_SIZE", "512")),
+    ttl=float(os.environ.get("AREA_FORECAST_RESPONSE_CACHE_TTL_S", "300")),
+)
@@ -0,0 +1,169 @@
+"""
+Precomputed default-parameter forecasts.
+
+Most traffic asks for the default parameters of a registered plant over
+the standard forecast window. At startup, DefaultForecasts computes
+that forecast for every plant in PLANT_DATA and keeps the encoded body
+(with its ETag), so such requests are answered with stored bytes and no
+engine work. A background loop re-materializes a plant whenever its data
+version changes (e.g. new files in AREA_FORECAST_PLANT_DIR) and picks up
+added plants. Until a plant is refreshed, requests for it fall through to
+the normal compute path, so stale bytes are never served.
+
+Configuration (environment variables):
+    AREA_FORECAST_WARMUP            "0" disables warm-up (default "1")
+    AREA_FORECAST_WARMUP_FORMATS    comma-separated formats to materialize
+                                    (default "json", see app/encoding.py)
+    AREA_FORECAST_WARMUP_REFRESH_S  version check interval (default 5)
+"""
+
+import asyncio
+import os
+import time
+
+from app.encoding import MEDIA_TYPES, forecast_body, forecast_layout
+from app.execution import get_executor
+from app.response_cache import CachedResponse, make_etag
+from forecast import run_forecast_for_plant
+from instrumentation import logger
+from plant_data import PLANT_DATA
+
+
+class DefaultForecasts:
+    """Ready-to-serve default forecasts, refreshed on plant data changes."""
+
+    def __init__(self, formats=("json",), refresh_interval=5.0, enabled=True):
+        unknown = [fmt for fmt in formats if fmt not in MEDIA_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown warm-up format(s): {', '.join(unknown)}")
+        self.formats = tuple(formats)
+        self.refresh_interval = refresh_interval
+        self.enabled = enabled
+        self.start_year = None
+        self.end_year = None
+        self.state = "pending"
+        self.errors = {}
+        self.started_at = None
+        self.ready_at = None
+        self._entries = {}
+        self._versions = {}
+        self._task = None
+
+    # -----------------------------------------------------
+    # Serving
+    # -----------------------------------------------------
+
+    def get(self, plant_name, fmt, start_year, end_year):
+        """The stored response, or None if it is missing or outdated."""
+        if (start_year, end_year) != (self.start_year, self.end_year):
+            return None
+        entry = self._entries.get((plant_name, fmt))
+        if entry is None or plant_name not in PLANT_DATA:
+            return None
+        if self._versions.get(plant_name) != PLANT_DATA.version(plant_name):
+            return None
+        return entry
+
+    @property
+    def ready(self):
+        return self.state in ("ready", "disabled")
+
+    def status(self):
+        return {
+            "state": self.state,
+            "plants": sorted(self._versions),
+            "formats": list(self.formats),
+            "errors": dict(self.errors),
+            "warmup_seconds": (
+                round(self.ready_at - self.started_at, 3)
+                if self.ready_at is not None and self.started_at is not None else None
+            ),
+        }
+
+    # -----------------------------------------------------
+    # Materialization
+    # -----------------------------------------------------
+
+    async def materialize(self, plant_name):
+        """Compute and store every warm format of one plant's default forecast."""
+        version = PLANT_DATA.version(plant_name)
+        entries = {}
+        for fmt in self.formats:
+            result = await get_executor().run(
+                run_forecast_for_plant,
+                plant_name=plant_name,
+                start_year=self.start_year,
+                end_year=self.end_year,
+                layout=forecast_layout(fmt)
+            )
+            body, media_type = forecast_body(result, fmt)
+            entries[(plant_name, fmt)] = CachedResponse(body, make_etag(body), media_type, float("inf"))
+        self._entries.update(entries)
+        self._versions[plant_name] = version
+        self.errors.pop(plant_name, None)
+
+    async def refresh(self):
+        """Materialize plants that are new or whose data version changed."""
+        names = list(PLANT_DATA)
+        for plant_name in set(self._versions) - set(names):
+            self._versions.pop(plant_name, None)
+            for fmt in self.formats:
+                self._entries.pop((plant_name, fmt), None)
+
+        for plant_name in names:
+            try:
+                if self._versions.get(plant_name) == PLANT_DATA.version(plant_name):
+                    continue
+                await self.materialize(plant_name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors[plant_name] = str(e)
+                logger.warning("default forecast warm-up failed", extra={"plant": plant_name, "error": str(e)})
+
+    async def _run(self):
+        self.state = "warming"
+        self.started_at = time.monotonic()
+        try:
+            await self.refresh()
+        except Exception:
+            self.state = "failed"
+            logger.exception("default forecast warm-up failed")
+            return
+        self.state = "ready"
+        self.ready_at = time.monotonic()
+        logger.info("default forecasts ready", extra=self.status())
+
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("default forecast refresh failed")
+
+    def start(self, start_year, end_year):
+        """Start warm-up and the refresh loop on the running event loop."""
+        self.start_year = start_year
+        self.end_year = end_year
+        if not self.enabled:
+            self.state = "disabled"
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+DEFAULT_FORECASTS = DefaultForecasts(
+    formats=tuple(
+        fmt.strip() for fmt in os.environ.get("AREA_FORECAST_WARMUP_FORMATS", "json").split(",") if fmt.strip()
+    ),
+    refresh_interval=float(os.environ.get("AREA_FORECAST_WARMUP_REFRESH_S", "5")),
+    enabled=os.environ.get("AREA_FORECAST_WARMUP", "1") != "0",
+)
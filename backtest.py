@@ -0,0 +1,334 @@
+"""
+backtest.py
+
+Rolling-origin backtest of the calibrate-then-forecast method.
+
+For every plant and cutoff year, the plant is calibrated on its history up
+to the cutoff (optionally only the last `window` years) and the following
+`horizon` historical years are forecast from their actual sales. The
+predicted areas are compared with the recorded historical areas per
+category, so the errors measure the area method alone, not the sales
+forecast.
+
+All cutoffs of a plant are evaluated in one vectorized pass: the history
+is masked into a (cutoffs, years) matrix and calibrated with a single
+calibrate_from_history call, like network_calibration.py does across
+plants. Plants are spread over portfolio.py's shared worker pool, or run
+inline for small plant sets, like portfolio forecasts.
+"""
+
+import numpy as np
+
+from calibration import validate_estimator
+from forecast import (
+    CALIBRATION_FACTORS,
+    calibrate_from_history,
+    forecast_area_arrays,
+    resolve_operational_params,
+)
+from plant_data import PLANT_DATA
+from portfolio import resolve_plant_names, run_plant_batches
+
+# Forecast category -> historical column holding its actual value
+CATEGORY_COLUMNS = {
+    "production_area": "production_area",
+    "inventory_area": "inventory_area",
+    "passage_area": "passage_area",
+    "people_gathering_area": "people_area",
+    "admin_area": "admin_area",
+    "external_wh_area": "external_wh_area",
+    "customer_wh_area": "customer_wh_area",
+    "vacant_area": "vacant_area",
+    "total_area": "total_area",
+}
+
+# Historical years a cutoff needs at or before it
+MIN_TRAIN_YEARS = 1
+
+
+# =========================================================
+# PER-PLANT BACKTEST
+# =========================================================
+
+def backtest_plant(plant_name, cutoffs=None, horizon=3, estimator="mean", window=None,
+                   operational_params=None):
+    """
+    Backtest one plant over several cutoffs at once.
+
+    Args:
+        plant_name: Plant in PLANT_DATA
+        cutoffs: Optional cutoff years; None uses every historical year
+                 that leaves at least one later year to predict
+        horizon: Years forecast after each cutoff
+        estimator: Calibration estimator (see calibration.py)
+        window: Optional number of years before the cutoff to calibrate on
+                (None: all of them)
+        operational_params: Optional parameter overrides
+
+    Returns:
+        Dict of equal-length arrays, one entry per predicted (cutoff, FY,
+        category) with a recorded actual: 'cutoff', 'FY', 'horizon',
+        'category' (index into CATEGORY_COLUMNS), 'predicted', 'actual'.
+    """
+    if plant_name not in PLANT_DATA:
+        raise ValueError(f"Plant '{plant_name}' not found in plant_data")
+    record = PLANT_DATA[plant_name]
+    d = resolve_operational_params(record.defaults, operational_params)
+
+    order = np.argsort(record.hist_fy, kind="stable")
+    fy = record.hist_fy[order]
+    sales = record.hist_sales[order]
+    history = {col: values[order] for col, values in record.historical.items() if col != "FY"}
+    if np.isnan(sales).any():
+        raise ValueError("Missing sales data for historical years")
+
+    candidates = fy[:-1] if cutoffs is None else np.asarray(cutoffs, dtype=np.int64)
+    train_years = np.searchsorted(fy, candidates, side="right")
+    cut = candidates[(train_years >= MIN_TRAIN_YEARS) & (train_years < len(fy))]
+    if len(cut) == 0:
+        return _empty_rows()
+
+    # One row of masked history per cutoff
+    train = fy[None, :] <= cut[:, None]
+    if window is not None:
+        train &= fy[None, :] > cut[:, None] - window
+    masked = {col: np.where(train, values[None, :], np.nan) for col, values in history.items()}
+    masked["FY"] = fy
+
+    calibration = calibrate_from_history(sales, masked, d, estimator)
+    columns = {
+        key: np.broadcast_to(np.asarray(calibration[key], dtype=float), cut.shape)[:, None]
+        for key in CALIBRATION_FACTORS
+    }
+    areas = forecast_area_arrays(sales, d, columns)
+
+    ahead = fy[None, :] - cut[:, None]
+    target = (ahead >= 1) & (ahead <= horizon)
+    rows = {key: [] for key in ("cutoff", "FY", "horizon", "category", "predicted", "actual")}
+    for index, (category, column) in enumerate(CATEGORY_COLUMNS.items()):
+        if column not in history:
+            continue
+        actual = np.broadcast_to(history[column], target.shape)
+        predicted = np.broadcast_to(areas[category], target.shape)
+        selected = target & ~np.isnan(actual)
+        cutoff_idx, year_idx = np.nonzero(selected)
+        rows["cutoff"].append(cut[cutoff_idx])
+        rows["FY"].append(fy[year_idx])
+        rows["horizon"].append(ahead[selected])
+        rows["category"].append(np.full(len(cutoff_idx), index, dtype=np.int64))
+        rows["predicted"].append(predicted[selected])
+        rows["actual"].append(actual[selected])
+    return {key: np.concatenate(parts) if parts else _empty_rows()[key] for key, parts in rows.items()}
+
+
+def _empty_rows():
+    ints = ("cutoff", "FY", "horizon", "category")
+    return {
+        key: np.empty(0, dtype=np.int64 if key in ints else float)
+        for key in ints + ("predicted", "actual")
+    }
+
+
+def backtest_plants(plant_names, cutoffs=None, horizon=3, estimator="mean", window=None,
+                    operational_params=None):
+    """
+    Backtest a batch of plants sequentially in the current process.
+
+    Returns:
+        (rows, errors): plant name -> backtest_plant rows, and plant name
+        -> reason it could not be backtested.
+    """
+    operational_params = operational_params or {}
+    rows, errors = {}, {}
+    for name in plant_names:
+        try:
+            rows[name] = backtest_plant(
+                name, cutoffs, horizon, estimator, window, operational_params.get(name)
+            )
+        except ValueError as e:
+            errors[name] = str(e)
+    return rows, errors
+
+
+# =========================================================
+# ERROR TABLES
+# =========================================================
+
+def _group_metrics(group, size, predicted, actual):
+    """
+    Error metrics of the predictions in each group.
+
+    Args:
+        group: Group index (0..size-1) per prediction
+        size: Number of groups
+        predicted / actual: Areas per prediction
+
+    Returns:
+        One dict per group with n, mae, rmse, mape (%) and bias_pct (%);
+        percentage metrics skip zero actuals and are None without any.
+    """
+    error = predicted - actual
+    nonzero = actual != 0
+    pct = np.where(nonzero, error / np.where(nonzero, np.abs(actual), 1.0), 0.0)
+
+    def total(weights=None):
+        return np.bincount(group, weights=weights, minlength=size)
+
+    n, n_pct = total(), total(nonzero.astype(float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mae = total(np.abs(error)) / n
+        rmse = np.sqrt(total(error ** 2) / n)
+        mape = total(np.abs(pct)) / n_pct * 100
+        bias = total(pct) / n_pct * 100
+
+    def rounded(values, count):
+        return [value if c else None for value, c in zip(np.round(values, 2).tolist(), count.tolist())]
+
+    columns = {
+        "mae": rounded(mae, n),
+        "rmse": rounded(rmse, n),
+        "mape": rounded(mape, n_pct),
+        "bias_pct": rounded(bias, n_pct),
+    }
+    return [
+        {"n": count, **{key: values[i] for key, values in columns.items()}}
+        for i, count in enumerate(n.tolist())
+    ]
+
+
+def error_tables(rows_by_plant, detail=False):
+    """
+    Aggregate backtest rows into error tables.
+
+    Args:
+        rows_by_plant: Plant name -> backtest_plant rows
+        detail: Also return every prediction
+
+    Returns:
+        - by_category: n, mae, rmse, mape (%), bias_pct (%) per category
+        - by_horizon: the same per category and years ahead
+        - by_plant: per plant, mape per category and the cutoffs evaluated
+        - rows: every prediction (only with detail=True)
+    """
+    categories = list(CATEGORY_COLUMNS)
+    names = list(rows_by_plant)
+    if names:
+        rows = {
+            key: np.concatenate([rows_by_plant[name][key] for name in names])
+            for key in ("cutoff", "FY", "horizon", "category", "predicted", "actual")
+        }
+        plant_idx = np.repeat(np.arange(len(names)), [len(rows_by_plant[name]["FY"]) for name in names])
+    else:
+        rows = _empty_rows()
+        plant_idx = np.empty(0, dtype=np.int64)
+    predicted, actual, category = rows["predicted"], rows["actual"], rows["category"]
+
+    metrics = _group_metrics(category, len(categories), predicted, actual)
+    by_category = [
+        {"category": name, **metrics[i]} for i, name in enumerate(categories) if metrics[i]["n"]
+    ]
+
+    max_horizon = int(rows["horizon"].max()) if len(rows["horizon"]) else 0
+    metrics = _group_metrics(category * max_horizon + rows["horizon"] - 1, len(categories) * max_horizon,
+                             predicted, actual)
+    by_horizon = [
+        {"category": name, "horizon": h + 1, **metrics[k * max_horizon + h]}
+        for k, name in enumerate(categories)
+        for h in range(max_horizon)
+        if metrics[k * max_horizon + h]["n"]
+    ]
+
+    metrics = _group_metrics(plant_idx * len(categories) + category, len(names) * len(categories),
+                             predicted, actual)
+    # Rows are contiguous per plant
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(plant_idx, minlength=len(names)))])
+    by_plant = {
+        name: {
+            "cutoffs": np.unique(rows["cutoff"][bounds[p]:bounds[p + 1]]).tolist(),
+            "mape": {
+                category_name: metrics[p * len(categories) + k]["mape"]
+                for k, category_name in enumerate(categories)
+                if metrics[p * len(categories) + k]["n"]
+            },
+        }
+        for p, name in enumerate(names)
+    }
+
+    tables = {"by_category": by_category, "by_horizon": by_horizon, "by_plant": by_plant}
+    if detail:
+        tables["rows"] = [
+            {
+                "plant": names[p], "cutoff": c, "FY": y, "horizon": h,
+                "category": categories[k], "predicted": round(pred, 2), "actual": act,
+            }
+            for p, c, y, h, k, pred, act in zip(
+                plant_idx.tolist(), rows["cutoff"].tolist(), rows["FY"].tolist(),
+                rows["horizon"].tolist(), rows["category"].tolist(),
+                rows["predicted"].tolist(), rows["actual"].tolist(),
+            )
+        ]
+    return tables
+
+
+# =========================================================
+# PARALLEL RUNNER
+# =========================================================
+
+def run_backtest(
+    plant_names=None,
+    cutoffs=None,
+    horizon=3,
+    estimator="mean",
+    window=None,
+    operational_params=None,
+    max_workers=None,
+    detail=False
+):
+    """
+    Backtest a set of plants (default: all), in parallel worker processes
+    when there are at least portfolio.INLINE_PLANT_THRESHOLD of them.
+
+    Args:
+        plant_names: Optional list of plants; None backtests every plant
+        cutoffs: Optional cutoff years (default: every usable year)
+        horizon: Years forecast after each cutoff
+        estimator: Calibration estimator (see calibration.py)
+        window: Optional calibration window in years (default: all history)
+        operational_params: Optional dict of plant name -> parameter overrides
+        max_workers: Parallel batches (default: CPU count); 1 runs inline
+        detail: Also return every prediction
+
+    Returns:
+        Dictionary with the settings, error tables (see error_tables) and
+        per-plant 'errors'.
+    """
+    validate_backtest(horizon, estimator, window)
+    names = resolve_plant_names(plant_names)
+    rows, errors = {}, {}
+    for batch_rows, batch_errors in run_plant_batches(
+        backtest_plants, names, max_workers, cutoffs, horizon, estimator, window, operational_params
+    ):
+        rows.update(batch_rows)
+        errors.update(batch_errors)
+
+    return backtest_result(names, rows, errors, horizon, estimator, window, detail)
+
+
+def validate_backtest(horizon, estimator, window=None):
+    validate_estimator(estimator)
+    if horizon < 1:
+        raise ValueError("horizon must be at least 1 year")
+    if window is not None and window < 1:
+        raise ValueError("window must be at least 1 year")
+
+
+def backtest_result(names, rows, errors, horizon, estimator, window, detail=False):
+    """The run_backtest response for per-plant rows gathered from workers."""
+    return {
+        "plants": names,
+        "horizon": horizon,
+        "estimator": estimator,
+        "window": window,
+        **error_tables(rows, detail),
+        "errors": errors,
+    }
@@ -0,0 +1,568 @@
+"""
+batch_runner.py
+
+Command-line batch runner for offline forecast jobs.
+
+    python batch_runner.py SPEC [SPEC ...] -o OUTPUT [options]
+
+Each spec file is a JSON object (or a list of them) describing a job:
+
+    {
+        "name": "month_end",              (default: file name)
+        "plants": ["DNKI", "DNIN"],       (default: every plant)
+        "start_year": 2026, "end_year": 2055,
+        "granularity": "monthly",         (see horizon.py)
+        "extrapolate": "cagr",
+        "estimator": "mean",              (see calibration.py)
+        "base_params": {"safety_buffer": 0.08},
+        "param_ranges": {"base_oee": {"start": 0.6, "stop": 0.9, "num": 31}}
+    }
+
+with either "param_ranges" (cartesian grid) or "scenarios" (list of
+parameter dicts) as in sweep.py; without either, each plant gets one
+scenario with base_params. Every (spec, plant, scenario, period) becomes one
+output row:
+
+    spec, plant, scenario, FY, period, sales_units,
+    <every sweepable parameter>, <every area>_m2
+
+Work is split into units of one plant and a slice of its scenarios holding
+about --chunk-rows rows. Units run in worker processes through the same
+vectorized engine as sweeps (values equal run_forecast_for_plant); workers
+also encode CSV / JSONL output, so the main process only appends finished
+chunks. At most two units per worker are in flight, so memory stays flat
+however large the job is. Output formats:
+
+    csv      one file with a header row
+    jsonl    one JSON object per line
+    parquet  a directory of part-NNNNNN.parquet files, one per unit
+             (needs the optional pyarrow package)
+
+Units are written in completion order. After each unit the output is
+flushed and a line with its id and the output position is appended to the
+progress file (default OUTPUT.progress). --resume truncates the output to
+the last recorded position and skips finished units, so a crashed or
+interrupted job continues where it stopped; units that failed with a
+data error are reported, left out of the progress file and retried on
+resume. Progress and throughput go to stderr every --progress-interval
+seconds.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from calibration import validate_estimator
+from forecast import (
+    CALIBRATION_FACTORS,
+    OUTPUT_CATEGORIES,
+    calibrate_from_history,
+    forecast_area_arrays,
+    prepare_plant_inputs,
+    resolve_operational_params,
+)
+from horizon import forecast_horizon, validate_horizon
+from plant_data import PLANT_DATA
+from portfolio import resolve_plant_names
+from sweep import SWEEPABLE_PARAMS, build_scenarios
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+FIELDS = (
+    ("spec", "plant", "scenario", "FY", "period", "sales_units")
+    + SWEEPABLE_PARAMS
+    + tuple(f"{c}_m2" for c in OUTPUT_CATEGORIES)
+)
+
+SPEC_KEYS = (
+    "name", "plants", "start_year", "end_year", "granularity", "extrapolate",
+    "estimator", "base_params", "param_ranges", "scenarios",
+)
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+# =========================================================
+# SPECS AND UNITS
+# =========================================================
+
+def load_specs(paths):
+    """
+    Read and validate spec files.
+
+    Returns:
+        List of spec dicts with every key of SPEC_KEYS filled in.
+    """
+    specs = []
+    for path in paths:
+        with open(path) as f:
+            content = json.load(f)
+        entries = content if isinstance(content, list) else [content]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for i, entry in enumerate(entries):
+            default_name = stem if len(entries) == 1 else f"{stem}#{i}"
+            try:
+                specs.append(_validate_spec(entry, default_name))
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}") from None
+    names = [spec["name"] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Spec names must be unique")
+    return specs
+
+
+def _validate_spec(entry, default_name):
+    if not isinstance(entry, dict):
+        raise ValueError("A spec must be a JSON object")
+    unknown = [key for key in entry if key not in SPEC_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown spec key(s): {', '.join(unknown)}")
+
+    spec = {
+        "name": entry.get("name") or default_name,
+        "plants": resolve_plant_names(entry.get("plants")),
+        "start_year": entry.get("start_year"),
+        "end_year": entry.get("end_year"),
+        "granularity": entry.get("granularity", "annual"),
+        "extrapolate": entry.get("extrapolate", "none"),
+        "estimator": entry.get("estimator", "mean"),
+        "base_params": entry.get("base_params") or {},
+        "param_ranges": entry.get("param_ranges"),
+        "scenarios": entry.get("scenarios"),
+    }
+    validate_horizon(spec["start_year"], spec["end_year"], spec["granularity"], spec["extrapolate"])
+    validate_estimator(spec["estimator"])
+    unknown = [name for name in spec["base_params"] if name not in SWEEPABLE_PARAMS]
+    if unknown:
+        raise ValueError(f"Unknown base parameter(s): {', '.join(unknown)}")
+    return spec
+
+
+def spec_scenarios(spec):
+    """Scenario table of a spec: (parameter -> array, count)."""
+    if spec["param_ranges"] or spec["scenarios"]:
+        return build_scenarios(spec["param_ranges"], spec["scenarios"])
+    return {}, 1
+
+
+def plan_units(specs, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Split the jobs into units of one plant and a slice of its scenarios.
+
+    Returns:
+        List of (unit_id, spec_index, plant, start, stop, rows) in a
+        deterministic order.
+    """
+    units = []
+    for index, spec in enumerate(specs):
+        _, count = spec_scenarios(spec)
+        for plant in spec["plants"]:
+            try:
+                periods = len(_plant_horizon(spec, plant)["FY"])
+            except ValueError:
+                periods = 0  # the unit fails with the same error and is reported
+            step = max(1, chunk_rows // max(periods, 1))
+            for start in range(0, count, step):
+                stop = min(start + step, count)
+                units.append((f"{spec['name']}:{plant}:{start}", index, plant, start, stop,
+                              (stop - start) * periods))
+    return units
+
+
+def _plant_horizon(spec, plant_name):
+    record = PLANT_DATA[plant_name]
+    return forecast_horizon(
+        record.sales_fy, record.sales_units, record.hist_fy,
+        spec["start_year"], spec["end_year"], spec["granularity"], spec["extrapolate"]
+    )
+
+
+# =========================================================
+# UNIT EVALUATION (worker side)
+# =========================================================
+
+def forecast_unit(spec, plant_name, params, first_scenario):
+    """
+    Forecast one plant for a slice of scenarios.
+
+    Args:
+        spec: Validated spec (scenario fields are not used)
+        plant_name: Plant in PLANT_DATA
+        params: Parameter name -> per-scenario values for this slice
+                (empty for the single base_params scenario)
+        first_scenario: Index of the slice's first scenario in the spec
+
+    Returns:
+        Output table as field name (FIELDS) -> array, one entry per
+        (scenario, period), scenario-major.
+    """
+    plant = PLANT_DATA[plant_name]
+    inputs = prepare_plant_inputs(plant)
+    count = len(next(iter(params.values()))) if params else 1
+
+    d = resolve_operational_params(plant.defaults, spec["base_params"])
+    for name, values in params.items():
+        d[name] = np.asarray(values, dtype=float)[:, None]
+
+    calibration = calibrate_from_history(inputs["hist_sales"], inputs["historical"], d, spec["estimator"])
+    factors = {key: np.asarray(calibration[key])[..., None] for key in CALIBRATION_FACTORS}
+    horizon = _plant_horizon(spec, plant_name)
+    areas = forecast_area_arrays(horizon["sales_units"], d, factors)
+
+    periods = len(horizon["FY"])
+    rows = count * periods
+    table = {
+        "spec": np.full(rows, spec["name"], dtype=object),
+        "plant": np.full(rows, plant_name, dtype=object),
+        "scenario": np.repeat(np.arange(first_scenario, first_scenario + count, dtype=np.int64), periods),
+        "FY": np.tile(np.asarray(horizon["FY"], dtype=np.int64), count),
+        "period": np.tile(np.array(horizon["period"] or [None] * periods, dtype=object), count),
+        "sales_units": np.tile(np.trunc(horizon["sales_units"]).astype(np.int64), count),
+    }
+    for name in SWEEPABLE_PARAMS:
+        value = np.broadcast_to(np.asarray(d[name], dtype=float), (count, 1))
+        table[name] = np.repeat(value[:, 0], periods)
+    for c in OUTPUT_CATEGORIES:
+        table[f"{c}_m2"] = np.rint(np.broadcast_to(areas[c], (count, periods))).astype(np.int64).ravel()
+    return table
+
+
+def encode_table(table, fmt, periods):
+    """
+    CSV (no header) or JSONL bytes of a forecast_unit table.
+
+    String cells are quoted once per scenario / period; the numeric cells of
+    each row are filled into a %-template.
+    """
+    rows = len(table["FY"])
+    if rows == 0:
+        return b""
+    count = rows // periods
+    area_fields = FIELDS[-len(OUTPUT_CATEGORIES):]
+
+    if fmt == "csv":
+        def text(field, value):
+            if value is None:
+                return ""
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="").writerow([value])
+            return buffer.getvalue()
+
+        def number(field, conversion):
+            return conversion
+        start, end = "", "\n"
+    else:
+        def text(field, value):
+            return f'"{field}":{json.dumps(value)}'
+
+        def number(field, conversion):
+            return f'"{field}":{conversion}'
+        start, end = "{", "}\n"
+
+    head = start + text("spec", table["spec"][0]) + "," + text("plant", table["plant"][0]) + ","
+    scenario_prefix = [head + number("scenario", "%d") % s + "," for s in table["scenario"][::periods].tolist()]
+    period_parts = [
+        number("FY", "%d") % fy + "," + text("period", period) + "," + number("sales_units", "%d") % sales
+        for fy, period, sales in zip(
+            table["FY"][:periods].tolist(), table["period"][:periods].tolist(),
+            table["sales_units"][:periods].tolist(),
+        )
+    ]
+    param_template = ",".join(number(name, "%r") for name in SWEEPABLE_PARAMS)
+    param_parts = [
+        param_template % values
+        for values in zip(*(table[name][::periods].tolist() for name in SWEEPABLE_PARAMS))
+    ]
+    area_template = ",".join(number(name, "%d") for name in area_fields)
+    areas = np.column_stack([table[name] for name in area_fields]).tolist()
+
+    lines = [
+        f"{scenario_prefix[s]}{period_parts[j]},{param_parts[s]},{area_template % tuple(areas[s * periods + j])}{end}"
+        for s in range(count)
+        for j in range(periods)
+    ]
+    return "".join(lines).encode()
+
+
+def run_unit(spec, plant_name, params, first_scenario, fmt):
+    """Forecast a unit and encode it for the output format."""
+    table = forecast_unit(spec, plant_name, params, first_scenario)
+    rows = len(table["FY"])
+    if fmt == "parquet":
+        return rows, table
+    count = len(next(iter(params.values()))) if params else 1
+    return rows, encode_table(table, fmt, rows // count)
+
+
+# =========================================================
+# OUTPUT SINKS
+# =========================================================
+
+class FileSink:
+    """CSV / JSONL file; the checkpoint is the byte offset."""
+
+    def __init__(self, path, fmt, checkpoint=None):
+        if checkpoint is None:
+            self.file = open(path, "wb")
+            if fmt == "csv":
+                self.file.write((",".join(FIELDS) + "\n").encode())
+        else:
+            self.file = open(path, "r+b")
+            self.file.truncate(checkpoint)
+            self.file.seek(checkpoint)
+
+    def write(self, payload):
+        self.file.write(payload)
+
+    def checkpoint(self):
+        self.file.flush()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """Directory of Parquet part files; the checkpoint is the part count."""
+
+    def __init__(self, path, fmt, checkpoint=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("pyarrow is required for parquet output") from e
+        self._pa, self._parquet = pa, pyarrow.parquet
+        self.root = path
+        os.makedirs(path, exist_ok=True)
+        self.parts = checkpoint or 0
+        # Drop parts written after the checkpoint (and unfinished ones)
+        for name in os.listdir(path):
+            if name.startswith("part-") and (name.endswith(".tmp") or int(name[5:11]) >= self.parts):
+                os.remove(os.path.join(path, name))
+        self.pending = []
+
+    def write(self, table):
+        self.pending.append(table)
+
+    def checkpoint(self):
+        for table in self.pending:
+            arrow = self._pa.table({field: table[field] for field in FIELDS})
+            path = os.path.join(self.root, f"part-{self.parts:06d}.parquet")
+            self._parquet.write_table(arrow, path + ".tmp")
+            os.replace(path + ".tmp", path)
+            self.parts += 1
+        self.pending = []
+        return self.parts
+
+    def close(self):
+        pass
+
+
+def open_sink(path, fmt, checkpoint=None):
+    return (ParquetSink if fmt == "parquet" else FileSink)(path, fmt, checkpoint)
+
+
+# =========================================================
+# PROGRESS FILE
+# =========================================================
+
+def job_key(specs, fmt, chunk_rows):
+    """Identity of a job; a progress file only resumes the same job."""
+    payload = json.dumps([specs, fmt, chunk_rows], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def read_progress(path, key):
+    """
+    Finished units and the last output checkpoint of an earlier run.
+
+    Returns:
+        (done, checkpoint): unit ids, and the position to truncate to.
+    """
+    with open(path) as f:
+        lines = [json.loads(line) for line in f if line.endswith("\n")]
+    if not lines or lines[0].get("job") != key:
+        raise ValueError(f"{path} belongs to a different job; run without --resume to start over")
+    done = {line["unit"] for line in lines[1:]}
+    return done, lines[-1]["checkpoint"]
+
+
+# =========================================================
+# RUNNER
+# =========================================================
+
+class Progress:
+    """Throttled progress / throughput reporting on a stream."""
+
+    def __init__(self, total_units, total_rows, interval=2.0, stream=sys.stderr):
+        self.total_units, self.total_rows = total_units, total_rows
+        self.units = self.rows = 0
+        self.interval, self.stream = interval, stream
+        self.started = self.reported = time.monotonic()
+
+    def advance(self, rows):
+        self.units += 1
+        self.rows += rows
+        now = time.monotonic()
+        if self.interval is not None and now - self.reported >= self.interval:
+            self.reported = now
+            self.report()
+
+    def report(self, final=False):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.rows / elapsed
+        line = f"[{self.units}/{self.total_units} units] {self.rows:,} rows  {rate:,.0f} rows/s"
+        if final:
+            line += f"  in {elapsed:.1f}s"
+        elif rate > 0:
+            line += f"  eta {max(self.total_rows - self.rows, 0) / rate:.0f}s"
+        if self.stream is not None:
+            print(line, file=self.stream, flush=True)
+
+
+def run_batch(specs, output, fmt="csv", workers=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+              progress_path=None, resume=False, progress_interval=2.0, stream=sys.stderr):
+    """
+    Run forecast jobs and stream the rows to an output file.
+
+    Args:
+        specs: Specs from load_specs
+        output: Output file (csv / jsonl) or directory (parquet)
+        fmt: One of FORMATS
+        workers: Worker processes (default: CPU count); 1 runs inline
+        chunk_rows: Approximate rows per unit
+        progress_path: Progress file (default: output + ".progress")
+        resume: Continue an earlier run of the same job
+        progress_interval: Seconds between progress lines (None: silent)
+        stream: Where progress goes
+
+    Returns:
+        Dictionary with 'units', 'rows' (written by this run), 'skipped'
+        (units finished earlier) and 'errors' (unit id -> message).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    progress_path = progress_path or output + ".progress"
+    key = job_key(specs, fmt, chunk_rows)
+    units = plan_units(specs, chunk_rows)
+
+    done, checkpoint = set(), None
+    if resume and os.path.exists(progress_path):
+        done, checkpoint = read_progress(progress_path, key)
+    todo = [unit for unit in units if unit[0] not in done]
+
+    sink = open_sink(output, fmt, checkpoint)
+    log = open(progress_path, "a" if checkpoint is not None else "w")
+    if checkpoint is None:
+        log.write(json.dumps({"job": key, "checkpoint": sink.checkpoint()}) + "\n")
+        log.flush()
+
+    scenarios = [spec_scenarios(spec)[0] for spec in specs]
+    progress = Progress(len(todo), sum(unit[5] for unit in todo), progress_interval, stream)
+    errors = {}
+
+    def arguments(unit):
+        unit_id, index, plant, start, stop, _ = unit
+        params = {name: values[start:stop] for name, values in scenarios[index].items()}
+        return specs[index], plant, params, start, fmt
+
+    def finish(unit, rows, payload):
+        sink.write(payload)
+        position = sink.checkpoint()
+        log.write(json.dumps({"unit": unit[0], "rows": rows, "checkpoint": position}) + "\n")
+        log.flush()
+        progress.advance(rows)
+
+    try:
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for unit in todo:
+                try:
+                    finish(unit, *run_unit(*arguments(unit)))
+                except ValueError as e:
+                    errors[unit[0]] = str(e)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                queue, in_flight = iter(todo), {}
+                while True:
+                    # Bounded submission keeps memory flat
+                    for unit in queue:
+                        in_flight[pool.submit(run_unit, *arguments(unit))] = unit
+                        if len(in_flight) >= 2 * workers:
+                            break
+                    if not in_flight:
+                        break
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        unit = in_flight.pop(future)
+                        try:
+                            finish(unit, *future.result())
+                        except ValueError as e:
+                            errors[unit[0]] = str(e)
+    finally:
+        sink.close()
+        log.close()
+
+    progress.report(final=True)
+    return {
+        "units": len(units),
+        "rows": progress.rows,
+        "skipped": len(units) - len(todo),
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run offline forecast jobs from spec files.")
+    parser.add_argument("specs", nargs="+", help="JSON spec files")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Output file (csv, jsonl) or directory (parquet)")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="Output format (default: from the output extension, else csv)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count; 1 runs inline)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="Approximate rows per work unit")
+    parser.add_argument("--progress-file", default=None,
+                        help="Progress file (default: OUTPUT.progress)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run of the same job")
+    parser.add_argument("--progress-interval", type=float, default=2.0,
+                        help="Seconds between progress lines")
+    parser.add_argument("--quiet", action="store_true", help="No progress output")
+    args = parser.parse_args(argv)
+
+    fmt = args.format
+    if fmt is None:
+        extension = os.path.splitext(args.output)[1].lstrip(".").lower()
+        fmt = extension if extension in FORMATS else "csv"
+
+    try:
+        specs = load_specs(args.specs)
+        summary = run_batch(
+            specs, args.output, fmt, args.workers, args.chunk_rows, args.progress_file,
+            args.resume, None if args.quiet else args.progress_interval,
+            None if args.quiet else sys.stderr,
+        )
+    except (ValueError, ImportError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    for unit_id, message in summary["errors"].items():
+        print(f"FAILED {unit_id}: {message}", file=sys.stderr)
+    if summary["errors"]:
+        print("re-run with --resume to retry the failed units", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
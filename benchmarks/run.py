@@ -0,0 +1,554 @@
+"""
+Benchmark suite and regression guard for the forecast pipeline.
+
+Run from the repository root:
+
+    python -m benchmarks.run                  # measure, compare with baseline
+    python -m benchmarks.run --save-baseline  # record benchmarks/baseline.json
+    python -m benchmarks.run --quick          # smaller sizes, fewer repeats
+    python -m benchmarks.run --no-baseline    # measure only, no comparison
+
+Cases (all recorded in seconds, lower is better):
+    single_plant.*   run_forecast_for_plant latency for the registered plants
+    horizon.<Y>      one synthetic plant with Y forecast years
+    network.<N>      N synthetic plants forecast back to back
+    monthly_30y.<N>  the same N plants, monthly periods over 30 years with
+                     CAGR-extrapolated sales (360 periods per plant)
+    calibration.<N>.<estimator>
+                     batch calibration of N plants with 12 years of history
+                     (network_calibration.py)
+    backtest.<N>     rolling-origin backtest of the same N plants over every
+                     cutoff, inline (backtest.py)
+    breach_index.*   capacity-breach index over every plant (breach_index.py):
+                     full build, no-op incremental refresh, and a
+                     "before FY2029 by more than 2,000 m2" query
+    sweep.<S>        scenario sweep of S scenarios
+    api.*            POST /api/area-forecast through the FastAPI app
+                     (in-process client): uncached parameters, and default
+                     parameters served from the warm-up store
+    startup.*        cold start of a fresh interpreter with the registered
+                     plants: `import main`, and import until /ready
+
+Before timing anything, optimized paths (engine, sweep, incremental graph,
+API) are checked against benchmarks/reference.py, the original row-by-row
+implementation, the last month/quarter of every FY against the annual
+result, batch calibration against per-plant calibration for every
+estimator, and backtest predictions against calibrating on each cutoff's
+truncated history; any difference fails the run. A case fails the regression
+guard when it is slower than the baseline by more than --threshold
+(relative) and by more than --min-delta seconds (absolute noise floor).
+reference.* timings are reported for comparison but never guarded.
+
+Timings are machine-specific, so benchmarks/baseline.json is not committed:
+record it once per machine (or CI runner) with --save-baseline. A check run
+without a baseline fails rather than passing vacuously, as does a baseline
+recorded in the other mode (--quick vs full); pass --no-baseline to only
+measure.
+
+Startup also has an absolute budget: the run fails when a fresh process
+takes longer than --startup-budget seconds to become ready, or when
+importing the service pulls in pandas, pyarrow or openpyxl (optional
+packages that only specific paths may import, lazily).
+
+Synthetic plants are written to a temporary plant directory that is served
+through AREA_FORECAST_PLANT_DIR, together with the registered plants, so
+every layer runs unpatched.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+REGISTERED_PLANTS = ("DNHA_M", "DNHA_J", "DNIN", "DNKI")
+
+PARAM_SETS = (
+    None,
+    {"cycle_time_hours": 0.1, "base_oee": 0.7, "total_plant_area": 20000, "warehouse_capacity_units_m2": 4},
+    {"safety_buffer": 0.2, "working_hours_year": 4000, "machine_size_m2": 120},
+)
+PERIODS = ((2026, 2030), (None, None), (2027, 2033))
+
+# Seconds a fresh process may take to become ready (--startup-budget)
+STARTUP_BUDGET_S = 0.8
+
+# Optional packages the service must not import at startup
+LAZY_MODULES = ("pandas", "pyarrow", "openpyxl")
+
+# Run in a fresh interpreter: import the app, then run its lifespan until
+# the default forecasts are materialized (what /ready reports)
+STARTUP_SCRIPT = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def until_ready(timeout=30.0):
+    async with main.app.router.lifespan_context(main.app):
+        while not main.DEFAULT_FORECASTS.ready and main.DEFAULT_FORECASTS.state != "failed":
+            if time.perf_counter() - imported > timeout:
+                break
+            await asyncio.sleep(0.001)
+
+asyncio.run(until_ready())
+print(json.dumps({
+    "import": imported - start,
+    "ready": time.perf_counter() - start if main.DEFAULT_FORECASTS.ready else None,
+    "modules": [m for m in %r if m in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+FULL_SIZES = {
+    "horizon": (10, 100, 1000, 10000),
+    "network": (1, 10, 100, 1000),
+    "sweep": (1000, 100000),
+    "repeat": 50,
+}
+QUICK_SIZES = {
+    "horizon": (10, 100, 1000),
+    "network": (1, 10, 100),
+    "sweep": (1000, 10000),
+    "repeat": 10,
+}
+
+
+# =========================================================
+# SETUP
+# =========================================================
+
+def build_plant_directory(root, sizes):
+    """Write the registered plus synthetic plants into a plant directory."""
+    from benchmarks.synthetic import synthetic_plants
+    from plant_data import _RAW_PLANT_DATA
+    from plant_repository import InMemoryPlantRepository, write_plant_directory
+
+    raw = dict(_RAW_PLANT_DATA)
+    for years in sizes["horizon"]:
+        raw.update(synthetic_plants(1, years, seed=years, prefix="HORIZON"))
+    raw.update(synthetic_plants(max(sizes["network"]), 10, seed=10_000, prefix="NETWORK"))
+    raw.update(synthetic_plants(max(sizes["network"]), 10, seed=20_000, prefix="HISTORY", history_years=12))
+    write_plant_directory(InMemoryPlantRepository(raw), root)
+    return raw
+
+
+def measure(fn, repeat, warmup=1):
+    """Median and p95 wall time of fn() over `repeat` runs, in seconds."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "median": statistics.median(times),
+        "p95": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+    }
+
+
+def _canonical(result):
+    return json.dumps(result, sort_keys=True)
+
+
+# =========================================================
+# NUMERIC IDENTITY
+# =========================================================
+
+def check_identity(sizes):
+    """
+    Compare every optimized path with the reference implementation.
+
+    Returns:
+        List of mismatch descriptions (empty when identical).
+    """
+    from fastapi.testclient import TestClient
+
+    from backtest import CATEGORY_COLUMNS, backtest_plant
+    from benchmarks.reference import reference_forecast_for_plant, reference_plant
+    from calibration import ESTIMATORS
+    from forecast import (
+        CALIBRATION_FACTORS,
+        OUTPUT_CATEGORIES,
+        calibrate_from_history,
+        forecast_area_arrays,
+        resolve_operational_params,
+        run_forecast_for_plant,
+    )
+    from incremental import ForecastGraph
+    from main import app
+    from network_calibration import calibrate_plants
+    from plant_data import PLANT_DATA
+    from sweep import run_scenario_sweep
+
+    failures = []
+    plants = list(REGISTERED_PLANTS) + [f"HORIZON_{y}_0" for y in sizes["horizon"] if y <= 1000]
+
+    for name in plants:
+        plant = reference_plant(PLANT_DATA[name])
+        for params in PARAM_SETS:
+            for start_year, end_year in PERIODS:
+                expected = reference_forecast_for_plant(
+                    name, plant, operational_params=params, start_year=start_year, end_year=end_year
+                )
+                got = run_forecast_for_plant(
+                    name, operational_params=params, start_year=start_year, end_year=end_year
+                )
+                if _canonical(got) != _canonical(expected):
+                    failures.append(f"engine {name} params={params} period={start_year}-{end_year}")
+
+                graph = ForecastGraph(name, start_year=start_year, end_year=end_year)
+                if params:
+                    graph.update(operational_params=params)
+                got = graph.result()
+                got.pop("version")
+                if _canonical(got) != _canonical(expected):
+                    failures.append(f"incremental {name} params={params} period={start_year}-{end_year}")
+
+        # Sweep: every scenario must equal the reference run with its parameters
+        ranges = {"base_oee": [0.6, 0.75, 0.9], "total_plant_area": [20000, 45000]}
+        sweep = run_scenario_sweep(name, param_ranges=ranges, start_year=2026, end_year=2030)
+        for i in range(sweep["scenario_count"]):
+            params = {**sweep["base_params"], **{k: v[i] for k, v in sweep["parameters"].items()}}
+            expected = reference_forecast_for_plant(
+                name, plant, operational_params=params, start_year=2026, end_year=2030
+            )["forecast"]
+            for category in OUTPUT_CATEGORIES:
+                key = f"{category}_m2"
+                if sweep["areas"][key][i] != [row[key] for row in expected]:
+                    failures.append(f"sweep {name} scenario {i} {key}")
+
+        # Sub-annual periods: each FY's last period equals the annual row
+        annual = run_forecast_for_plant(name, start_year=2026, end_year=2030)["forecast"]
+        for granularity, per_year in (("quarterly", 4), ("monthly", 12)):
+            rows = run_forecast_for_plant(
+                name, start_year=2026, end_year=2030, granularity=granularity
+            )["forecast"]
+            year_ends = [{k: v for k, v in row.items() if k != "period"} for row in rows[per_year - 1::per_year]]
+            if year_ends != annual:
+                failures.append(f"{granularity} {name} year-end periods")
+
+    # Batch calibration: every plant as calibrated on its own
+    history = [name for name in PLANT_DATA if name.startswith("HISTORY_")][:10]
+    for estimator in ESTIMATORS:
+        for plant in calibrate_plants(list(REGISTERED_PLANTS) + history, estimator)["plants"]:
+            result = run_forecast_for_plant(plant["plant"], estimator=estimator)
+            if (plant["calibration"], plant["policy_params"]) != (result["calibration"], result["policy_params"]):
+                failures.append(f"calibration {plant['plant']} estimator={estimator}")
+
+    # Backtest: each cutoff as if the history ended there
+    categories = list(CATEGORY_COLUMNS)
+    for name in history[:3]:
+        record = PLANT_DATA[name]
+        d = resolve_operational_params(record.defaults)
+        for estimator, window in (("mean", None), ("trend", 4)):
+            rows = backtest_plant(name, horizon=3, estimator=estimator, window=window)
+            for i in range(len(rows["FY"])):
+                cutoff, fy = rows["cutoff"][i], rows["FY"][i]
+                start = -float("inf") if window is None else cutoff - window
+                train = (record.hist_fy <= cutoff) & (record.hist_fy > start)
+                truncated = {col: values[train] for col, values in record.historical.items()}
+                calibration = calibrate_from_history(record.hist_sales[train], truncated, d, estimator)
+                target = record.hist_fy == fy
+                areas = forecast_area_arrays(
+                    record.hist_sales[target], d, {key: calibration[key] for key in CALIBRATION_FACTORS}
+                )
+                expected = areas[categories[rows["category"][i]]]
+                if abs(float(expected[0]) - rows["predicted"][i]) > 1e-6 * max(1.0, abs(float(expected[0]))):
+                    failures.append(f"backtest {name} estimator={estimator} cutoff={cutoff} FY{fy}")
+                    break
+
+    with TestClient(app) as client:
+        for name in REGISTERED_PLANTS:
+            body = client.post("/api/area-forecast", params={"plant_name": name}).json()
+            body.pop("status", None)
+            expected = reference_forecast_for_plant(
+                name, reference_plant(PLANT_DATA[name]), start_year=2026, end_year=2030
+            )
+            if _canonical(body) != _canonical(json.loads(json.dumps(expected))):
+                failures.append(f"api {name}")
+
+    return failures
+
+
+# =========================================================
+# STARTUP
+# =========================================================
+
+def startup_runs(repeat=5):
+    """
+    Run STARTUP_SCRIPT in `repeat` fresh interpreters (after one unmeasured
+    run that compiles bytecode) serving the registered plants.
+
+    Returns:
+        One dict per run: 'import' and 'ready' seconds ('ready' is None if
+        the service never became ready) and the LAZY_MODULES imported.
+    """
+    root = os.path.dirname(BENCH_DIR)
+    env = {
+        key: value for key, value in os.environ.items()
+        if key not in ("AREA_FORECAST_PLANT_DIR", "AREA_FORECAST_EXECUTOR")
+    }
+    runs = []
+    for _ in range(repeat + 1):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            cwd=root, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return runs[1:]
+
+
+def check_startup(budget, repeat=5):
+    """
+    Cold-start timings of fresh interpreters serving the registered plants.
+
+    Returns:
+        (results, failures): startup.* cases and budget violations.
+    """
+    runs = startup_runs(repeat)
+    failures = []
+    if any(run["ready"] is None for run in runs):
+        return {}, ["startup: service never became ready"]
+    results = {}
+    for case in ("import", "ready"):
+        times = sorted(run[case] for run in runs)
+        results[f"startup.{case}"] = {
+            "median": statistics.median(times),
+            "p95": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+        }
+    if results["startup.ready"]["median"] > budget:
+        failures.append(
+            f"startup: ready after {results['startup.ready']['median']:.3f}s, budget {budget:.3f}s"
+        )
+    imported = sorted({m for run in runs for m in run["modules"]})
+    if imported:
+        failures.append(f"startup: imported {', '.join(imported)}")
+    return results, failures
+
+
+# =========================================================
+# BENCHMARK CASES
+# =========================================================
+
+def run_benchmarks(sizes):
+    from fastapi.testclient import TestClient
+
+    from app.response_cache import RESPONSE_CACHE
+    from backtest import run_backtest
+    from benchmarks.reference import reference_forecast_for_plant, reference_plant
+    from breach_index import BreachIndex
+    from forecast import run_forecast_for_plant
+    from main import app
+    from network_calibration import calibrate_plants
+    from plant_data import PLANT_DATA
+    from portfolio import run_forecasts_for_plants
+    from run_store import RunStore
+    from sweep import run_scenario_sweep
+
+    repeat = sizes["repeat"]
+    results = {}
+
+    for name in REGISTERED_PLANTS:
+        results[f"single_plant.{name}"] = measure(
+            lambda: run_forecast_for_plant(name, start_year=2026, end_year=2030), repeat
+        )
+        plant = reference_plant(PLANT_DATA[name])
+        results[f"reference.single_plant.{name}"] = measure(
+            lambda: reference_forecast_for_plant(name, plant, start_year=2026, end_year=2030),
+            max(3, repeat // 5),
+        )
+
+    for years in sizes["horizon"]:
+        name = f"HORIZON_{years}_0"
+        results[f"horizon.{years}"] = measure(lambda: run_forecast_for_plant(name), max(3, repeat // 5))
+        if years <= 1000:
+            plant = reference_plant(PLANT_DATA[name])
+            results[f"reference.horizon.{years}"] = measure(
+                lambda: reference_forecast_for_plant(name, plant), 3
+            )
+
+    network = [name for name in PLANT_DATA if name.startswith("NETWORK_")]
+    for count in sizes["network"]:
+        names = network[:count]
+        results[f"network.{count}"] = measure(lambda: run_forecasts_for_plants(names), 3)
+        results[f"monthly_30y.{count}"] = measure(
+            lambda: run_forecasts_for_plants(
+                names, start_year=2026, end_year=2055, granularity="monthly", extrapolate="cagr"
+            ),
+            3,
+        )
+
+    history = [name for name in PLANT_DATA if name.startswith("HISTORY_")]
+    for count in sizes["network"]:
+        names = history[:count]
+        for estimator in ("mean", "trend"):
+            results[f"calibration.{count}.{estimator}"] = measure(
+                lambda: calibrate_plants(names, estimator), max(3, repeat // 5)
+            )
+
+    for count in sizes["network"]:
+        names = history[:count]
+        results[f"backtest.{count}"] = measure(
+            lambda: run_backtest(names, max_workers=1), max(3, repeat // 5)
+        )
+
+    with tempfile.TemporaryDirectory() as run_dir:
+        index = BreachIndex(run_store=RunStore(os.path.join(run_dir, "runs.sqlite")))
+        results["breach_index.build"] = measure(lambda: BreachIndex(run_store=index.run_store).refresh(), 1)
+        index.refresh()
+        results["breach_index.refresh"] = measure(lambda: index.refresh(force=True), repeat)
+        results["breach_index.query"] = measure(
+            lambda: index.query(before_fy=2029, min_shortfall_m2=2000), repeat
+        )
+
+    for count in sizes["sweep"]:
+        side = int(round(count ** 0.5))
+        ranges = {
+            "base_oee": {"start": 0.5, "stop": 0.95, "num": side},
+            "cycle_time_hours": {"start": 0.1, "stop": 0.3, "num": count // side},
+        }
+        results[f"sweep.{count}"] = measure(
+            lambda: run_scenario_sweep("DNKI", param_ranges=ranges, start_year=2026, end_year=2030), 3
+        )
+
+    with TestClient(app) as client:
+        # Measure steady state: wait until default forecasts are materialized
+        deadline = time.monotonic() + 120
+        while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        counter = iter(range(10**9))
+
+        def uncached():
+            # A distinct total_plant_area per call bypasses the response cache
+            area = 30000 + next(counter)
+            client.post("/api/area-forecast", params={"plant_name": "DNKI", "total_plant_area": area})
+
+        RESPONSE_CACHE.clear()
+        results["api.area_forecast.uncached"] = measure(uncached, repeat)
+        results["api.area_forecast.default"] = measure(
+            lambda: client.post("/api/area-forecast", params={"plant_name": "DNKI"}), repeat
+        )
+
+    return results
+
+
+# =========================================================
+# REGRESSION GUARD
+# =========================================================
+
+def compare(results, baseline, threshold, min_delta):
+    """Cases slower than the baseline beyond the threshold."""
+    regressions = []
+    for case, stats in sorted(results.items()):
+        if case.startswith("reference.") or case not in baseline:
+            continue
+        before, after = baseline[case]["median"], stats["median"]
+        if after > before * (1 + threshold) and after - before > min_delta:
+            regressions.append((case, before, after))
+    return regressions
+
+
+def print_results(results, baseline):
+    print(f"{'case':40s} {'median':>12s} {'p95':>12s} {'baseline':>12s}")
+    for case, stats in sorted(results.items()):
+        before = baseline.get(case, {}).get("median")
+        print(
+            f"{case:40s} {stats['median'] * 1e3:10.3f}ms {stats['p95'] * 1e3:10.3f}ms "
+            + (f"{before * 1e3:10.3f}ms" if before is not None else f"{'-':>12s}")
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    parser.add_argument("--save-baseline", action="store_true", help="write results to the baseline file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON path")
+    parser.add_argument("--output", help="also write the results JSON here")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    parser.add_argument("--min-delta", type=float, default=0.0005, help="ignored absolute slowdown in seconds")
+    parser.add_argument("--skip-identity", action="store_true", help="skip the reference comparison")
+    parser.add_argument(
+        "--no-baseline", action="store_true",
+        help="measure only; do not require or compare with a baseline",
+    )
+    parser.add_argument(
+        "--startup-budget", type=float, default=STARTUP_BUDGET_S,
+        help=f"max seconds to ready (default {STARTUP_BUDGET_S})",
+    )
+    args = parser.parse_args(argv)
+
+    sizes = QUICK_SIZES if args.quick else FULL_SIZES
+
+    # Before this process imports the service, so nothing is preloaded
+    startup_results, startup_failures = check_startup(args.startup_budget)
+
+    with tempfile.TemporaryDirectory() as plant_dir:
+        # Must be set before plant_data is imported
+        os.environ["AREA_FORECAST_PLANT_DIR"] = plant_dir
+        os.environ.setdefault("AREA_FORECAST_EXECUTOR", "inline")
+        build_plant_directory(plant_dir, sizes)
+
+        if not args.skip_identity:
+            failures = check_identity(sizes)
+            if failures:
+                print("Optimized results differ from the reference implementation:")
+                for failure in failures:
+                    print("  " + failure)
+                return 1
+            print("identity: optimized paths match the reference implementation")
+
+        results = run_benchmarks(sizes)
+    results.update(startup_results)
+
+    baseline_record = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline_record = json.load(f)
+    baseline = baseline_record["results"] if baseline_record else {}
+    print_results(results, baseline)
+    for failure in startup_failures:
+        print("BUDGET " + failure)
+
+    record = {
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "quick": args.quick,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(record, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(record, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if args.no_baseline:
+        return 1 if startup_failures else 0
+    if baseline_record is None:
+        print(
+            f"FAIL no baseline at {args.baseline}; record one on this machine with "
+            "--save-baseline (or pass --no-baseline to only measure)"
+        )
+        return 1
+    if baseline_record.get("quick", False) != args.quick:
+        mode = "--quick" if baseline_record.get("quick", False) else "full"
+        print(f"FAIL baseline was recorded in {mode} mode; rerun in that mode or record a new baseline")
+        return 1
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    for case, before, after in regressions:
+        print(f"REGRESSION {case}: {before * 1e3:.3f}ms -> {after * 1e3:.3f}ms")
+    return 1 if regressions or startup_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Synthetic plants for benchmarking.
+
+Plants are generated in the plant_data.py registry layout: history up to
+FY2025 (the engine forecasts every sales year after the last historical
+year), followed by `forecast_years` years of growing sales. Values are
+drawn around the registered plants' magnitudes from a seeded generator,
+so runs are reproducible.
+"""
+
+import numpy as np
+
+HISTORY_END = 2025
+
+
+def synthetic_plant(forecast_years, seed=0, history_years=2):
+    """
+    One synthetic plant in the registry layout.
+
+    Args:
+        forecast_years: Number of forecast years after FY2025
+        seed: RNG seed
+        history_years: Number of historical years ending at FY2025
+
+    Returns:
+        Dict with 'defaults', 'sales' and 'historical_area' columns.
+    """
+    rng = np.random.default_rng(seed)
+    defaults = {
+        "cycle_time_hours": round(float(rng.uniform(0.05, 0.3)), 3),
+        "base_oee": round(float(rng.uniform(0.6, 0.9)), 2),
+        "machine_size_m2": int(rng.integers(40, 160)),
+        "warehouse_capacity_units_m2": int(rng.integers(4, 30)),
+        "total_plant_area": int(rng.integers(20_000, 80_000)),
+    }
+
+    first_fy = HISTORY_END - history_years + 1
+    years = history_years + forecast_years
+    growth = 1.0 + rng.normal(0.03, 0.02, years)
+    sales = np.round(rng.uniform(1e6, 4e6) * np.cumprod(growth))
+
+    hist_sales = sales[:history_years]
+    production = np.round(hist_sales * rng.uniform(0.002, 0.004) * rng.uniform(0.9, 1.1, history_years))
+    inventory = np.round(hist_sales * rng.uniform(0.001, 0.003) * rng.uniform(0.9, 1.1, history_years))
+    historical_area = {
+        "FY": list(range(first_fy, HISTORY_END + 1)),
+        "production_area": production.tolist(),
+        "inventory_area": inventory.tolist(),
+        "passage_area": np.round((production + inventory) * rng.uniform(0.2, 0.4)).tolist(),
+        "people_area": np.round(production * rng.uniform(0.05, 0.15)).tolist(),
+        "admin_area": np.round(production * rng.uniform(0.04, 0.12)).tolist(),
+        "external_wh_area": np.round(inventory * rng.uniform(0.5, 3.0)).tolist(),
+        "customer_wh_area": np.round(inventory * rng.uniform(0.1, 0.5)).tolist(),
+    }
+
+    return {
+        "defaults": defaults,
+        "sales": {
+            "FY": list(range(first_fy, first_fy + years)),
+            "sales_units": sales.tolist(),
+        },
+        "historical_area": historical_area,
+    }
+
+
+def synthetic_plants(count, forecast_years, seed=0, prefix="SYN", history_years=2):
+    """`count` synthetic plants named <prefix>_<forecast_years>_<i>."""
+    return {
+        f"{prefix}_{forecast_years}_{i}": synthetic_plant(forecast_years, seed=seed + i, history_years=history_years)
+        for i in range(count)
+    }
@@ -0,0 +1,295 @@
+"""
+breach_index.py
+
+Capacity-breach early-warning index across plants and scenarios.
+
+A forecast breaches in its first period whose allocated area (every
+category except vacant) leaves less than the minimum vacant area of
+total_plant_area, which is where compute_vacant_area stops reporting the
+real vacant area and substitutes its 8% floor. For each breach the index
+keeps
+
+    breach_FY          first breaching FY (breach_period for sub-annual runs)
+    shortfall_m2       allocated area beyond total_plant_area minus the
+                       minimum vacant area
+    over_capacity      allocated area exceeds total_plant_area itself
+    limiting_category  allocated category that grew most since the last
+                       historical year (limiting_increase_m2)
+
+computed from the rounded forecast rows users see. Entries are every
+plant's default forecast (all provided forecast years, scenario
+"default") and every saved run of the run store (scenario "run"). A
+refresh recomputes a default entry only when its plant's data version
+changed, and loads or drops only runs that were saved or deleted since the
+last refresh (saved runs never change). A plant whose default forecast
+fails is logged and reported under status()["errors"]; its previous entry
+stays queryable, flagged stale=True, and the plant is retried on the next
+refresh. A saved run that cannot be loaded is reported the same way and
+skipped until it loads. Breaching entries are kept sorted
+by (breach FY, largest shortfall first), so "breaching before FY2029 by
+more than 2,000 m²" is a bisect plus a scan of the qualifying prefix.
+
+Configuration (environment variables):
+    AREA_FORECAST_BREACH_REFRESH_S  minimum seconds between refreshes
+                                    triggered by queries (default 2)
+"""
+
+import bisect
+import os
+import threading
+import time
+
+from backtest import CATEGORY_COLUMNS
+from forecast import ALLOCATED_CATEGORIES, run_forecast_for_plant
+from instrumentation import logger
+from plant_data import PLANT_DATA
+from run_store import get_run_store
+
+# Minimum vacant share of total_plant_area (compute_vacant_area's floor)
+MIN_VACANT_SHARE = 0.08
+
+SCENARIOS = ("default", "run")
+
+
+def find_breach(forecast, historical_areas, total_plant_area):
+    """
+    First breaching period of a forecast.
+
+    Args:
+        forecast: Forecast rows ({FY, [period], <category>_m2, ...}) in order
+        historical_areas: Historical area rows ({FY, <column>, ...})
+        total_plant_area: Plant area the forecast was computed with
+
+    Returns:
+        Dict with breach_FY, breach_period (sub-annual only), shortfall_m2,
+        allocated_m2, over_capacity, limiting_category and
+        limiting_increase_m2, or None when the forecast never breaches.
+    """
+    usable = total_plant_area * (1 - MIN_VACANT_SHARE)
+    for row in forecast:
+        allocated = sum(row[f"{c}_m2"] for c in ALLOCATED_CATEGORIES)
+        if allocated > usable:
+            break
+    else:
+        return None
+
+    last = max(historical_areas, key=lambda h: h["FY"]) if historical_areas else {}
+    increases = {
+        c: row[f"{c}_m2"] - (last.get(CATEGORY_COLUMNS[c]) or 0)
+        for c in ALLOCATED_CATEGORIES
+    }
+    limiting = max(increases, key=increases.get)
+    return {
+        "breach_FY": row["FY"],
+        **({"breach_period": row["period"]} if "period" in row else {}),
+        "shortfall_m2": int(round(allocated - usable)),
+        "allocated_m2": int(allocated),
+        "over_capacity": bool(allocated > total_plant_area),
+        "limiting_category": limiting,
+        "limiting_increase_m2": int(round(increases[limiting])),
+    }
+
+
+def breach_entry(plant, scenario, result, run_id=None, name=None):
+    """Index entry for a forecast result (run_forecast_for_plant or RunStore.get shape)."""
+    total_plant_area = result["operational_params"]["total_plant_area"]
+    return {
+        "plant": plant,
+        "scenario": scenario,
+        "run_id": run_id,
+        "name": name,
+        "total_plant_area": total_plant_area,
+        "stale": False,
+        "breach": find_breach(result["forecast"], result["historical_areas"], total_plant_area),
+    }
+
+
+class BreachIndex:
+    """Breach entries of every default forecast and saved run, sorted by breach FY."""
+
+    def __init__(self, run_store=None, refresh_interval=2.0):
+        self.run_store = run_store
+        self.refresh_interval = refresh_interval
+        self._entries = {}      # key -> entry
+        self._sorted = []       # (breach_FY, -shortfall_m2, key) of breaching entries
+        self._versions = {}     # plant -> data version of its default entry
+        self._refreshed_at = None
+        self.errors = {}
+        self._lock = threading.RLock()
+
+    # -----------------------------------------------------
+    # Maintenance
+    # -----------------------------------------------------
+
+    def _put(self, key, entry):
+        self._remove(key)
+        self._entries[key] = entry
+        breach = entry["breach"]
+        if breach is not None:
+            bisect.insort(self._sorted, (breach["breach_FY"], -breach["shortfall_m2"], key))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry["breach"] is not None:
+            item = (entry["breach"]["breach_FY"], -entry["breach"]["shortfall_m2"], key)
+            del self._sorted[bisect.bisect_left(self._sorted, item)]
+
+    def refresh_defaults(self):
+        """
+        Recompute default entries of new or changed plants; drop removed plants.
+
+        A plant that fails is logged, recorded in errors and its previous
+        entry (if any) flagged stale; the other plants are still refreshed.
+        """
+        changed = 0
+        names = list(PLANT_DATA)
+        with self._lock:
+            indexed = set(self._versions) | {key[1] for key in self._entries if key[0] == "default"}
+            for plant in indexed - set(names):
+                self._versions.pop(plant, None)
+                self._remove(("default", plant))
+                self.errors.pop(("default", plant), None)
+                changed += 1
+            for plant in names:
+                key = ("default", plant)
+                try:
+                    version = PLANT_DATA.version(plant)
+                    if self._versions.get(plant) == version:
+                        continue
+                    entry = breach_entry(plant, "default", run_forecast_for_plant(plant))
+                except Exception as e:
+                    if self.errors.get(key) != str(e):  # log each new failure once
+                        logger.exception("breach index: default forecast of plant %s failed", plant)
+                    self.errors[key] = str(e)
+                    # Not recorded in _versions, so the next refresh retries it
+                    self._versions.pop(plant, None)
+                    if key in self._entries and not self._entries[key]["stale"]:
+                        self._entries[key] = {**self._entries[key], "stale": True}
+                        changed += 1
+                    continue
+                self._put(key, entry)
+                self._versions[plant] = version
+                self.errors.pop(key, None)
+                changed += 1
+        return changed
+
+    def sync_runs(self):
+        """
+        Index runs saved since the last sync and drop deleted ones.
+
+        A run that cannot be loaded or evaluated is logged, recorded in
+        errors and skipped; it is retried on the next sync.
+        """
+        store = self.run_store or get_run_store()
+        stored = set(store.ids())
+        changed = 0
+        with self._lock:
+            indexed = {key[1] for key in self._entries if key[0] == "run"}
+            for run_id in indexed - stored:
+                self._remove(("run", run_id))
+                changed += 1
+            for key in [key for key in self.errors if key[0] == "run" and key[1] not in stored]:
+                del self.errors[key]
+            for run_id in sorted(stored - indexed):
+                key = ("run", run_id)
+                try:
+                    run = store.get(run_id)
+                    entry = breach_entry(run["plant"], "run", run, run_id=run_id, name=run["run"]["name"])
+                except Exception as e:
+                    if isinstance(e, KeyError) and run_id not in store.ids():
+                        continue  # deleted meanwhile
+                    if self.errors.get(key) != str(e):  # log each new failure once
+                        logger.exception("breach index: run %s could not be indexed", run_id)
+                    self.errors[key] = str(e)
+                    continue
+                self._put(key, entry)
+                self.errors.pop(key, None)
+                changed += 1
+        return changed
+
+    def refresh(self, force=False):
+        """
+        Bring the index up to date (at most every refresh_interval seconds
+        unless forced).
+
+        Returns:
+            Number of entries added, recomputed or dropped.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (not force and self._refreshed_at is not None
+                    and now - self._refreshed_at < self.refresh_interval):
+                return 0
+            changed = self.refresh_defaults() + self.sync_runs()
+            self._refreshed_at = time.monotonic()
+            return changed
+
+    def invalidate(self):
+        """Make the next query refresh (e.g. after a run was saved or deleted)."""
+        self._refreshed_at = None
+
+    # -----------------------------------------------------
+    # Queries
+    # -----------------------------------------------------
+
+    def query(self, before_fy=None, min_shortfall_m2=None, plant=None, scenario=None, limit=None):
+        """
+        Breaching entries, earliest breach first (largest shortfall first
+        within a year).
+
+        Args:
+            before_fy: Only breaches strictly before this FY
+            min_shortfall_m2: Only shortfalls strictly larger than this
+            plant: Only this plant
+            scenario: Only "default" or "run" entries
+            limit: Maximum number of entries
+
+        Returns:
+            List of entries: plant, scenario, run_id, name, total_plant_area,
+            stale (its last recomputation failed) and the breach fields (see
+            find_breach).
+        """
+        if scenario is not None and scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{scenario}', expected one of: {', '.join(SCENARIOS)}")
+        with self._lock:
+            end = len(self._sorted) if before_fy is None else bisect.bisect_left(self._sorted, (before_fy,))
+            matches = []
+            for _, negative_shortfall, key in self._sorted[:end]:
+                if min_shortfall_m2 is not None and -negative_shortfall <= min_shortfall_m2:
+                    continue
+                entry = self._entries[key]
+                if plant is not None and entry["plant"] != plant:
+                    continue
+                if scenario is not None and entry["scenario"] != scenario:
+                    continue
+                matches.append(entry)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return [_flatten(entry) for entry in matches]
+
+    def status(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "breaching": len(self._sorted),
+                "plants": len(self._versions),
+                "runs": sum(1 for key in self._entries if key[0] == "run"),
+                "stale": sum(1 for entry in self._entries.values() if entry["stale"]),
+                "errors": {f"{kind}:{name}": message for (kind, name), message in self.errors.items()},
+            }
+
+
+def _flatten(entry):
+    return {**{k: v for k, v in entry.items() if k != "breach"}, **entry["breach"]}
+
+
+_index = None
+
+
+def get_breach_index():
+    global _index
+    if _index is None:
+        _index = BreachIndex(
+            refresh_interval=float(os.environ.get("AREA_FORECAST_BREACH_REFRESH_S", "2")),
+        )
+    return _index
@@ -0,0 +1,231 @@
+"""
+calibration.py
+
+Calibration estimators and cache for the forecast engine.
+
+Each calibration factor is measured once per historical year and reduced
+to one value by an estimator (ESTIMATORS):
+
+    mean      plain mean of the years (default, the original behaviour)
+    recency   exponentially recency-weighted mean (RECENCY_HALF_LIFE_YEARS)
+    trimmed   mean without the TRIM_FRACTION highest and lowest years
+    median    median of the years
+    trend     least-squares line through the years, evaluated at the last
+              historical year (mean when fewer than two years)
+
+Estimators work on the last axis and ignore NaN, so one call reduces a
+(plants, years) matrix padded with NaN (see network_calibration.py).
+
+Calibration only depends on a plant's historical/sales data and on the
+parameters that enter the baseline production and inventory formulas.
+Results are memoised in a bounded LRU keyed on a content hash of the data
+plus those parameters, so a change to a plant's data produces a new key
+(automatic invalidation) and forecast-side changes such as
+total_plant_area never trigger a recalibration.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Parameters that change the calibration result
+CALIBRATION_PARAMS = (
+    "cycle_time_hours",
+    "base_oee",
+    "working_hours_year",
+    "machine_size_m2",
+    "safety_buffer",
+    "warehouse_capacity_units_m2",
+)
+
+DEFAULT_CACHE_SIZE = int(os.environ.get("AREA_FORECAST_CALIBRATION_CACHE_SIZE", "1024"))
+
+ESTIMATORS = ("mean", "recency", "trimmed", "median", "trend")
+
+RECENCY_HALF_LIFE_YEARS = 2.0
+TRIM_FRACTION = 0.2
+
+
+# =========================================================
+# ESTIMATORS
+# =========================================================
+
+def validate_estimator(estimator):
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator '{estimator}', expected one of: {', '.join(ESTIMATORS)}")
+
+
+def estimate(values, fy, estimator="mean"):
+    """
+    Reduce yearly values over the last axis, ignoring NaN.
+
+    Args:
+        values: Yearly values, shape (..., H)
+        fy: Fiscal year of each value, broadcastable to values
+        estimator: One of ESTIMATORS
+
+    Returns:
+        Array of shape values.shape[:-1] (NaN where no year is valid).
+    """
+    values = np.asarray(values, dtype=float)
+    if estimator == "mean":
+        return nanmean(values)
+    if estimator == "recency":
+        years = np.broadcast_to(np.asarray(fy, dtype=float), values.shape)
+        valid = ~np.isnan(values)
+        last = np.max(np.where(valid, years, -np.inf), axis=-1, keepdims=True)
+        weights = np.where(valid, 0.5 ** ((last - years) / RECENCY_HALF_LIFE_YEARS), 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (np.where(valid, values, 0.0) * weights).sum(axis=-1) / weights.sum(axis=-1)
+    if estimator in ("trimmed", "median"):
+        ordered = np.sort(values, axis=-1)  # NaN sort last
+        count = (~np.isnan(values)).sum(axis=-1, keepdims=True)
+        if estimator == "median":
+            low = np.take_along_axis(ordered, np.maximum((count - 1) // 2, 0), axis=-1)
+            high = np.take_along_axis(ordered, np.maximum(count // 2, 0), axis=-1)
+            median = np.where(count > 0, (low + high) / 2, np.nan)[..., 0]
+            return median[()]  # a scalar, not a 0-d array, for 1-D input
+        cut = np.floor(count * TRIM_FRACTION).astype(np.int64)
+        position = np.arange(values.shape[-1])
+        keep = (position >= cut) & (position < count - cut)
+        return nanmean(np.where(keep, ordered, np.nan))
+    if estimator == "trend":
+        return trend_fit(values, fy)[0]
+    validate_estimator(estimator)
+
+
+def trend_fit(values, fy):
+    """
+    Per-row least-squares line through the valid years.
+
+    Returns:
+        (level at the last valid year, slope per year, last valid year);
+        rows with fewer than two years get their mean and slope 0.
+    """
+    values = np.asarray(values, dtype=float)
+    years = np.broadcast_to(np.asarray(fy, dtype=float), values.shape)
+    valid = ~np.isnan(values)
+    last = np.max(np.where(valid, years, -np.inf), axis=-1)
+    x = np.where(valid, years - last[..., None], 0.0)
+    y = np.where(valid, values, 0.0)
+    n = valid.sum(axis=-1)
+    sx, sy = x.sum(axis=-1), y.sum(axis=-1)
+    sxx, sxy = (x * x).sum(axis=-1), (x * y).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = n * sxx - sx * sx
+        slope = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, 0.0)
+        level = (sy - slope * sx) / n
+    return level, slope, last
+
+
+def nanmean(values):
+    """Mean over the last axis ignoring NaN, like pandas' Series.mean()."""
+    values = np.asarray(values, dtype=float)
+    mask = ~np.isnan(values)
+    count = mask.sum(axis=-1)
+    total = np.where(mask, values, 0.0).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return total / count
+
+
+# =========================================================
+# CACHE
+# =========================================================
+
+def hash_arrays(named_arrays):
+    """
+    Content hash of a sequence of (name, array) pairs.
+
+    Names, dtypes, shapes and raw bytes all contribute, so any edit to the
+    data yields a different digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name, values in named_arrays:
+        values = np.ascontiguousarray(values)
+        digest.update(name.encode())
+        digest.update(str(values.dtype).encode())
+        digest.update(str(values.shape).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def calibration_key(data_hash, d, estimator="mean"):
+    """
+    Cache key for a calibration, or None if it cannot be cached.
+
+    Batched (array-valued) parameters are not cached.
+    """
+    params = []
+    for name in CALIBRATION_PARAMS:
+        value = d.get(name)
+        if isinstance(value, np.ndarray) and value.ndim > 0:
+            return None
+        params.append(None if value is None else float(value))
+    return (data_hash, tuple(params), estimator)
+
+
+class CalibrationCache:
+    """Thread-safe bounded LRU cache with hit/miss counters."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss."""
+        if key is None or self.maxsize <= 0:
+            return compute()
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = _freeze(compute())
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+def _freeze(calibration):
+    """Make cached arrays read-only so callers cannot corrupt the cache."""
+    for value in calibration.values():
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+    return calibration
+
+
+# Process-wide cache used by forecast.run_forecast_for_plant
+CALIBRATION_CACHE = CalibrationCache()
+
+
+def calibration_cache_info():
+    """Hit/miss counters and size of the process-wide calibration cache."""
+    return CALIBRATION_CACHE.info()
@@ -0,0 +1,354 @@
+"""
+datasets.py
+
+Uploaded sales-forecast datasets.
+
+Uploads are parsed incrementally (CSV chunk by chunk, XLSX row by row in
+read-only mode) and validated as they stream in; only the parsed numeric
+columns are kept, never the raw file. Validated datasets are stored
+content-addressed: the dataset ID is the SHA-256 of the normalized rows,
+so re-uploading the same data (in any file format or row order) returns
+the same ID.
+
+Schema:
+    FY           (required) fiscal year, integer between MIN_FY and MAX_FY
+    sales_units  (required) non-negative number
+    plant        (optional) plant name, for multi-plant files
+    month        (optional) 1-12, for monthly granularity; monthly rows are
+                 summed to fiscal-year totals for the annual forecast, so
+                 forecasting needs all 12 months of every fiscal year
+"""
+
+import codecs
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+REQUIRED_COLUMNS = ("FY", "sales_units")
+OPTIONAL_COLUMNS = ("plant", "month")
+
+# Accepted fiscal years
+MIN_FY = 1900
+MAX_FY = 9999
+
+DEFAULT_DATASET_DIR = os.environ.get(
+    "AREA_FORECAST_DATASET_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "datasets"),
+)
+
+
+# =========================================================
+# INCREMENTAL PARSING / VALIDATION
+# =========================================================
+
+class SalesForecastParser:
+    """
+    Validates sales-forecast rows as they arrive and accumulates them in
+    compact typed buffers.
+    """
+
+    def __init__(self, max_rows=5_000_000):
+        self.max_rows = max_rows
+        self.columns = None
+        self.rows = 0
+        self._plants = {}
+        self._plant_idx = array("l")
+        self._fy = array("l")
+        self._month = array("b")
+        self._sales = array("d")
+
+    def feed_header(self, header):
+        header = [str(h).strip() if h is not None else "" for h in header]
+        missing = [c for c in REQUIRED_COLUMNS if c not in header]
+        if missing:
+            raise ValueError(f"Sales forecast is missing column(s): {', '.join(missing)}")
+        self.columns = {
+            name: header.index(name)
+            for name in REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+            if name in header
+        }
+
+    def feed_row(self, row):
+        if self.columns is None:
+            self.feed_header(row)
+            return
+        if not any(v not in (None, "") for v in row):
+            return
+
+        line = self.rows + 2  # 1-based, after the header
+        self.rows += 1
+        if self.rows > self.max_rows:
+            raise ValueError(f"Sales forecast exceeds {self.max_rows} rows")
+
+        fy = _parse_number(row, self.columns["FY"], "FY", line)
+        if not MIN_FY <= fy <= MAX_FY or fy != int(fy):
+            raise ValueError(f"Row {line}: FY must be an integer between {MIN_FY} and {MAX_FY}")
+        sales = _parse_number(row, self.columns["sales_units"], "sales_units", line)
+        if not np.isfinite(sales) or sales < 0:
+            raise ValueError(f"Row {line}: sales_units must be a non-negative number")
+
+        month = 0
+        if "month" in self.columns:
+            month = _parse_number(row, self.columns["month"], "month", line)
+            if not 1 <= month <= 12 or month != int(month):
+                raise ValueError(f"Row {line}: month must be an integer 1-12")
+
+        plant = ""
+        if "plant" in self.columns:
+            plant = _cell(row, self.columns["plant"]).strip()
+            if not plant:
+                raise ValueError(f"Row {line}: plant is empty")
+
+        self._plant_idx.append(self._plants.setdefault(plant, len(self._plants)))
+        self._fy.append(int(fy))
+        self._month.append(int(month))
+        self._sales.append(sales)
+
+    def finish(self):
+        """
+        Final validation; returns the normalized dataset columns.
+
+        Rows are sorted by (plant, FY, month). Duplicate keys and mixing
+        annual with monthly rows for the same plant/year are rejected.
+        """
+        if self.columns is None:
+            raise ValueError("Sales forecast is empty")
+        if self.rows == 0:
+            raise ValueError("Sales forecast has no data rows")
+
+        plants = sorted(self._plants)
+        remap = np.empty(len(plants), dtype=np.int64)
+        for new_idx, name in enumerate(plants):
+            remap[self._plants[name]] = new_idx
+
+        plant_idx = remap[np.frombuffer(self._plant_idx, dtype=np.dtype("l")).astype(np.int64)]
+        fy = np.frombuffer(self._fy, dtype=np.dtype("l")).astype(np.int64)
+        month = np.frombuffer(self._month, dtype=np.int8).astype(np.int64)
+        sales = np.frombuffer(self._sales, dtype=float).copy()
+
+        order = np.lexsort((month, fy, plant_idx))
+        plant_idx, fy, month, sales = plant_idx[order], fy[order], month[order], sales[order]
+
+        same_key = (np.diff(plant_idx) == 0) & (np.diff(fy) == 0)
+        if np.any(same_key & (np.diff(month) == 0)):
+            raise ValueError("Sales forecast has duplicate rows for the same plant/FY/month")
+        if np.any(same_key & ((month[:-1] == 0) | (month[1:] == 0))):
+            raise ValueError("Sales forecast mixes annual and monthly rows for the same plant/FY")
+
+        return {
+            "plants": plants,
+            "plant_idx": plant_idx,
+            "FY": fy,
+            "month": month,
+            "sales_units": sales,
+        }
+
+
+def _cell(row, idx):
+    value = row[idx] if idx < len(row) else None
+    return "" if value is None else str(value)
+
+
+def _parse_number(row, idx, name, line):
+    value = row[idx] if idx < len(row) else None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(",", ""))
+    except (TypeError, ValueError):
+        raise ValueError(f"Row {line}: {name} is not a number: {value!r}")
+
+
+class CsvChunkReader:
+    """
+    Turns arbitrary byte chunks into complete CSV rows.
+
+    A chunk is cut after its last line break outside a quoted field, so
+    quoted values spanning several lines stay in one row.
+    """
+
+    def __init__(self, encoding="utf-8-sig"):
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ""
+
+    def feed(self, chunk):
+        self._buffer += self._decoder.decode(chunk)
+        cut = self._buffer.rfind("\n")
+        # The buffer starts at a row boundary, so a line break is outside
+        # quotes when an even number of quote characters precedes it
+        # (escaped quotes are doubled and keep the parity).
+        while cut >= 0 and self._buffer.count('"', 0, cut) % 2:
+            cut = self._buffer.rfind("\n", 0, cut)
+        if cut < 0:
+            return []
+        complete, self._buffer = self._buffer[:cut + 1], self._buffer[cut + 1:]
+        return list(csv.reader(io.StringIO(complete, newline="")))
+
+    def close(self):
+        self._buffer += self._decoder.decode(b"", final=True)
+        rows = list(csv.reader(io.StringIO(self._buffer, newline="")))
+        self._buffer = ""
+        return rows
+
+
+def iter_xlsx_rows(file_obj):
+    """Yield rows of the first sheet of an XLSX file without loading it whole."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ValueError("XLSX uploads require the openpyxl package") from e
+
+    workbook = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+# =========================================================
+# CONTENT-ADDRESSED STORE
+# =========================================================
+
+def dataset_id_for(columns):
+    """SHA-256 over the normalized dataset."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(columns["plants"]).encode())
+    for name in ("plant_idx", "FY", "month", "sales_units"):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(columns[name]).tobytes())
+    return digest.hexdigest()
+
+
+class DatasetStore:
+    """Stores datasets as per-column .npy files under <root>/<dataset_id>/."""
+
+    def __init__(self, root=DEFAULT_DATASET_DIR, cache_size=32):
+        self.root = root
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, columns):
+        """Persist a normalized dataset; returns its content-addressed ID."""
+        dataset_id = dataset_id_for(columns)
+        path = os.path.join(self.root, dataset_id)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            os.makedirs(tmp_path, exist_ok=True)
+            with open(os.path.join(tmp_path, "plants.json"), "w") as f:
+                json.dump(columns["plants"], f)
+            for name in ("plant_idx", "FY", "month", "sales_units"):
+                np.save(os.path.join(tmp_path, f"{name}.npy"), columns[name])
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # Another request stored the same content first
+                _remove_tree(tmp_path)
+        return dataset_id
+
+    def get(self, dataset_id):
+        """Load a dataset (memory-mapped); raises ValueError if unknown."""
+        if not dataset_id or not all(c in "0123456789abcdef" for c in dataset_id):
+            raise ValueError(f"Invalid dataset id '{dataset_id}'")
+        with self._lock:
+            if dataset_id in self._cache:
+                self._cache.move_to_end(dataset_id)
+                return self._cache[dataset_id]
+
+        path = os.path.join(self.root, dataset_id)
+        if not os.path.isdir(path):
+            raise ValueError(f"Dataset '{dataset_id}' not found")
+        with open(os.path.join(path, "plants.json")) as f:
+            columns = {"plants": json.load(f)}
+        for name in ("plant_idx", "FY", "month", "sales_units"):
+            columns[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        with self._lock:
+            self._cache[dataset_id] = columns
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return columns
+
+    def summary(self, dataset_id):
+        columns = self.get(dataset_id)
+        plant_idx = np.asarray(columns["plant_idx"])
+        fy = np.asarray(columns["FY"])
+        month = np.asarray(columns["month"])
+        plants = []
+        for idx, name in enumerate(columns["plants"]):
+            mask = plant_idx == idx
+            years = fy[mask]
+            plants.append({
+                "plant": name or None,
+                "rows": int(len(years)),
+                "first_FY": int(years.min()),
+                "last_FY": int(years.max()),
+                "incomplete_FY": incomplete_years(years, month[mask]),
+            })
+        return {
+            "dataset_id": dataset_id,
+            "rows": int(len(fy)),
+            "granularity": "monthly" if np.any(np.asarray(columns["month"]) > 0) else "annual",
+            "plants": plants,
+        }
+
+    def annual_sales(self, dataset_id, plant_name):
+        """
+        Annual sales for one plant as {"FY": array, "sales_units": array}.
+
+        Single-plant datasets (no plant column) apply to any plant; monthly
+        rows are summed per fiscal year. Raises ValueError when a fiscal
+        year has monthly rows for fewer than 12 months, since its sum would
+        pass for a full-year total.
+        """
+        columns = self.get(dataset_id)
+        plants = columns["plants"]
+        if plants == [""]:
+            idx = 0
+        elif plant_name in plants:
+            idx = plants.index(plant_name)
+        else:
+            raise ValueError(f"Dataset '{dataset_id}' has no sales for plant '{plant_name}'")
+
+        mask = np.asarray(columns["plant_idx"]) == idx
+        fy = np.asarray(columns["FY"])[mask]
+        sales = np.asarray(columns["sales_units"])[mask]
+        incomplete = incomplete_years(fy, np.asarray(columns["month"])[mask])
+        if incomplete:
+            raise ValueError(
+                f"Dataset '{dataset_id}' has incomplete monthly sales for plant '{plant_name}' "
+                f"in FY {', '.join(map(str, incomplete))} (all 12 months are required)"
+            )
+        years, inverse = np.unique(fy, return_inverse=True)
+        return {"FY": years, "sales_units": np.bincount(inverse, weights=sales)}
+
+
+def incomplete_years(fy, month):
+    """Fiscal years with monthly rows for fewer than 12 months (sorted)."""
+    monthly = month > 0
+    years, counts = np.unique(fy[monthly], return_counts=True)
+    return years[counts < 12].tolist()
+
+
+def _remove_tree(path):
+    for name in os.listdir(path):
+        os.remove(os.path.join(path, name))
+    os.rmdir(path)
+
+
+_store = None
+
+
+def get_dataset_store():
+    global _store
+    if _store is None:
+        _store = DatasetStore()
+    return _store
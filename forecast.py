@@ -1,5 +1,11 @@
-import pandas as pd
+import logging
+
+import numpy as np
+from calibration import CALIBRATION_CACHE, calibration_key, estimate, validate_estimator
+from horizon import forecast_horizon, select_forecast_years
+from instrumentation import logger, stage_timer
 from plant_data import PLANT_DATA
+from plant_records import historical_data_hash, lookup_sales
 # =========================================================
 # CORE FORMULA FUNCTIONS (UNCHANGED)
 # =========================================================
@@ -16,12 +22,12 @@ def compute_baseline_production_area(sales_units, d):
 def compute_inventory_area(sales_units, inventory_days, d):
     """
     Calculate inventory area based on CRP logic.
-    
+
     Formula:
     - Daily sales = Annual sales / 365
     - Average inventory units = Daily sales × Inventory days
     - Inventory area = Average inventory units / Warehouse capacity (units per m²)
-    
+
     Simplified: Inventory area = (Sales × Inventory days) / (365 × Warehouse capacity)
     """
     daily_sales = sales_units / 365.0
@@ -39,257 +45,481 @@ def compute_vacant_area(total_plant_area, allocated_areas):
     return max(calculated_vacant, min_vacant)
 
 
+# =========================================================
+# VECTORIZED FORECAST ENGINE
+# =========================================================
+# The formula functions above are plain arithmetic, so they work unchanged
+# on NumPy arrays. The engine below evaluates every forecast year (and, when
+# the operational parameters are arrays shaped (n, 1), every scenario) in one
+# batched pass. Summation order matches the scalar path so results are
+# bit-identical to the per-year loop.
+
+# Allocated categories, in the order they are summed into the vacant area
+ALLOCATED_CATEGORIES = (
+    "production_area",
+    "inventory_area",
+    "passage_area",
+    "customer_wh_area",
+    "external_wh_area",
+    "people_gathering_area",
+    "admin_area",
+)
+
+# Categories as they appear (suffixed with _m2) in each forecast row
+OUTPUT_CATEGORIES = (
+    "production_area",
+    "inventory_area",
+    "passage_area",
+    "people_gathering_area",
+    "admin_area",
+    "external_wh_area",
+    "customer_wh_area",
+    "vacant_area",
+    "total_area",
+)
+
+# Calibration factors forecast_area_arrays reads
+CALIBRATION_FACTORS = (
+    "productivity_factor",
+    "inventory_days",
+    "passage_ratio",
+    "people_gathering_ratio",
+    "admin_area_ratio",
+    "external_wh_ratio",
+    "customer_wh_ratio",
+)
+
+# Fallback policy ratios when a plant has no history for the category
+DEFAULT_POLICY_RATIOS = {
+    "people_gathering_ratio": 0.1,
+    "admin_area_ratio": 0.08,
+    "external_wh_ratio": 1.0,
+    "customer_wh_ratio": 0.19,
+}
+
+
+def compute_vacant_area_array(total_plant_area, allocated_total):
+    """Vectorized counterpart of compute_vacant_area (8% minimum vacant)."""
+    min_vacant = total_plant_area * 0.08
+    calculated_vacant = total_plant_area - allocated_total
+    return np.maximum(calculated_vacant, min_vacant)
+
+
+def resolve_operational_params(plant_defaults, operational_params=None):
+    """
+    Merge user supplied operational parameters over the plant defaults.
+
+    Args:
+        plant_defaults: Plant "defaults" mapping from PLANT_DATA
+        operational_params: Optional dict of overrides
+
+    Returns:
+        New dict with every parameter the formulas need.
+    """
+    # Create a fresh copy of defaults to avoid any reference issues
+    plant_defaults = dict(plant_defaults)
+
+    if operational_params:
+        return {
+            "cycle_time_hours": operational_params.get("cycle_time_hours", plant_defaults.get("cycle_time_hours")),
+            "base_oee": operational_params.get("base_oee", plant_defaults.get("base_oee")),
+            "working_hours_year": operational_params.get("working_hours_year", 6000),
+            "machine_size_m2": operational_params.get("machine_size_m2", plant_defaults.get("machine_size_m2")),
+            "safety_buffer": operational_params.get("safety_buffer", 0.05),
+            "warehouse_capacity_units_m2": operational_params.get("warehouse_capacity_units_m2", plant_defaults.get("warehouse_capacity_units_m2")),
+            "total_plant_area": operational_params.get("total_plant_area", plant_defaults.get("total_plant_area"))
+        }
+    return {
+        **plant_defaults,
+        "working_hours_year": 6000,
+        "safety_buffer": 0.05
+    }
+
+
+def calibrate_from_history(historical_sales, historical, d, estimator="mean"):
+    """
+    Derive calibration parameters from historical areas.
+
+    Args:
+        historical_sales: Sales units per historical year (array, length H)
+        historical: Mapping of historical area column -> array (length H).
+                    Must contain 'FY', 'production_area', 'inventory_area'
+                    and 'passage_area'; the policy columns are optional.
+        d: Operational parameters. Values may be scalars, or arrays shaped
+           (n, 1) to calibrate n scenarios at once.
+        estimator: How yearly values are reduced (see calibration.ESTIMATORS)
+
+    Returns:
+        Dictionary with the calibration factors (scalars, or arrays of
+        length n), plus the per-year 'baseline_prod_area',
+        'yearly_productivity_factor', 'yearly_inventory_days' and
+        'yearly_passage_ratio'.
+    """
+    fy = historical["FY"]
+    production = historical["production_area"]
+    inventory = historical["inventory_area"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        baseline_prod_area = compute_baseline_production_area(historical_sales, d)
+
+        # Productivity factor (KEY FIX: must be < 1 normally)
+        yearly_productivity = production / baseline_prod_area
+
+        yearly_inventory_days = (
+            inventory * d["warehouse_capacity_units_m2"] * 365
+        ) / historical_sales
+
+        yearly_passage_ratio = historical["passage_area"] / (production + inventory)
+
+        calibration = {
+            "productivity_factor": estimate(yearly_productivity, fy, estimator),
+            "inventory_days": estimate(yearly_inventory_days, fy, estimator),
+            "passage_ratio": estimate(yearly_passage_ratio, fy, estimator),
+        }
+
+        # Policy-based ratios from historical data
+        # (customer WH is calculated from history, not a fixed 19% policy)
+        policy_sources = {
+            "people_gathering_ratio": ("people_area", production),
+            "admin_area_ratio": ("admin_area", production),
+            "external_wh_ratio": ("external_wh_area", inventory),
+            "customer_wh_ratio": ("customer_wh_area", inventory),
+        }
+        for key, (column, denominator) in policy_sources.items():
+            if column in historical:
+                calibration[key] = estimate(historical[column] / denominator, fy, estimator)
+            else:
+                calibration[key] = DEFAULT_POLICY_RATIOS[key]
+
+    calibration["baseline_prod_area"] = baseline_prod_area
+    calibration["yearly_productivity_factor"] = yearly_productivity
+    calibration["yearly_inventory_days"] = yearly_inventory_days
+    calibration["yearly_passage_ratio"] = yearly_passage_ratio
+    return calibration
+
+
+def forecast_area_arrays(sales_units, d, calibration):
+    """
+    Compute every area category for all forecast periods in one pass.
+
+    Args:
+        sales_units: Array of sales units per forecast period (length Y)
+        d: Operational parameters (scalars, or arrays shaped (n, 1))
+        calibration: Calibration factors (scalars, or arrays shaped (n, 1))
+
+    Returns:
+        Dictionary of category name -> array shaped (Y,) or (n, Y).
+    """
+    baseline_prod = compute_baseline_production_area(sales_units, d)
+    prod_area = baseline_prod * calibration["productivity_factor"]
+
+    inv_area = compute_inventory_area(sales_units, calibration["inventory_days"], d)
+
+    passage_area = compute_passage_area(prod_area, inv_area, calibration["passage_ratio"])
+
+    # Policy-based areas
+    areas = {
+        "production_area": prod_area,
+        "inventory_area": inv_area,
+        "passage_area": passage_area,
+        "customer_wh_area": inv_area * calibration["customer_wh_ratio"],
+        "external_wh_area": inv_area * calibration["external_wh_ratio"],
+        "people_gathering_area": prod_area * calibration["people_gathering_ratio"],
+        "admin_area": prod_area * calibration["admin_area_ratio"],
+    }
+
+    allocated_total = 0
+    for category in ALLOCATED_CATEGORIES:
+        allocated_total = allocated_total + areas[category]
+
+    areas["vacant_area"] = compute_vacant_area_array(d["total_plant_area"], allocated_total)
+    areas["total_area"] = allocated_total + areas["vacant_area"]
+    return areas
+
+
+def forecast_rows(fy, sales_units, areas, periods=None):
+    """Convert engine output into the list-of-dicts JSON shape."""
+    keys = ["FY", "sales_units"] + [f"{c}_m2" for c in OUTPUT_CATEGORIES]
+    columns = [
+        np.asarray(fy).astype(np.int64).tolist(),
+        np.trunc(sales_units).astype(np.int64).tolist(),
+    ]
+    if periods is not None:
+        keys.insert(1, "period")
+        columns.insert(1, periods)
+    columns += [
+        np.rint(areas[c]).astype(np.int64).tolist() for c in OUTPUT_CATEGORIES
+    ]
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def forecast_columns(fy, sales_units, areas, periods=None):
+    """Engine output as one int64 array per field (columnar layout)."""
+    columns = {"FY": np.asarray(fy).astype(np.int64)}
+    if periods is not None:
+        columns["period"] = periods
+    columns["sales_units"] = np.trunc(sales_units).astype(np.int64)
+    for c in OUTPUT_CATEGORIES:
+        columns[f"{c}_m2"] = np.rint(areas[c]).astype(np.int64)
+    return columns
+
+
+def prepare_plant_inputs(plant, sales_df=None, historical_area_df=None):
+    """
+    Collect the arrays the engine needs for a plant.
+
+    Without overrides this is a zero-copy view of the immutable PlantRecord:
+    its read-only arrays, precomputed sales join and content hash are used
+    as-is. Override DataFrames are converted to arrays, never mutated.
+
+    Args:
+        plant: PlantRecord from PLANT_DATA
+        sales_df: Optional DataFrame (or mapping of column -> array)
+                  overriding the plant's sales
+        historical_area_df: Optional DataFrame (or mapping) overriding the
+                            plant's history
+
+    Returns:
+        Dictionary with 'sales_fy', 'sales_units', 'hist_fy', 'historical'
+        (column -> array), 'hist_sales' (sales joined onto history) and
+        'data_hash' (content hash of the calibration inputs).
+    """
+    if sales_df is None and historical_area_df is None:
+        inputs = {
+            "sales_fy": plant.sales_fy,
+            "sales_units": plant.sales_units,
+            "hist_fy": plant.hist_fy,
+            "historical": plant.historical,
+            "hist_sales": plant.hist_sales,
+            "data_hash": plant.data_hash,
+        }
+    else:
+        if sales_df is None:
+            sales_fy, sales_units = plant.sales_fy, plant.sales_units
+        else:
+            sales_fy = np.asarray(sales_df["FY"], dtype=np.int64)
+            sales_units = np.asarray(sales_df["sales_units"], dtype=float)
+
+        if historical_area_df is None:
+            historical = plant.historical
+        else:
+            historical = _columns_to_arrays(historical_area_df)
+        hist_fy = historical["FY"]
+
+        # Merge historical data (FY24–FY25)
+        hist_sales = lookup_sales(hist_fy, sales_fy, sales_units)
+        inputs = {
+            "sales_fy": sales_fy,
+            "sales_units": sales_units,
+            "hist_fy": hist_fy,
+            "historical": historical,
+            "hist_sales": hist_sales,
+            "data_hash": historical_data_hash(hist_fy, hist_sales, historical),
+        }
+
+    if np.isnan(inputs["hist_sales"]).any():
+        raise ValueError("Missing sales data for historical years")
+    return inputs
+
+
+def get_calibration(inputs, d, estimator="mean"):
+    """
+    Calibrate through the process-wide LRU cache.
+
+    The key covers the plant's historical data, the estimator and only the
+    parameters that enter calibration, so forecast-side changes (e.g.
+    total_plant_area) hit.
+    """
+    return CALIBRATION_CACHE.get_or_compute(
+        calibration_key(inputs["data_hash"], d, estimator),
+        lambda: calibrate_from_history(inputs["hist_sales"], inputs["historical"], d, estimator),
+    )
+
+
+def _columns_to_arrays(df):
+    return {
+        col: np.asarray(df[col], dtype=np.int64 if col == "FY" else float)
+        for col in df
+    }
+
+
 # =========================================================
 # MAIN PLANT-AWARE FORECAST FUNCTION
 # =========================================================
 
 def run_forecast_for_plant(
-    plant_name, 
-    sales_df=None, 
+    plant_name,
+    sales_df=None,
     historical_area_df=None,
     operational_params=None,
     start_year=None,
-    end_year=None
+    end_year=None,
+    layout="rows",
+    granularity="annual",
+    extrapolate="none",
+    estimator="mean"
 ):
     """
     Run forecast for a plant.
-    
+
     Args:
         plant_name: Name of the plant (must exist in PLANT_DATA for defaults)
-        sales_df: Optional pandas DataFrame with 'FY' and 'sales_units' columns.
+        sales_df: Optional pandas DataFrame (or mapping of column -> array)
+                  with 'FY' and 'sales_units' columns.
                   If None, uses data from PLANT_DATA.
         historical_area_df: Optional pandas DataFrame with historical area data.
-                           Must have 'FY', 'production_area', 'inventory_area', 
+                           Must have 'FY', 'production_area', 'inventory_area',
                            'passage_area' columns. If None, uses data from PLANT_DATA.
         operational_params: Optional dict with operational parameters
         start_year: Optional start year for forecast period (inclusive)
         end_year: Optional end year for forecast period (inclusive)
-    
+        layout: "rows" (forecast as a list of per-year dicts) or "columns"
+                (forecast as one int64 array per field, see forecast_columns)
+        granularity: "annual", "quarterly" or "monthly"; sub-annual rows
+                     also carry a 'period' label (see horizon.py)
+        extrapolate: Sales beyond the provided years: "none", "flat",
+                     "linear" or "cagr" (see horizon.py)
+        estimator: Reduction of the yearly calibration factors: "mean",
+                   "recency", "trimmed", "median" or "trend" (see calibration.py)
+
     Returns:
         Dictionary with forecast results, calibration parameters, and plant info.
     """
+    if layout not in ("rows", "columns"):
+        raise ValueError(f"Unknown forecast layout '{layout}'")
+    validate_estimator(estimator)
     if plant_name not in PLANT_DATA:
         raise ValueError(f"Plant '{plant_name}' not found in plant_data")
 
-    # Debug: Log which plant is being processed
-    print(f"[DEBUG] Processing plant: {plant_name}")
-    
     plant = PLANT_DATA[plant_name]
-    
-    # Debug: Log plant data info
-    print(f"[DEBUG] Plant '{plant_name}' - Sales data shape: {plant['sales_df'].shape}, Historical shape: {plant['historical_area_df'].shape}")
-    print(f"[DEBUG] Plant '{plant_name}' - First sales value: {plant['sales_df']['sales_units'].iloc[0] if len(plant['sales_df']) > 0 else 'N/A'}")
 
     # Use provided operational parameters or fall back to plant defaults
-    # Create a fresh copy of defaults to avoid any reference issues
-    plant_defaults = plant["defaults"].copy()  # Copy the plant defaults dict
-    
-    if operational_params:
-        defaults = {
-            "cycle_time_hours": operational_params.get("cycle_time_hours", plant_defaults.get("cycle_time_hours")),
-            "base_oee": operational_params.get("base_oee", plant_defaults.get("base_oee")),
-            "working_hours_year": operational_params.get("working_hours_year", 6000),
-            "machine_size_m2": operational_params.get("machine_size_m2", plant_defaults.get("machine_size_m2")),
-            "safety_buffer": operational_params.get("safety_buffer", 0.05),
-            "warehouse_capacity_units_m2": operational_params.get("warehouse_capacity_units_m2", plant_defaults.get("warehouse_capacity_units_m2")),
-            "total_plant_area": operational_params.get("total_plant_area", plant_defaults.get("total_plant_area"))
-        }
-    else:
-        defaults = {
-            **plant_defaults,  # Use copied defaults
-            "working_hours_year": 6000,
-            "safety_buffer": 0.05
-        }
+    with stage_timer("params", plant_name):
+        defaults = resolve_operational_params(plant.defaults, operational_params)
 
     # Use provided dataframes or fall back to plant_data
-    # Make deep copies to ensure no reference issues
-    if sales_df is None:
-        sales_df = plant["sales_df"].copy(deep=True)
-    else:
-        sales_df = sales_df.copy(deep=True)
-    
-    if historical_area_df is None:
-        historical_area_df = plant["historical_area_df"].copy(deep=True)
-    else:
-        historical_area_df = historical_area_df.copy(deep=True)
-    
+    with stage_timer("merge", plant_name):
+        inputs = prepare_plant_inputs(plant, sales_df, historical_area_df)
+    sales_fy = inputs["sales_fy"]
+    sales_units = inputs["sales_units"]
+    hist_fy = inputs["hist_fy"]
+    historical = inputs["historical"]
+    hist_sales = inputs["hist_sales"]
 
     # -----------------------------------------------------
-    # 1. Merge historical data (FY24–FY25)
+    # 2-3. Baseline production area and CALIBRATION PARAMETERS
     # -----------------------------------------------------
-    # Create a fresh copy of the merged DataFrame to avoid any reference issues
-    historical = historical_area_df.merge(
-        sales_df, on="FY", how="left"
-    ).copy()
-
-    if historical["sales_units"].isna().any():
-        raise ValueError("Missing sales data for historical years")
+    with stage_timer("calibration", plant_name):
+        calibration = get_calibration(inputs, defaults, estimator)
 
     # -----------------------------------------------------
-    # 2. Baseline production area
+    # 4. FORECAST PERIODS (after the last historical year)
     # -----------------------------------------------------
-    historical["baseline_prod_area"] = historical["sales_units"].apply(
-        lambda s: compute_baseline_production_area(s, defaults)
-    )
+    with stage_timer("forecast", plant_name):
+        horizon = forecast_horizon(
+            sales_fy, sales_units, hist_fy, start_year, end_year, granularity, extrapolate
+        )
+        future_fy = horizon["FY"]
+        future_sales = horizon["sales_units"]
+
+        areas = forecast_area_arrays(future_sales, defaults, calibration)
+
+    with stage_timer("serialization", plant_name):
+        result = _build_result(
+            plant_name, defaults, calibration, future_fy, future_sales, areas,
+            hist_fy, hist_sales, historical, layout, horizon["period"]
+        )
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "forecast computed",
+            extra={
+                "plant": plant_name,
+                "sales_years": len(sales_fy),
+                "historical_years": len(hist_fy),
+                "forecast_years": np.unique(future_fy).tolist(),
+                "forecast_periods": len(future_fy),
+            },
+        )
 
-    # -----------------------------------------------------
-    # 3. CALIBRATION PARAMETERS
-    # -----------------------------------------------------
+    return result
 
-    # Productivity factor (KEY FIX: must be < 1 normally)
-    historical["productivity_factor"] = (
-        historical["production_area"] /
-        historical["baseline_prod_area"]
-    )
 
-    productivity_factor = historical["productivity_factor"].mean()
+def _build_result(plant_name, defaults, calibration, future_fy, future_sales, areas,
+                  hist_fy, hist_sales, historical, layout="rows", periods=None):
+    """Assemble the JSON-shaped forecast result."""
+    if layout == "columns":
+        forecast_list = forecast_columns(future_fy, future_sales, areas, periods)
+    else:
+        forecast_list = forecast_rows(future_fy, future_sales, areas, periods)
 
-    # Inventory days
-    historical["inventory_days"] = (
-        historical["inventory_area"] *
-        defaults["warehouse_capacity_units_m2"]* 365
-    ) / historical["sales_units"]
+    return {
+        "plant": plant_name,
+        "operational_params": operational_params_summary(defaults),
+        **calibration_summary(calibration),
+        "forecast": forecast_list,
+        "historical_debug": historical_debug_rows(hist_fy, hist_sales, historical, calibration),
+        "historical_areas": historical_area_rows(hist_fy, historical)
+    }
 
-    inventory_days = historical["inventory_days"].mean()
 
-    # Passage ratio
-    historical["passage_ratio"] = (
-        historical["passage_area"] /
-        (historical["production_area"] + historical["inventory_area"])
-    )
+def operational_params_summary(defaults):
+    """The 'operational_params' section of a forecast result."""
+    return {k: float(v) if isinstance(v, (int, float)) else v for k, v in defaults.items()}
 
-    passage_ratio = float(historical["passage_ratio"].mean())
-    
-    # Policy-based ratios from historical data
-    if "people_area" in historical.columns:
-        people_gathering_ratio = float((historical["people_area"] / historical["production_area"]).mean())
-    else:
-        people_gathering_ratio = 0.1
-    
-    if "admin_area" in historical.columns:
-        admin_area_ratio = float((historical["admin_area"] / historical["production_area"]).mean())
-    else:
-        admin_area_ratio = 0.08
-    
-    if "external_wh_area" in historical.columns:
-        external_wh_ratio = float((historical["external_wh_area"] / historical["inventory_area"]).mean())
-    else:
-        external_wh_ratio = 1.0
-    
-    # Customer WH ratio calculated from historical data (not a fixed 19% policy)
-    if "customer_wh_area" in historical.columns:
-        customer_wh_ratio = float((historical["customer_wh_area"] / historical["inventory_area"]).mean())
-    else:
-        customer_wh_ratio = 0.19  # Fallback if no historical data
 
-    # -----------------------------------------------------
-    # 4. FORECAST FUTURE YEARS (FY > 2025)
-    # -----------------------------------------------------
-    future_sales_df = sales_df[sales_df["FY"] > 2025].copy()
-    
-    # Filter by period if specified
-    if start_year is not None:
-        future_sales_df = future_sales_df[future_sales_df["FY"] >= start_year]
-    if end_year is not None:
-        future_sales_df = future_sales_df[future_sales_df["FY"] <= end_year]
-
-    forecast_output = []
-
-    for _, row in future_sales_df.iterrows():
-        fy = int(row["FY"])
-        sales = float(row["sales_units"])
-
-        baseline_prod = compute_baseline_production_area(sales, defaults)
-        prod_area = float(baseline_prod * productivity_factor)
-
-        inv_area = float(compute_inventory_area(sales, inventory_days, defaults))
-
-        passage_area = float(compute_passage_area(prod_area, inv_area, passage_ratio))
-
-        # Policy-based areas
-        customer_wh_area = float(inv_area * customer_wh_ratio)
-        external_wh_area = float(inv_area * external_wh_ratio)
-        people_gathering_area = float(prod_area * people_gathering_ratio)
-        admin_area = float(prod_area * admin_area_ratio)
-
-        allocated_areas = [
-            prod_area,
-            inv_area,
-            passage_area,
-            customer_wh_area,
-            external_wh_area,
-            people_gathering_area,
-            admin_area
-        ]
-
-        vacant_area = float(compute_vacant_area(
-            defaults["total_plant_area"],
-            allocated_areas
-        ))
-
-        total_area = float(sum(allocated_areas) + vacant_area)
-
-        forecast_output.append({
-            "FY": fy,
-            "sales_units": int(sales),
-            "production_area_m2": int(round(prod_area)),
-            "inventory_area_m2": int(round(inv_area)),
-            "passage_area_m2": int(round(passage_area)),
-            "people_gathering_area_m2": int(round(people_gathering_area)),
-            "admin_area_m2": int(round(admin_area)),
-            "external_wh_area_m2": int(round(external_wh_area)),
-            "customer_wh_area_m2": int(round(customer_wh_area)),
-            "vacant_area_m2": int(round(vacant_area)),
-            "total_area_m2": int(round(total_area))
-        })
-
-    # Convert forecast DataFrame to list of dicts for JSON serialization
-    forecast_list = forecast_output
-    
-    # Convert historical debug to native Python types
-    historical_debug_list = []
-    for _, row in historical[["FY", "sales_units", "production_area", "baseline_prod_area", "productivity_factor"]].iterrows():
-        historical_debug_list.append({
-            "FY": int(row["FY"]),
-            "sales_units": int(row["sales_units"]),
-            "production_area": float(row["production_area"]),
-            "baseline_prod_area": float(row["baseline_prod_area"]),
-            "productivity_factor": float(row["productivity_factor"])
-        })
-    
-    # Convert historical areas to native Python types
-    historical_areas_list = []
-    for _, row in historical_area_df.iterrows():
-        hist_dict = {"FY": int(row["FY"])}
-        for col in historical_area_df.columns:
-            if col != "FY":
-                hist_dict[col] = float(row[col]) if pd.notna(row[col]) else None
-        historical_areas_list.append(hist_dict)
-    
-    result = {
-        "plant": plant_name,
-        "operational_params": {k: float(v) if isinstance(v, (int, float)) else v for k, v in defaults.items()},
+def calibration_summary(calibration):
+    """The rounded 'calibration' and 'policy_params' sections of a forecast result."""
+    productivity_factor = calibration["productivity_factor"]
+    inventory_days = calibration["inventory_days"]
+
+    return {
         "calibration": {
             "productivity_factor": float(round(productivity_factor, 3)),
             "inventory_days": float(round(inventory_days, 1)),
-            "passage_ratio": float(round(passage_ratio, 3))
+            "passage_ratio": float(round(calibration["passage_ratio"], 3))
         },
         "policy_params": {
-            "people_gathering_ratio": float(round(people_gathering_ratio, 4)),
-            "admin_area_ratio": float(round(admin_area_ratio, 4)),
-            "external_wh_ratio": float(round(external_wh_ratio, 4)),
-            "customer_wh_ratio": float(round(customer_wh_ratio, 4)),
+            "people_gathering_ratio": float(round(calibration["people_gathering_ratio"], 4)),
+            "admin_area_ratio": float(round(calibration["admin_area_ratio"], 4)),
+            "external_wh_ratio": float(round(calibration["external_wh_ratio"], 4)),
+            "customer_wh_ratio": float(round(calibration["customer_wh_ratio"], 4)),
             "customer_wh_policy": "Calculated from historical data"
         },
-        "forecast": forecast_list,
-        "historical_debug": historical_debug_list,
-        "historical_areas": historical_areas_list
     }
-    
-    # Debug: Log result summary
-    print(f"[DEBUG] Returning result for plant: {result['plant']}, Forecast years: {[f['FY'] for f in result['forecast'][:3]]}")
-    
-    return result
+
+
+def historical_debug_rows(hist_fy, hist_sales, historical, calibration):
+    """Historical debug, built column-wise."""
+    return [
+        {
+            "FY": fy,
+            "sales_units": sales,
+            "production_area": production,
+            "baseline_prod_area": baseline,
+            "productivity_factor": factor
+        }
+        for fy, sales, production, baseline, factor in zip(
+            hist_fy.astype(np.int64).tolist(),
+            hist_sales.astype(np.int64).tolist(),
+            historical["production_area"].tolist(),
+            calibration["baseline_prod_area"].tolist(),
+            calibration["yearly_productivity_factor"].tolist(),
+        )
+    ]
+
+
+def historical_area_rows(hist_fy, historical):
+    """Historical areas, NaN -> None."""
+    area_columns = [col for col in historical if col != "FY"]
+    area_values = [
+        [None if v != v else v for v in historical[col].tolist()]
+        for col in area_columns
+    ]
+    return [
+        {"FY": fy, **dict(zip(area_columns, values))}
+        for fy, *values in zip(hist_fy.astype(np.int64).tolist(), *area_values)
+    ]
 
 
 # =========================================================
@@ -20,7 +20,7 @@ function FileUpload({ onFileSelect }) {
         e.preventDefault()
         setIsDragging(false)
         const file = e.dataTransfer.files[0]
-        if (file && file.name.endsWith('.csv')) {
+        if (file && (file.name.endsWith('.csv') || file.name.endsWith('.xlsx'))) {
             setSelectedFile(file)
             onFileSelect?.(file)
         }
@@ -51,7 +51,7 @@ function FileUpload({ onFileSelect }) {
                 <input
                     ref={fileInputRef}
                     type="file"
-                    accept=".csv"
+                    accept=".csv,.xlsx"
                     onChange={handleFileChange}
                     className="file-input-hidden"
                 />
@@ -0,0 +1,86 @@
+import { useEffect, useRef, useState } from 'react'
+
+// Merge a server delta frame into the current results
+export function applyForecastDelta(results, changed) {
+    const next = { ...results }
+    for (const [section, changes] of Object.entries(changed)) {
+        if (section === 'forecast') {
+            const rows = new Map(changes.map((row) => [row.FY, row]))
+            next.forecast = results.forecast.map((row) =>
+                rows.has(row.FY) ? { ...row, ...rows.get(row.FY) } : row
+            )
+        } else if (Array.isArray(changes)) {
+            next[section] = changes
+        } else {
+            next[section] = { ...results[section], ...changes }
+        }
+    }
+    return next
+}
+
+/**
+ * Keep forecast results live over the /api/area-forecast/ws channel.
+ *
+ * Opens one socket per plant/dataset while `enabled`, then sends every
+ * change of `operationalParams` as an update. The server coalesces bursts
+ * (e.g. slider drags) and replies with deltas, which are merged into
+ * `results`.
+ */
+function useForecastStream(apiBaseUrl, plantName, datasetId, operationalParams, enabled) {
+    const [results, setResults] = useState(null)
+    const [error, setError] = useState(null)
+    const socketRef = useRef(null)
+    const seqRef = useRef(0)
+    const paramsRef = useRef(operationalParams)
+    paramsRef.current = operationalParams
+
+    useEffect(() => {
+        if (!enabled || !plantName) return undefined
+
+        const socket = new WebSocket(`${apiBaseUrl.replace(/^http/, 'ws')}/api/area-forecast/ws`)
+        socketRef.current = socket
+
+        socket.onopen = () => {
+            socket.send(JSON.stringify({
+                type: 'open',
+                plant_name: plantName,
+                dataset_id: datasetId || undefined,
+                operational_params: paramsRef.current,
+                seq: ++seqRef.current,
+            }))
+        }
+        socket.onmessage = (event) => {
+            const frame = JSON.parse(event.data)
+            if (frame.type === 'result') {
+                setError(null)
+                setResults({ status: 'success', ...frame })
+            } else if (frame.type === 'delta') {
+                setError(null)
+                setResults((prev) => (prev ? applyForecastDelta(prev, frame.changed) : prev))
+            } else if (frame.type === 'error') {
+                setError(frame.detail)
+            }
+        }
+        socket.onerror = () => setError('Live forecast connection failed')
+
+        return () => {
+            socketRef.current = null
+            socket.close()
+            setResults(null)
+        }
+    }, [apiBaseUrl, plantName, datasetId, enabled])
+
+    useEffect(() => {
+        const socket = socketRef.current
+        if (!socket || socket.readyState !== WebSocket.OPEN) return
+        socket.send(JSON.stringify({
+            type: 'update',
+            operational_params: operationalParams,
+            seq: ++seqRef.current,
+        }))
+    }, [operationalParams])
+
+    return { results, error }
+}
+
+export default useForecastStream
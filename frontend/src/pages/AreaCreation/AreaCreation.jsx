@@ -1,12 +1,24 @@
-import { useState } from 'react'
+import { useMemo, useState } from 'react'
 import StepIndicator from '../../components/StepIndicator/StepIndicator'
 import Step1Forecast from './Step1Forecast'
 import Step2Parameters from './Step2Parameters'
 import Step3Results from './Step3Results'
+import useForecastStream from '../../hooks/useForecastStream'
 import './AreaCreation.css'
 
 const API_BASE_URL = 'http://localhost:8080'
 
+// Slider values -> backend operational parameters
+// (total_plant_area will use plant default if not provided)
+const toOperationalParams = (params) => ({
+    cycle_time_hours: params.cycleTime, // Convert seconds to hours
+    base_oee: params.oee / 100, // Convert percentage to decimal
+    working_hours_year: params.workingHours,
+    machine_size_m2: params.machineFootprint, // Convert sq ft to m²
+    safety_buffer: params.safetyBuffer / 100, // Convert percentage to decimal
+    warehouse_capacity_units_m2: params.warehouseCapacity,
+})
+
 function AreaCreation() {
     const [currentStep, setCurrentStep] = useState(1)
     const [isLoading, setIsLoading] = useState(false)
@@ -15,6 +27,7 @@ function AreaCreation() {
         forecastName: '',
         plant: 'DNHA_M',
         uploadedFile: null,
+        datasetId: null,
         selectedForecast: null,
         parameters: {
             cycleTime: 45,
@@ -27,6 +40,16 @@ function AreaCreation() {
         }
     })
 
+    // After the first calculation, parameter changes stream live results
+    const operationalParams = useMemo(() => toOperationalParams(formData.parameters), [formData.parameters])
+    const live = useForecastStream(
+        API_BASE_URL,
+        formData.plant,
+        formData.datasetId,
+        operationalParams,
+        Boolean(results && !results.error),
+    )
+
     const handleNext = () => {
         if (currentStep < 3) {
             setCurrentStep(currentStep + 1)
@@ -45,23 +68,35 @@ function AreaCreation() {
         setResults(null)
 
         try {
-            const params = formData.parameters
+            // Upload the sales forecast file (if any) and reference it by dataset id
+            let datasetId = formData.datasetId
+            if (formData.uploadedFile && !datasetId) {
+                const body = new FormData()
+                body.append('file', formData.uploadedFile)
+                const uploadResponse = await fetch(`${API_BASE_URL}/api/sales-forecasts`, {
+                    method: 'POST',
+                    body,
+                })
+                const uploadJson = await uploadResponse.json()
+                if (!uploadResponse.ok) {
+                    throw new Error(uploadJson.detail || `Failed to upload sales forecast: ${uploadResponse.status}`)
+                }
+                datasetId = uploadJson.dataset_id
+                setFormData((prev) => ({ ...prev, datasetId }))
+            }
 
             // Debug: Log the plant name being sent
             console.log('[FRONTEND DEBUG] Sending plant_name:', formData.plant)
             console.log('[FRONTEND DEBUG] Full formData:', formData)
 
             // Build query params
-            const queryParams = new URLSearchParams({
-                plant_name: formData.plant,
-                cycle_time_hours: (params.cycleTime).toString(), // Convert seconds to hours
-                base_oee: (params.oee / 100).toString(), // Convert percentage to decimal
-                working_hours_year: params.workingHours.toString(),
-                machine_size_m2: (params.machineFootprint).toString(), // Convert sq ft to m²
-                safety_buffer: (params.safetyBuffer / 100).toString(), // Convert percentage to decimal
-                warehouse_capacity_units_m2: params.warehouseCapacity.toString(),
-                // total_plant_area will use plant default if not provided
-            })
+            const queryParams = new URLSearchParams({ plant_name: formData.plant })
+            for (const [key, value] of Object.entries(operationalParams)) {
+                queryParams.append(key, value.toString())
+            }
+            if (datasetId) {
+                queryParams.append('dataset_id', datasetId)
+            }
 
             console.log('Fetching from:', `${API_BASE_URL}/api/area-forecast?${queryParams}`)
 
@@ -171,7 +206,7 @@ function AreaCreation() {
                     <Step2Parameters formData={formData} onFormChange={setFormData} />
                 )}
                 {currentStep === 3 && (
-                    <Step3Results formData={formData} isLoading={isLoading} results={results} />
+                    <Step3Results formData={formData} isLoading={isLoading} results={live.results || results} />
                 )}
             </div>
         </div>
@@ -7,7 +7,7 @@ function Step1Forecast({ formData, onFormChange }) {
     const [activeTab, setActiveTab] = useState('upload')
 
     const handleFileSelect = (file) => {
-        onFormChange({ ...formData, uploadedFile: file })
+        onFormChange({ ...formData, uploadedFile: file, datasetId: null })
     }
 
     const handleForecastSelect = (forecast) => {
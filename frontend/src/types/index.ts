@@ -81,6 +81,7 @@ export interface FormData {
     forecastName: string
     plant: string
     uploadedFile: File | null
+    datasetId?: string | null
     selectedForecast: Forecast | null
     parameters: Parameters
 }
@@ -0,0 +1,311 @@
+"""
+goal_seek.py
+
+Inverse solver: which parameter values keep the plant within
+total_plant_area?
+
+For every forecast year the allocated area is linear in production and
+inventory area:
+
+    allocated = cP * P + cI * I
+    cP = 1 + passage_ratio + people_gathering_ratio + admin_area_ratio
+    cI = 1 + passage_ratio + customer_wh_ratio + external_wh_ratio
+
+As in the Monte Carlo engine, calibration is held at the nominal
+parameters and the solved parameter acts on the forecast side, so P scales
+with cycle_time_hours, machine_size_m2 and (1 + safety_buffer), inversely
+with base_oee and working_hours_year, and I scales inversely with
+warehouse_capacity_units_m2. Requiring the raw vacant area
+(total_plant_area - allocated) to stay at or above the target in every year
+therefore has a closed-form solution; no iteration or brute force is
+needed. Solutions are checked by re-running the vectorized engine.
+
+This differs from /area-forecast, which recalibrates on the requested
+parameters: there the productivity factor and inventory days absorb every
+production and warehouse parameter, so only total_plant_area changes the
+forecast areas. Solutions for total_plant_area therefore match
+/area-forecast; solutions for the other parameters answer "what if the
+plant ran at this value against its nominal history" and are labelled
+calibration="nominal" in the result.
+"""
+
+import numpy as np
+
+from forecast import (
+    PLANT_DATA,
+    forecast_area_arrays,
+    get_calibration,
+    prepare_plant_inputs,
+    resolve_operational_params,
+    select_forecast_years,
+)
+from sweep import MAX_SCENARIOS, expand_range, range_length
+
+# How each solvable parameter enters the area formulas
+PRODUCTION_PARAMS = {
+    "cycle_time_hours": 1,
+    "machine_size_m2": 1,
+    "base_oee": -1,
+    "working_hours_year": -1,
+}
+SOLVABLE_PARAMS = tuple(PRODUCTION_PARAMS) + (
+    "safety_buffer", "warehouse_capacity_units_m2", "total_plant_area"
+)
+
+CALIBRATION_NOTE = (
+    "Calibration is fitted at the base parameters and held fixed while solving. "
+    "/area-forecast recalibrates on the requested parameters, which cancels every "
+    "parameter except total_plant_area out of the forecast areas, so only "
+    "total_plant_area solutions reproduce /area-forecast."
+)
+
+
+def _production_scale(d, nominal):
+    """Production area multiplier of parameters d relative to nominal."""
+    scale = (1 + d["safety_buffer"]) / (1 + nominal["safety_buffer"])
+    for name, exponent in PRODUCTION_PARAMS.items():
+        scale = scale * (d[name] / nominal[name]) ** exponent
+    return scale
+
+
+def _prepare(plant_name, base_params, start_year, end_year):
+    if plant_name not in PLANT_DATA:
+        raise ValueError(f"Plant '{plant_name}' not found in plant_data")
+    plant = PLANT_DATA[plant_name]
+    nominal = resolve_operational_params(plant.defaults, base_params)
+    inputs = prepare_plant_inputs(plant)
+    calibration = get_calibration(inputs, nominal)
+
+    future = select_forecast_years(inputs["sales_fy"], inputs["hist_fy"], start_year, end_year)
+    fy = inputs["sales_fy"][future]
+    if len(fy) == 0:
+        raise ValueError("No forecast years in the requested period")
+    areas = forecast_area_arrays(inputs["sales_units"][future], nominal, calibration)
+
+    c_prod = 1 + calibration["passage_ratio"] + calibration["people_gathering_ratio"] + calibration["admin_area_ratio"]
+    c_inv = 1 + calibration["passage_ratio"] + calibration["customer_wh_ratio"] + calibration["external_wh_ratio"]
+    return {
+        "nominal": nominal,
+        "calibration": calibration,
+        "inputs": inputs,
+        "future": future,
+        "fy": fy,
+        "prod": c_prod * areas["production_area"],   # cP * P at nominal, per year
+        "inv": c_inv * areas["inventory_area"],      # cI * I at nominal, per year
+    }
+
+
+def _check_target(min_vacant_ratio, min_vacant_m2):
+    if not 0 <= min_vacant_ratio < 1:
+        raise ValueError("min_vacant_ratio must be at least 0 and below 1")
+    if min_vacant_m2 < 0:
+        raise ValueError("min_vacant_m2 must be non-negative")
+
+
+def _target_vacant(total_plant_area, min_vacant_ratio, min_vacant_m2):
+    return np.maximum(total_plant_area * min_vacant_ratio, min_vacant_m2)
+
+
+def _solve(state, parameter, d, min_vacant_ratio, min_vacant_m2):
+    """
+    Closed-form bound on `parameter` given the other values in d.
+
+    Values in d may be arrays shaped (n, 1) to solve n cases at once.
+
+    Returns:
+        (bound value per case, binding year index per case)
+    """
+    nominal = state["nominal"]
+    prod, inv = state["prod"], state["inv"]
+    total = d["total_plant_area"]
+    inv_scale = nominal["warehouse_capacity_units_m2"] / d["warehouse_capacity_units_m2"]
+    prod_scale = _production_scale(d, nominal)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if parameter == "total_plant_area":
+            # T - A >= max(r T, m)  <=>  T >= A / (1 - r)  and  T >= A + m
+            allocated = prod * prod_scale + inv * inv_scale
+            required = np.maximum(allocated / (1 - min_vacant_ratio), allocated + min_vacant_m2)
+            return required.max(axis=-1), required.argmax(axis=-1)
+
+        room = total - _target_vacant(total, min_vacant_ratio, min_vacant_m2)
+
+        if parameter == "warehouse_capacity_units_m2":
+            # inv * cap_nom / cap <= room - prod * prod_scale
+            limit = (room - prod * prod_scale) / inv
+            limit = np.where(limit > 0, limit, 0.0)
+            binding = limit.argmin(axis=-1)
+            factor = limit.min(axis=-1)
+            return nominal[parameter] / factor, binding
+
+        # Production-side parameter: prod * prod_scale <= room - inv * inv_scale
+        limit = (room - inv * inv_scale) / prod
+        limit = np.where(limit > 0, limit, 0.0)
+        binding = limit.argmin(axis=-1)
+        current_scale = np.asarray(prod_scale, dtype=float)
+        if current_scale.ndim:
+            current_scale = current_scale[..., 0]
+        factor = limit.min(axis=-1) / current_scale
+        current = np.asarray(d[parameter], dtype=float)
+        if current.ndim:
+            current = current[..., 0]
+        if parameter == "safety_buffer":
+            return (1 + current) * factor - 1, binding
+        if PRODUCTION_PARAMS[parameter] > 0:
+            return current * factor, binding
+        return current / factor, binding
+
+
+def _bound_direction(parameter):
+    if parameter == "total_plant_area" or parameter == "warehouse_capacity_units_m2":
+        return "min"
+    if parameter in PRODUCTION_PARAMS and PRODUCTION_PARAMS[parameter] < 0:
+        return "min"
+    return "max"
+
+
+def _is_feasible(parameter, value):
+    value = np.asarray(value, dtype=float)
+    feasible = np.isfinite(value)
+    if parameter == "base_oee":
+        feasible &= value <= 1.0
+    if parameter == "safety_buffer":
+        feasible &= value >= 0.0
+    if parameter in PRODUCTION_PARAMS or parameter == "warehouse_capacity_units_m2":
+        feasible &= value > 0
+    return feasible
+
+
+def _check_param(parameter):
+    if parameter not in SOLVABLE_PARAMS:
+        raise ValueError(
+            f"Cannot solve for '{parameter}', expected one of: {', '.join(SOLVABLE_PARAMS)}"
+        )
+
+
+def solve_parameter(
+    plant_name,
+    parameter,
+    min_vacant_ratio=0.08,
+    min_vacant_m2=0.0,
+    base_params=None,
+    start_year=None,
+    end_year=None
+):
+    """
+    Find the limit of one parameter that keeps vacant area on target.
+
+    Args:
+        plant_name: Name of the plant (must exist in PLANT_DATA)
+        parameter: Parameter to solve for (see SOLVABLE_PARAMS)
+        min_vacant_ratio: Required vacant share of total_plant_area
+                          (default 0.08, the floor compute_vacant_area applies)
+        min_vacant_m2: Required vacant area in m² (the larger target wins)
+        base_params: Optional operational parameters for everything else
+        start_year: Optional start year for forecast period (inclusive)
+        end_year: Optional end year for forecast period (inclusive)
+
+    Returns:
+        Dictionary with the bound ('min' or 'max'), its value, the current
+        value, the binding FY, feasibility, the verified minimum vacant
+        headroom (raw vacant minus target) at the solution and the
+        calibration mode ("nominal", see CALIBRATION_NOTE).
+    """
+    _check_param(parameter)
+    _check_target(min_vacant_ratio, min_vacant_m2)
+    state = _prepare(plant_name, base_params, start_year, end_year)
+    nominal = state["nominal"]
+
+    value, binding = _solve(state, parameter, nominal, min_vacant_ratio, min_vacant_m2)
+    value = float(value)
+    feasible = bool(_is_feasible(parameter, value))
+
+    result = {
+        "plant": plant_name,
+        "parameter": parameter,
+        "bound": _bound_direction(parameter),
+        "value": value if np.isfinite(value) else None,
+        "current_value": float(nominal[parameter]),
+        "feasible": feasible,
+        "binding_FY": int(state["fy"][int(binding)]),
+        "min_vacant_ratio": min_vacant_ratio,
+        "min_vacant_m2": min_vacant_m2,
+        "FY": state["fy"].astype(np.int64).tolist(),
+        "calibration": "nominal",
+        "calibration_note": CALIBRATION_NOTE,
+    }
+    if feasible:
+        result["verified_min_headroom_m2"] = _verify(state, {**nominal, parameter: value},
+                                                     min_vacant_ratio, min_vacant_m2)
+    return result
+
+
+def solve_pareto(
+    plant_name,
+    parameters,
+    first_range,
+    min_vacant_ratio=0.08,
+    min_vacant_m2=0.0,
+    base_params=None,
+    start_year=None,
+    end_year=None
+):
+    """
+    Feasibility frontier over two parameters.
+
+    For each value of the first parameter (from `first_range`, a list or
+    {start, stop, num|step}) the second parameter's limit is solved in
+    closed form, all values at once. The range may hold at most
+    sweep.MAX_SCENARIOS values.
+
+    Returns:
+        Columnar frontier: first-parameter values, the matching limit of
+        the second parameter, the binding FY and a feasibility flag, plus
+        the calibration mode as in solve_parameter.
+    """
+    if len(parameters) != 2 or parameters[0] == parameters[1]:
+        raise ValueError("Pareto solve needs two different parameters")
+    first, second = parameters
+    _check_param(first)
+    _check_param(second)
+    _check_target(min_vacant_ratio, min_vacant_m2)
+
+    count = range_length(first_range)
+    if count == 0:
+        raise ValueError("Range of the first parameter is empty")
+    if count > MAX_SCENARIOS:
+        raise ValueError(f"Range of the first parameter has {count} values, limit is {MAX_SCENARIOS}")
+
+    state = _prepare(plant_name, base_params, start_year, end_year)
+    values = expand_range(first_range)
+
+    d = dict(state["nominal"])
+    d[first] = values[:, None]
+    limits, binding = _solve(state, second, d, min_vacant_ratio, min_vacant_m2)
+    limits = np.broadcast_to(limits, values.shape)
+    binding = np.broadcast_to(binding, values.shape)
+    feasible = _is_feasible(second, limits) & _is_feasible(first, values)
+
+    return {
+        "plant": plant_name,
+        "parameters": [first, second],
+        "bound": _bound_direction(second),
+        first: values.tolist(),
+        second: [float(v) if np.isfinite(v) else None for v in limits.tolist()],
+        "binding_FY": state["fy"][binding].astype(np.int64).tolist(),
+        "feasible": feasible.tolist(),
+        "min_vacant_ratio": min_vacant_ratio,
+        "min_vacant_m2": min_vacant_m2,
+        "calibration": "nominal",
+        "calibration_note": CALIBRATION_NOTE,
+    }
+
+
+def _verify(state, d, min_vacant_ratio, min_vacant_m2):
+    """Minimum (raw vacant - target) over the horizon, from the engine."""
+    inputs = state["inputs"]
+    areas = forecast_area_arrays(inputs["sales_units"][state["future"]], d, state["calibration"])
+    allocated = areas["total_area"] - areas["vacant_area"]
+    total = d["total_plant_area"]
+    headroom = total - allocated - _target_vacant(total, min_vacant_ratio, min_vacant_m2)
+    return round(float(headroom.min()), 3)
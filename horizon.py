@@ -0,0 +1,187 @@
+"""
+horizon.py
+
+Forecast horizon: which periods are forecast and the sales driving them.
+
+The history/forecast boundary comes from the data: every sales year after
+the last year with historical areas is a forecast year. On top of the
+plant's annual sales series a horizon can
+
+    extrapolate   continue sales beyond the last provided year up to
+                  end_year. "none" (default) forecasts the provided years
+                  only; "flat" repeats the last year, "linear" continues the
+                  trend and "cagr" the compound growth rate of the last
+                  TREND_YEARS provided years. With any method other than
+                  "none", missing years inside the provided range are
+                  filled by linear interpolation.
+    granularity   "annual" (default), "quarterly" or "monthly". Sub-annual
+                  periods carry the annualized sales rate, interpolated
+                  linearly from the previous FY's sales to the current FY's,
+                  so the last period of each FY equals the annual value and
+                  the area formulas (which take annual throughput) apply
+                  unchanged.
+
+Annual granularity without extrapolation selects exactly the provided
+forecast years, so results match the plain annual engine.
+"""
+
+import numpy as np
+
+from plant_records import lookup_sales
+
+# Periods per fiscal year
+GRANULARITIES = {"annual": 1, "quarterly": 4, "monthly": 12}
+
+EXTRAPOLATION_METHODS = ("none", "flat", "linear", "cagr")
+
+# Provided years the linear / CAGR trend is fitted on
+TREND_YEARS = 5
+
+# Upper bound on years extrapolated past the provided sales
+MAX_EXTRAPOLATION_YEARS = 100
+
+
+def history_end_year(hist_fy):
+    """Last fiscal year with historical areas (the history/forecast boundary)."""
+    if len(hist_fy) == 0:
+        raise ValueError("No historical area data to calibrate from")
+    return int(np.max(hist_fy))
+
+
+def select_forecast_years(sales_fy, hist_fy, start_year=None, end_year=None):
+    """Boolean mask of the years after the history inside the period."""
+    future = sales_fy > history_end_year(hist_fy)
+
+    # Filter by period if specified
+    if start_year is not None:
+        future &= sales_fy >= start_year
+    if end_year is not None:
+        future &= sales_fy <= end_year
+    return future
+
+
+def validate_horizon(start_year=None, end_year=None, granularity="annual", extrapolate="none"):
+    """Raise ValueError for an unknown granularity, method or an empty period."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(
+            f"Unknown granularity '{granularity}', expected one of: {', '.join(GRANULARITIES)}"
+        )
+    if extrapolate not in EXTRAPOLATION_METHODS:
+        raise ValueError(
+            f"Unknown extrapolation '{extrapolate}', expected one of: {', '.join(EXTRAPOLATION_METHODS)}"
+        )
+    if start_year is not None and end_year is not None and start_year > end_year:
+        raise ValueError(f"start_year {start_year} is after end_year {end_year}")
+
+
+def annual_sales_series(sales_fy, sales_units, extrapolate="none", end_year=None):
+    """
+    Annual sales with gaps interpolated and extended to end_year.
+
+    Args:
+        sales_fy: Fiscal years of the provided sales
+        sales_units: Sales units per provided year
+        extrapolate: One of EXTRAPOLATION_METHODS
+        end_year: Last year to extrapolate to (None: no extension)
+
+    Returns:
+        (fy, sales_units) arrays; the inputs unchanged for "none".
+    """
+    if extrapolate == "none":
+        return sales_fy, sales_units
+
+    order = np.argsort(sales_fy, kind="stable")
+    fy = np.asarray(sales_fy)[order]
+    sales = np.asarray(sales_units, dtype=float)[order]
+    known = ~np.isnan(sales)
+    fy, sales = fy[known], sales[known]
+    if len(fy) == 0:
+        raise ValueError("No sales data to extrapolate from")
+
+    last = int(fy[-1])
+    stop = max(last, end_year) if end_year is not None else last
+    if stop - last > MAX_EXTRAPOLATION_YEARS:
+        raise ValueError(
+            f"Cannot extrapolate more than {MAX_EXTRAPOLATION_YEARS} years past FY{last}"
+        )
+
+    # Fill gaps inside the provided range
+    years = np.arange(int(fy[0]), stop + 1, dtype=np.int64)
+    provided = np.interp(years[years <= last], fy, sales)
+
+    ahead = np.arange(1, stop - last + 1, dtype=float)
+    trend_fy, trend_sales = fy[-TREND_YEARS:], sales[-TREND_YEARS:]
+    span = float(trend_fy[-1] - trend_fy[0])
+    if extrapolate == "flat" or span == 0:
+        extended = np.full(len(ahead), sales[-1])
+    elif extrapolate == "linear":
+        slope = (trend_sales[-1] - trend_sales[0]) / span
+        extended = np.maximum(sales[-1] + slope * ahead, 0.0)
+    else:  # cagr
+        if trend_sales[0] <= 0 or trend_sales[-1] <= 0:
+            raise ValueError("CAGR extrapolation needs positive sales")
+        growth = (trend_sales[-1] / trend_sales[0]) ** (1.0 / span)
+        extended = sales[-1] * growth ** ahead
+
+    return years, np.concatenate([provided, extended])
+
+
+def period_labels(fy, granularity):
+    """Labels like FY2026-Q1 / FY2026-M01 for each period (None for annual)."""
+    per_year = GRANULARITIES[granularity]
+    if per_year == 1:
+        return None
+    if granularity == "quarterly":
+        suffixes = [f"Q{q}" for q in range(1, per_year + 1)]
+    else:
+        suffixes = [f"M{m:02d}" for m in range(1, per_year + 1)]
+    return [f"FY{year}-{suffix}" for year in np.asarray(fy).tolist() for suffix in suffixes]
+
+
+def forecast_horizon(
+    sales_fy,
+    sales_units,
+    hist_fy,
+    start_year=None,
+    end_year=None,
+    granularity="annual",
+    extrapolate="none"
+):
+    """
+    Forecast periods and their sales.
+
+    Args:
+        sales_fy: Fiscal years of the provided sales
+        sales_units: Sales units per provided year
+        hist_fy: Fiscal years with historical areas
+        start_year: Optional start year for forecast period (inclusive)
+        end_year: Optional end year for forecast period (inclusive)
+        granularity: One of GRANULARITIES
+        extrapolate: One of EXTRAPOLATION_METHODS
+
+    Returns:
+        Dictionary with 'FY' (per period), 'period' (labels, None for
+        annual) and 'sales_units' (annualized sales rate per period).
+    """
+    validate_horizon(start_year, end_year, granularity, extrapolate)
+    fy, sales = annual_sales_series(sales_fy, sales_units, extrapolate, end_year)
+
+    future = select_forecast_years(fy, hist_fy, start_year, end_year)
+    future_fy = fy[future]
+    future_sales = sales[future]
+
+    per_year = GRANULARITIES[granularity]
+    if per_year == 1:
+        return {"FY": future_fy, "period": None, "sales_units": future_sales}
+
+    # Ramp from the previous FY's sales (flat where it is unknown)
+    previous = lookup_sales(future_fy - 1, fy, sales)
+    previous = np.where(np.isnan(previous), future_sales, previous)
+    remaining = 1.0 - np.arange(1, per_year + 1) / per_year
+    rates = future_sales[:, None] - (future_sales - previous)[:, None] * remaining
+
+    return {
+        "FY": np.repeat(future_fy, per_year),
+        "period": period_labels(future_fy, granularity),
+        "sales_units": rates.reshape(-1),
+    }
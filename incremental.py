@@ -0,0 +1,427 @@
+"""
+incremental.py
+
+Dependency-aware incremental evaluation of a single plant forecast.
+
+ForecastGraph keeps every intermediate of the forecast (baseline
+production area, calibration factors, each area category, vacant and total
+area) as a node. Inputs are the operational parameters and the per-year
+sales of the forecast horizon:
+
+    sales, production params --> baseline_production --+
+    calibration params --> calibration --> productivity_factor --+--> production_area
+                                      +--> inventory_days ---------> inventory_area
+                                      +--> passage_ratio, policy ratios
+    production_area, inventory_area --> passage / policy areas --> allocated_area
+    allocated_area, total_plant_area --> vacant_area --> total_area
+
+update() marks the changed inputs dirty and recomputes only the nodes
+downstream of them. Per-year nodes are recomputed only for the affected
+years, and a node whose new value equals the old one stops the
+propagation (early cutoff), so changing total_plant_area touches just
+vacant and total area. The arithmetic is the same as forecast_area_arrays,
+element by element, so the result is bit-identical to a full
+run_forecast_for_plant.
+
+update() returns only the result fields whose serialized value changed.
+"""
+
+import math
+import threading
+
+import numpy as np
+
+from calibration import CALIBRATION_PARAMS
+from forecast import (
+    ALLOCATED_CATEGORIES,
+    CALIBRATION_FACTORS,
+    OUTPUT_CATEGORIES,
+    PLANT_DATA,
+    calibration_summary,
+    compute_baseline_production_area,
+    compute_inventory_area,
+    compute_passage_area,
+    compute_vacant_area_array,
+    forecast_rows,
+    get_calibration,
+    historical_area_rows,
+    historical_debug_rows,
+    operational_params_summary,
+    prepare_plant_inputs,
+    resolve_operational_params,
+    select_forecast_years,
+)
+
+PRODUCTION_PARAMS = (
+    "cycle_time_hours",
+    "base_oee",
+    "working_hours_year",
+    "machine_size_m2",
+    "safety_buffer",
+)
+
+# Operational parameters an update may set
+OPERATIONAL_PARAMS = PRODUCTION_PARAMS + ("warehouse_capacity_units_m2", "total_plant_area")
+
+# Computed node -> inputs, in topological order. Nodes listed in PER_YEAR
+# hold one value per forecast year; the others are scalars (or, for
+# calibration, the calibration dict).
+DEPENDENCIES = {
+    "baseline_production": ("sales",) + PRODUCTION_PARAMS,
+    "calibration": CALIBRATION_PARAMS,
+    **{factor: ("calibration",) for factor in CALIBRATION_FACTORS},
+    "production_area": ("baseline_production", "productivity_factor"),
+    "inventory_area": ("sales", "inventory_days", "warehouse_capacity_units_m2"),
+    "passage_area": ("production_area", "inventory_area", "passage_ratio"),
+    "customer_wh_area": ("inventory_area", "customer_wh_ratio"),
+    "external_wh_area": ("inventory_area", "external_wh_ratio"),
+    "people_gathering_area": ("production_area", "people_gathering_ratio"),
+    "admin_area": ("production_area", "admin_area_ratio"),
+    "allocated_area": ALLOCATED_CATEGORIES,
+    "vacant_area": ("allocated_area", "total_plant_area"),
+    "total_area": ("allocated_area", "vacant_area"),
+}
+
+PER_YEAR = frozenset((
+    "sales",
+    "baseline_production",
+    "production_area",
+    "inventory_area",
+    "passage_area",
+    "customer_wh_area",
+    "external_wh_area",
+    "people_gathering_area",
+    "admin_area",
+    "allocated_area",
+    "vacant_area",
+    "total_area",
+))
+
+# Marks a node as changed in every year (or a scalar node as changed)
+ALL = None
+
+
+def _finite_number(value, what):
+    # bool is an int subclass; a JSON true is not a parameter value
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{what} must be a number, got {value!r}")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{what} must be a number, got {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{what} must be finite, got {value!r}")
+    return number
+
+
+def validate_param_updates(operational_params):
+    """
+    Check the operational parameters of an update.
+
+    Args:
+        operational_params: Dict of parameter -> value (None resets it)
+
+    Returns:
+        Dict of parameter -> float or None. Raises ValueError for names
+        outside OPERATIONAL_PARAMS and values that are not finite numbers.
+    """
+    if not isinstance(operational_params, dict):
+        raise ValueError("operational_params must be an object")
+    unknown = [name for name in operational_params if name not in OPERATIONAL_PARAMS]
+    if unknown:
+        raise ValueError(f"Unknown operational parameter(s): {', '.join(map(str, unknown))}")
+    return {
+        name: None if value is None else _finite_number(value, name)
+        for name, value in operational_params.items()
+    }
+
+
+def validate_sales_updates(sales):
+    """
+    Check the sales of an update.
+
+    Returns:
+        Dict of FY (int) -> units (float). Raises ValueError for FYs that are
+        not integers and units that are not finite numbers.
+    """
+    if not isinstance(sales, dict):
+        raise ValueError("sales must be an object")
+    checked = {}
+    for fy, units in sales.items():
+        year = _finite_number(fy, "FY")
+        if year != int(year):
+            raise ValueError(f"FY must be an integer, got {fy!r}")
+        checked[int(year)] = _finite_number(units, f"sales for FY {fy}")
+    return checked
+
+
+class ForecastGraph:
+    """Incrementally maintained forecast of one plant."""
+
+    def __init__(
+        self,
+        plant_name,
+        operational_params=None,
+        start_year=None,
+        end_year=None,
+        sales_df=None
+    ):
+        """
+        Build the graph and evaluate every node once.
+
+        Args:
+            plant_name: Name of the plant (must exist in PLANT_DATA)
+            operational_params: Optional dict of operational overrides
+            start_year: Optional start year for forecast period (inclusive)
+            end_year: Optional end year for forecast period (inclusive)
+            sales_df: Optional sales override (DataFrame or column mapping)
+        """
+        if plant_name not in PLANT_DATA:
+            raise ValueError(f"Plant '{plant_name}' not found in plant_data")
+
+        plant = PLANT_DATA[plant_name]
+        self.plant_name = plant_name
+        self.plant_defaults = plant.defaults
+        self.inputs = prepare_plant_inputs(plant, sales_df)
+        self.overrides = dict(operational_params or {})
+        self.params = resolve_operational_params(plant.defaults, self.overrides or None)
+
+        future = select_forecast_years(
+            self.inputs["sales_fy"], self.inputs["hist_fy"], start_year, end_year
+        )
+        self.fy = self.inputs["sales_fy"][future]
+        self._year_index = {int(fy): i for i, fy in enumerate(self.fy.tolist())}
+        self.version = 0
+        self._lock = threading.Lock()
+
+        self.values = {"sales": np.array(self.inputs["sales_units"][future], dtype=float)}
+        self.values.update(self.params)
+        for node in DEPENDENCIES:
+            self.values[node] = self._compute(node, ALL)
+        self._result = self._full_result()
+
+    # -----------------------------------------------------
+    # Evaluation
+    # -----------------------------------------------------
+
+    def _compute(self, node, cols):
+        """Value of node for the given year indices (ALL = every year)."""
+        v = self.values
+        at = slice(None) if cols is ALL else cols
+
+        if node == "baseline_production":
+            return compute_baseline_production_area(v["sales"][at], self.params)
+        if node == "calibration":
+            return get_calibration(self.inputs, self.params)
+        if node in CALIBRATION_FACTORS:
+            return v["calibration"][node]
+        if node == "production_area":
+            return v["baseline_production"][at] * v["productivity_factor"]
+        if node == "inventory_area":
+            return compute_inventory_area(v["sales"][at], v["inventory_days"], self.params)
+        if node == "passage_area":
+            return compute_passage_area(
+                v["production_area"][at], v["inventory_area"][at], v["passage_ratio"]
+            )
+        if node == "customer_wh_area":
+            return v["inventory_area"][at] * v["customer_wh_ratio"]
+        if node == "external_wh_area":
+            return v["inventory_area"][at] * v["external_wh_ratio"]
+        if node == "people_gathering_area":
+            return v["production_area"][at] * v["people_gathering_ratio"]
+        if node == "admin_area":
+            return v["production_area"][at] * v["admin_area_ratio"]
+        if node == "allocated_area":
+            allocated_total = 0
+            for category in ALLOCATED_CATEGORIES:
+                allocated_total = allocated_total + v[category][at]
+            return allocated_total
+        if node == "vacant_area":
+            return compute_vacant_area_array(v["total_plant_area"], v["allocated_area"][at])
+        if node == "total_area":
+            return v["allocated_area"][at] + v["vacant_area"][at]
+        raise KeyError(node)
+
+    def _propagate(self, dirty):
+        """
+        Recompute everything downstream of the dirty inputs.
+
+        Args:
+            dirty: Mapping of changed input -> year indices (array) or ALL
+
+        Returns:
+            Mapping of every node that actually changed -> year indices or ALL.
+        """
+        for node, deps in DEPENDENCIES.items():
+            marks = [dirty[dep] for dep in deps if dep in dirty]
+            if not marks:
+                continue
+            if node not in PER_YEAR:
+                new = self._compute(node, ALL)
+                if not _same(new, self.values[node]):
+                    self.values[node] = new
+                    dirty[node] = ALL
+                continue
+
+            cols = ALL if any(m is ALL for m in marks) else np.unique(np.concatenate(marks))
+            new = self._compute(node, cols)
+            at = slice(None) if cols is ALL else cols
+            old = self.values[node][at]
+            changed = ~((new == old) | (np.isnan(new) & np.isnan(old)))
+            if changed.any():
+                self.values[node][at] = new
+                index = np.arange(len(self.fy)) if cols is ALL else cols
+                dirty[node] = index[changed]
+        return dirty
+
+    # -----------------------------------------------------
+    # Updates
+    # -----------------------------------------------------
+
+    def update(self, operational_params=None, sales=None):
+        """
+        Apply parameter and/or sales changes and return the result delta.
+
+        Args:
+            operational_params: Dict of parameter -> new value; None resets a
+                                parameter to the plant default
+            sales: Dict of forecast FY -> sales units
+
+        Raises ValueError, leaving the graph unchanged, for unknown
+        parameters, non-numeric or non-finite values and FYs outside the
+        forecast period.
+
+        Returns:
+            Dictionary with the new version and 'changed', holding only the
+            result fields whose value changed (forecast rows by FY with just
+            their changed fields; other sections with just changed keys).
+        """
+        with self._lock:
+            # Validate and build everything first: a rejected update leaves
+            # the graph untouched
+            params = overrides = None
+            if operational_params:
+                overrides = dict(self.overrides)
+                for name, value in validate_param_updates(operational_params).items():
+                    if value is None:
+                        overrides.pop(name, None)
+                    else:
+                        overrides[name] = value
+                params = resolve_operational_params(self.plant_defaults, overrides or None)
+
+            cols = values = None
+            if sales:
+                cols, values = [], []
+                for fy, units in validate_sales_updates(sales).items():
+                    index = self._year_index.get(fy)
+                    if index is None:
+                        raise ValueError(f"FY {fy} is not in the forecast period")
+                    cols.append(index)
+                    values.append(units)
+                cols = np.asarray(cols, dtype=np.int64)
+                values = np.asarray(values, dtype=float)
+
+            dirty = {}
+            if params is not None:
+                for name in set(params) | set(self.params):
+                    if params.get(name) != self.params.get(name):
+                        dirty[name] = ALL
+                        self.values[name] = params.get(name)
+                self.overrides = overrides
+                self.params = params
+
+            if cols is not None:
+                changed = self.values["sales"][cols] != values
+                if changed.any():
+                    self.values["sales"][cols[changed]] = values[changed]
+                    dirty["sales"] = cols[changed]
+
+            dirty = self._propagate(dirty)
+            delta = self._delta(dirty)
+            if delta:
+                self.version += 1
+            return {"plant": self.plant_name, "version": self.version, "changed": delta}
+
+    # -----------------------------------------------------
+    # Serialization
+    # -----------------------------------------------------
+
+    def result(self):
+        """The current full result, shaped like run_forecast_for_plant's."""
+        with self._lock:
+            return {**self._result, "version": self.version}
+
+    def _areas(self, at=slice(None)):
+        return {c: self.values[c][at] for c in OUTPUT_CATEGORIES}
+
+    def _full_result(self):
+        inputs = self.inputs
+        calibration = self.values["calibration"]
+        return {
+            "plant": self.plant_name,
+            "operational_params": operational_params_summary(self.params),
+            **calibration_summary(calibration),
+            "forecast": forecast_rows(self.fy, self.values["sales"], self._areas()),
+            "historical_debug": historical_debug_rows(
+                inputs["hist_fy"], inputs["hist_sales"], inputs["historical"], calibration
+            ),
+            "historical_areas": historical_area_rows(inputs["hist_fy"], inputs["historical"]),
+        }
+
+    def _delta(self, dirty):
+        """Re-serialize the changed parts of the result and diff them."""
+        delta = {}
+        result = self._result
+
+        if any(name in dirty for name in result["operational_params"]) or any(name in dirty for name in self.params):
+            section = operational_params_summary(self.params)
+            changed = _diff_dict(result["operational_params"], section)
+            if changed:
+                delta["operational_params"] = changed
+            result["operational_params"] = section
+
+        if "calibration" in dirty:
+            calibration = self.values["calibration"]
+            for name, section in calibration_summary(calibration).items():
+                changed = _diff_dict(result[name], section)
+                if changed:
+                    delta[name] = changed
+                result[name] = section
+            inputs = self.inputs
+            rows = historical_debug_rows(
+                inputs["hist_fy"], inputs["hist_sales"], inputs["historical"], calibration
+            )
+            if rows != result["historical_debug"]:
+                delta["historical_debug"] = rows
+            result["historical_debug"] = rows
+
+        marks = [dirty[c] for c in ("sales",) + OUTPUT_CATEGORIES if c in dirty]
+        if marks:
+            if any(m is ALL for m in marks):
+                cols = np.arange(len(self.fy))
+            else:
+                cols = np.unique(np.concatenate(marks))
+            rows = forecast_rows(self.fy[cols], self.values["sales"][cols], self._areas(cols))
+            forecast_delta = []
+            for index, row in zip(cols.tolist(), rows):
+                changed = _diff_dict(result["forecast"][index], row)
+                if changed:
+                    forecast_delta.append({"FY": row["FY"], **changed})
+                result["forecast"][index] = row
+            if forecast_delta:
+                delta["forecast"] = forecast_delta
+
+        return delta
+
+
+def _same(a, b):
+    if isinstance(a, dict) or isinstance(b, dict):
+        return a is b
+    return a == b or (a != a and b != b)
+
+
+def _diff_dict(old, new):
+    return {key: value for key, value in new.items() if old.get(key, _MISSING) != value}
+
+
+_MISSING = object()
@@ -0,0 +1,206 @@
+"""
+instrumentation.py
+
+Structured logging and per-stage timing for the forecast pipeline.
+
+- Logging goes through the "area_forecast" logger. configure_logging()
+  installs a JSON-lines formatter; the level comes from
+  AREA_FORECAST_LOG_LEVEL (default WARNING), so debug records cost nothing
+  on the hot path unless enabled.
+- stage_timer() records stage durations into latency histograms that
+  render_prometheus() exposes in the Prometheus text format.
+
+Metrics are per process: with the "process" executor backend, stage
+timings are recorded inside the worker processes, while request latency
+histograms are recorded in the API process.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("area_forecast")
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_RESERVED_LOG_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra={...}` fields become keys."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_LOG_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None):
+    """Attach a JSON handler to the area_forecast logger (idempotent)."""
+    level = level or os.environ.get("AREA_FORECAST_LOG_LEVEL", "WARNING")
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    if not any(getattr(h, "_area_forecast", False) for h in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+        handler._area_forecast = True
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
+# =========================================================
+# METRICS
+# =========================================================
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (h.buckets, list(h.counts), h.total, h.count)
+                for key, h in self._histograms.items()
+            }
+
+    def render(self):
+        """Prometheus text exposition of every histogram."""
+        lines = []
+        by_name = {}
+        for (name, labels), values in sorted(self.snapshot().items()):
+            by_name.setdefault(name, []).append((labels, values))
+
+        for name, series in by_name.items():
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (buckets, counts, total, count) in series:
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {total}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("area_forecast_stage_seconds", "Forecast pipeline stage duration")
+METRICS.describe("area_forecast_request_seconds", "End-to-end API request latency")
+
+
+@contextmanager
+def stage_timer(stage, plant=None):
+    """Time a pipeline stage into area_forecast_stage_seconds{stage, plant}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.observe(
+            "area_forecast_stage_seconds",
+            time.perf_counter() - start,
+            stage=stage,
+            plant=plant or "",
+        )
+
+
+def plant_label(plant):
+    """
+    Metric label for a requested plant name: names not in PLANT_DATA are
+    labelled "unknown", so arbitrary request input cannot create new series.
+    """
+    from plant_data import PLANT_DATA
+
+    if not plant:
+        return ""
+    return plant if plant in PLANT_DATA else "unknown"
+
+
+@contextmanager
+def request_timer(endpoint, plant=None):
+    """Time an API request into area_forecast_request_seconds{endpoint, plant}."""
+    label = plant_label(plant)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.observe(
+            "area_forecast_request_seconds",
+            time.perf_counter() - start,
+            endpoint=endpoint,
+            plant=label,
+        )
+
+
+def render_prometheus():
+    """Prometheus exposition of the histograms plus calibration cache counters."""
+    from calibration import calibration_cache_info
+
+    info = calibration_cache_info()
+    lines = [
+        "# HELP area_forecast_calibration_cache_hits_total Calibration cache hits",
+        "# TYPE area_forecast_calibration_cache_hits_total counter",
+        f"area_forecast_calibration_cache_hits_total {info['hits']}",
+        "# HELP area_forecast_calibration_cache_misses_total Calibration cache misses",
+        "# TYPE area_forecast_calibration_cache_misses_total counter",
+        f"area_forecast_calibration_cache_misses_total {info['misses']}",
+        "# HELP area_forecast_calibration_cache_size Calibration cache entries",
+        "# TYPE area_forecast_calibration_cache_size gauge",
+        f"area_forecast_calibration_cache_size {info['size']}",
+    ]
+    return METRICS.render() + "\n".join(lines) + "\n"
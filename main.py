@@ -1,9 +1,33 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.area_forecast import router
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.api.area_forecast import FORECAST_END_YEAR, FORECAST_START_YEAR, router
+from app.api.backtest import router as backtest_router
+from app.api.capacity_breaches import router as breaches_router
+from app.api.datasets import router as datasets_router
+from app.api.forecast_stream import router as stream_router
+from app.api.portfolio_forecast import router as portfolio_router
+from app.api.runs import router as runs_router
+from app.execution import get_executor, shutdown_executor
+from app.warmup import DEFAULT_FORECASTS
+from instrumentation import configure_logging, render_prometheus
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    # Start the forecast executor (and its worker processes) before serving
+    get_executor()
+    # Materialize default forecasts in the background; /ready reports progress
+    DEFAULT_FORECASTS.start(FORECAST_START_YEAR, FORECAST_END_YEAR)
+    yield
+    await DEFAULT_FORECASTS.stop()
+    shutdown_executor()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware to allow frontend requests
 app.add_middleware(
@@ -15,8 +39,33 @@ app.add_middleware(
 )
 
 app.include_router(router, prefix="/api")
+app.include_router(datasets_router, prefix="/api")
+app.include_router(portfolio_router, prefix="/api")
+app.include_router(stream_router, prefix="/api")
+app.include_router(runs_router, prefix="/api")
+app.include_router(backtest_router, prefix="/api")
+app.include_router(breaches_router, prefix="/api")
 
 @app.get('/')
 def root():
     return {'message': 'Denso area forecast API.'}
 
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics: stage/request latency histograms and cache counters."""
+    return render_prometheus()
+
+
+@app.get('/health')
+def health():
+    """Liveness: the process is up and serving."""
+    return {'status': 'ok'}
+
+
+@app.get('/ready')
+def ready():
+    """Readiness: 200 once default forecasts are materialized, else 503."""
+    warmup = DEFAULT_FORECASTS.status()
+    status_code = 200 if DEFAULT_FORECASTS.ready else 503
+    return JSONResponse(status_code=status_code, content={'ready': DEFAULT_FORECASTS.ready, 'warmup': warmup})
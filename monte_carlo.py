@@ -0,0 +1,365 @@
+"""
+monte_carlo.py
+
+Stochastic (Monte Carlo) area forecasts.
+
+Operational parameters flagged "ASSUMED" in plant_data.py and the future
+sales path are uncertain. This module samples them and pushes every sample
+through the vectorized engine, returning P10/P50/P90 bands per area
+category per FY.
+
+Model:
+- Calibration is fitted once, at the nominal (resolved) parameters, exactly
+  as in the deterministic forecast. Sampled parameters are the values the
+  plant will actually run at in the forecast years, so a sampled OEE below
+  nominal needs proportionally more production area. (Re-calibrating per
+  sample would cancel the parameter out of production and inventory area.)
+  /area-forecast does re-calibrate on its parameters, so only the
+  total_plant_area and sales samples have a deterministic counterpart there;
+  results are labelled calibration="nominal".
+- Each uncertain parameter must stay inside its domain (PARAM_DOMAINS):
+  a distribution whose support reaches outside it, such as a normal OEE
+  without "min"/"max", is rejected rather than producing infinite or
+  negative areas.
+- Sales: each sample draws one growth deviation per forecast year from the
+  sales-growth distribution; deviations compound along the horizon
+  (sales_t = plan_t * prod(1 + g_1..g_t)).
+
+Samples are generated and evaluated in chunks so memory stays bounded
+regardless of the sample count. When everything fits in one chunk the
+percentiles are exact; otherwise they are read from fixed-count histograms
+whose range is set from the first chunk and doubled (merging neighbouring
+bins) whenever a later sample falls outside it, so no sample is clipped;
+the final bin width is reported.
+"""
+
+import numpy as np
+
+from forecast import (
+    OUTPUT_CATEGORIES,
+    PLANT_DATA,
+    forecast_area_arrays,
+    get_calibration,
+    prepare_plant_inputs,
+    resolve_operational_params,
+    select_forecast_years,
+)
+from sweep import SWEEPABLE_PARAMS
+
+MAX_SAMPLES = 1_000_000
+DEFAULT_CHUNK_SIZE = 50_000
+HISTOGRAM_BINS = 4096  # even, so neighbouring bins can be merged
+
+# Valid values of each uncertain parameter: (lower bound, lower bound
+# allowed, upper bound allowed or inf)
+PARAM_DOMAINS = {
+    "cycle_time_hours": (0.0, False, np.inf),
+    "base_oee": (0.0, False, 1.0),
+    "working_hours_year": (0.0, False, 8760.0),
+    "machine_size_m2": (0.0, False, np.inf),
+    "safety_buffer": (0.0, True, np.inf),
+    "warehouse_capacity_units_m2": (0.0, False, np.inf),
+    "total_plant_area": (0.0, False, np.inf),
+}
+
+CALIBRATION_NOTE = (
+    "Calibration is fitted once at the base parameters; sampled parameters act on "
+    "the forecast side only. /area-forecast recalibrates on its parameters, which "
+    "cancels every parameter except total_plant_area out of the forecast areas."
+)
+
+
+# =========================================================
+# DISTRIBUTIONS
+# =========================================================
+
+def sample_distribution(spec, rng, size):
+    """
+    Draw samples from a distribution spec.
+
+    Supported specs (optional "min"/"max" clip any of them):
+        {"dist": "fixed", "value": v}
+        {"dist": "uniform", "low": a, "high": b}
+        {"dist": "triangular", "low": a, "mode": m, "high": b}
+        {"dist": "normal", "mean": mu, "std": sigma}
+        {"dist": "lognormal", "mean": mu, "sigma": s}   (parameters of log(x))
+    """
+    dist = spec.get("dist")
+    try:
+        if dist == "fixed":
+            values = np.full(size, float(spec["value"]))
+        elif dist == "uniform":
+            values = rng.uniform(spec["low"], spec["high"], size)
+        elif dist == "triangular":
+            values = rng.triangular(spec["low"], spec["mode"], spec["high"], size)
+        elif dist == "normal":
+            values = rng.normal(spec["mean"], spec["std"], size)
+        elif dist == "lognormal":
+            values = rng.lognormal(spec["mean"], spec["sigma"], size)
+        else:
+            raise ValueError(f"Unknown distribution '{dist}'")
+    except KeyError as e:
+        raise ValueError(f"Distribution '{dist}' is missing parameter {e}")
+
+    if "min" in spec or "max" in spec:
+        values = np.clip(values, spec.get("min", -np.inf), spec.get("max", np.inf))
+    return values
+
+
+def distribution_support(spec):
+    """
+    Range of values a distribution spec can produce, after "min"/"max".
+
+    Returns:
+        (low, high, low_open): low_open is True when `low` itself is never
+        drawn (lognormal's 0).
+    """
+    dist = spec.get("dist")
+    try:
+        if dist == "fixed":
+            low = high = float(spec["value"])
+            low_open = False
+        elif dist in ("uniform", "triangular"):
+            low, high, low_open = float(spec["low"]), float(spec["high"]), False
+        elif dist == "normal":
+            low, high, low_open = -np.inf, np.inf, False
+        elif dist == "lognormal":
+            low, high, low_open = 0.0, np.inf, True
+        else:
+            raise ValueError(f"Unknown distribution '{dist}'")
+    except KeyError as e:
+        raise ValueError(f"Distribution '{dist}' is missing parameter {e}")
+
+    if "min" in spec and float(spec["min"]) >= low:
+        low, low_open = float(spec["min"]), False
+    if "max" in spec:
+        high = min(high, float(spec["max"]))
+    return low, high, low_open
+
+
+def _check_domain(name, spec):
+    lower, lower_allowed, upper = PARAM_DOMAINS[name]
+    low, high, low_open = distribution_support(spec)
+    below = low < lower or (low == lower and not lower_allowed and not low_open)
+    if below or high > upper:
+        bound = ">=" if lower_allowed else ">"
+        limit = f" and <= {upper:g}" if np.isfinite(upper) else ""
+        raise ValueError(
+            f"Distribution of '{name}' can produce values outside its domain ({bound} {lower:g}{limit}); "
+            "narrow it or bound it with 'min'/'max'"
+        )
+
+
+def validate_distributions(param_distributions, sales_growth):
+    unknown = [name for name in param_distributions if name not in SWEEPABLE_PARAMS]
+    if unknown:
+        raise ValueError(f"Unknown uncertain parameter(s): {', '.join(unknown)}")
+    for name, spec in param_distributions.items():
+        _check_domain(name, spec)
+    # Sample once from a throwaway generator so bad specs fail fast
+    rng = np.random.default_rng(0)
+    for spec in list(param_distributions.values()) + ([sales_growth] if sales_growth else []):
+        sample_distribution(spec, rng, 1)
+
+
+# =========================================================
+# PERCENTILE ACCUMULATION
+# =========================================================
+
+class _HistogramBands:
+    """
+    Fixed-count histograms for every (category, year) column.
+
+    A column's range doubles, towards the side a new sample fell outside,
+    until the sample fits; adjacent bins are merged so earlier counts are
+    kept exactly.
+    """
+
+    def __init__(self, first_chunk, bins=HISTOGRAM_BINS):
+        self.bins = bins
+        self.lo, self.width, self.counts = {}, {}, {}
+        self.sums, self.minimum, self.maximum = {}, {}, {}
+        for category, values in first_chunk.items():
+            lo, hi = values.min(axis=0), values.max(axis=0)
+            span = np.maximum(hi - lo, np.maximum(np.abs(hi), 1.0) * 1e-6)
+            self.lo[category] = lo - 0.5 * span
+            self.width[category] = 2.0 * span / bins
+            self.counts[category] = np.zeros((values.shape[1], bins), dtype=np.int64)
+            self.sums[category] = np.zeros(values.shape[1])
+            self.minimum[category] = np.full(values.shape[1], np.inf)
+            self.maximum[category] = np.full(values.shape[1], -np.inf)
+        self.add(first_chunk)
+
+    def _widen(self, category, low, high):
+        """Double the range of columns until it covers [low, high]."""
+        half = self.bins // 2
+        lo, width, counts = self.lo[category], self.width[category], self.counts[category]
+        # Validated parameter domains keep samples finite; should one still
+        # be inf or nan it is ignored here rather than widening forever
+        low = np.where(np.isfinite(low), low, lo)
+        high = np.where(np.isfinite(high), high, lo)
+        while True:
+            below = low < lo
+            above = high >= lo + width * self.bins
+            grow = below | above
+            if not grow.any():
+                break
+            merged = counts[grow].reshape(-1, half, 2).sum(axis=2)
+            widened = np.zeros((len(merged), self.bins), dtype=np.int64)
+            downwards = below[grow]
+            widened[~downwards, :half] = merged[~downwards]
+            widened[downwards, half:] = merged[downwards]
+            counts[grow] = widened
+            lo = np.where(below, lo - width * self.bins, lo)
+            width = np.where(grow, width * 2, width)
+        self.lo[category], self.width[category] = lo, width
+
+    def add(self, chunk):
+        for category, values in chunk.items():
+            years = values.shape[1]
+            low, high = values.min(axis=0), values.max(axis=0)
+            self._widen(category, low, high)
+            idx = np.floor((values - self.lo[category]) / self.width[category]).astype(np.int64)
+            np.clip(idx, 0, self.bins - 1, out=idx)
+            flat = (idx + np.arange(years) * self.bins).ravel()
+            self.counts[category] += np.bincount(flat, minlength=years * self.bins).reshape(years, self.bins)
+            self.sums[category] += values.sum(axis=0)
+            self.minimum[category] = np.minimum(self.minimum[category], low)
+            self.maximum[category] = np.maximum(self.maximum[category], high)
+
+    def percentile(self, category, q):
+        counts = self.counts[category]
+        total = counts.sum(axis=1, keepdims=True)
+        cumulative = np.cumsum(counts, axis=1)
+        target = q / 100.0 * total
+        bin_idx = np.array([np.searchsorted(row, t) for row, t in zip(cumulative, target[:, 0])])
+        below = np.where(bin_idx > 0, cumulative[np.arange(len(bin_idx)), bin_idx - 1], 0)
+        inside = counts[np.arange(len(bin_idx)), bin_idx]
+        fraction = np.where(inside > 0, (target[:, 0] - below) / np.maximum(inside, 1), 0.5)
+        value = self.lo[category] + (bin_idx + fraction) * self.width[category]
+        return np.clip(value, self.minimum[category], self.maximum[category])
+
+    def mean(self, category, n):
+        return self.sums[category] / n
+
+
+# =========================================================
+# MONTE CARLO FORECAST
+# =========================================================
+
+def run_monte_carlo_forecast(
+    plant_name,
+    param_distributions=None,
+    sales_growth=None,
+    n_samples=100_000,
+    seed=None,
+    percentiles=(10, 50, 90),
+    base_params=None,
+    start_year=None,
+    end_year=None,
+    chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """
+    Run a Monte Carlo forecast for a plant.
+
+    Args:
+        plant_name: Name of the plant (must exist in PLANT_DATA)
+        param_distributions: Optional dict of operational parameter ->
+                             distribution spec (see sample_distribution)
+        sales_growth: Optional distribution spec of the yearly sales growth
+                      deviation (e.g. {"dist": "normal", "mean": 0, "std": 0.05})
+        n_samples: Number of samples (max 1,000,000)
+        seed: Optional RNG seed; the same seed reproduces the same bands
+        percentiles: Percentiles to report
+        base_params: Optional nominal operational parameters
+        start_year: Optional start year for forecast period (inclusive)
+        end_year: Optional end year for forecast period (inclusive)
+        chunk_size: Samples evaluated per chunk (bounds memory)
+
+    Returns:
+        Dictionary with FY, per-category percentile bands and mean, the
+        per-FY probability that the 8% vacant-area floor is engaged and the
+        calibration mode ("nominal", see CALIBRATION_NOTE).
+    """
+    if plant_name not in PLANT_DATA:
+        raise ValueError(f"Plant '{plant_name}' not found in plant_data")
+    if not 1 <= n_samples <= MAX_SAMPLES:
+        raise ValueError(f"n_samples must be between 1 and {MAX_SAMPLES}")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if any(not 0 <= q <= 100 for q in percentiles):
+        raise ValueError("percentiles must be between 0 and 100")
+
+    param_distributions = param_distributions or {}
+    validate_distributions(param_distributions, sales_growth)
+
+    plant = PLANT_DATA[plant_name]
+    nominal = resolve_operational_params(plant.defaults, base_params)
+    inputs = prepare_plant_inputs(plant)
+    calibration = get_calibration(inputs, nominal)
+
+    future = select_forecast_years(inputs["sales_fy"], inputs["hist_fy"], start_year, end_year)
+    fy = inputs["sales_fy"][future]
+    plan_sales = inputs["sales_units"][future]
+    years = len(fy)
+
+    rng = np.random.default_rng(seed)
+    exact = n_samples <= chunk_size
+    collected = {c: [] for c in OUTPUT_CATEGORIES}
+    bands = None
+    floor_hits = np.zeros(years, dtype=np.int64)
+
+    done = 0
+    while done < n_samples:
+        n = min(chunk_size, n_samples - done)
+
+        d = dict(nominal)
+        for name, spec in param_distributions.items():
+            d[name] = sample_distribution(spec, rng, n)[:, None]
+
+        if sales_growth:
+            growth = sample_distribution(sales_growth, rng, (n, years))
+            sales = plan_sales * np.cumprod(1.0 + growth, axis=1)
+        else:
+            sales = np.broadcast_to(plan_sales, (n, years))
+
+        areas = forecast_area_arrays(sales, d, calibration)
+        chunk = {c: np.broadcast_to(areas[c], (n, years)) for c in OUTPUT_CATEGORIES}
+        total_plant_area = np.broadcast_to(d["total_plant_area"], (n, 1))
+        allocated = chunk["total_area"] - chunk["vacant_area"]
+        floor_hits += (total_plant_area - allocated < total_plant_area * 0.08).sum(axis=0)
+
+        if exact:
+            for c in OUTPUT_CATEGORIES:
+                collected[c].append(chunk[c])
+        elif bands is None:
+            bands = _HistogramBands(chunk)
+        else:
+            bands.add(chunk)
+        done += n
+
+    result_bands = {}
+    for c in OUTPUT_CATEGORIES:
+        if exact:
+            values = np.concatenate(collected[c], axis=0)
+            stats = {f"p{q:g}": np.percentile(values, q, axis=0) for q in percentiles}
+            stats["mean"] = values.mean(axis=0)
+        else:
+            stats = {f"p{q:g}": bands.percentile(c, q) for q in percentiles}
+            stats["mean"] = bands.mean(c, n_samples)
+        result_bands[f"{c}_m2"] = {k: np.rint(v).astype(np.int64).tolist() for k, v in stats.items()}
+
+    return {
+        "plant": plant_name,
+        "n_samples": n_samples,
+        "seed": seed,
+        "FY": fy.astype(np.int64).tolist(),
+        "method": "exact" if exact else "histogram",
+        "resolution_m2": None if exact else {
+            f"{c}_m2": float(np.max(bands.width[c])) for c in OUTPUT_CATEGORIES
+        },
+        "bands": result_bands,
+        "vacant_floor_probability": np.round(floor_hits / n_samples, 4).tolist(),
+        "calibration": "nominal",
+        "calibration_note": CALIBRATION_NOTE,
+    }
@@ -0,0 +1,182 @@
+"""
+network_calibration.py
+
+Calibration of many plants in one vectorized pass.
+
+The histories of all plants are stacked into (plants, years) matrices,
+padded with NaN after each plant's last year, and each plant's operational
+parameters become a (plants, 1) column. A single calibrate_from_history
+call then fits every plant; with the "mean" estimator the factors equal
+the per-plant engine calibration exactly. Plants lacking a policy column
+fall back to the engine's default ratio, as they do when run alone.
+
+Every plant also gets a fit-quality report: the relative RMSE of its
+yearly productivity factor, inventory days and passage ratio around the
+estimate (around the fitted line for "trend"), plus flags for short or
+unstable histories.
+"""
+
+import numpy as np
+
+from calibration import CALIBRATION_PARAMS, nanmean, trend_fit, validate_estimator
+from forecast import (
+    DEFAULT_POLICY_RATIOS,
+    calibrate_from_history,
+    calibration_summary,
+    resolve_operational_params,
+)
+from plant_data import PLANT_DATA
+from portfolio import resolve_plant_names
+
+# Policy ratio -> historical column it is measured from
+POLICY_COLUMNS = {
+    "people_gathering_ratio": "people_area",
+    "admin_area_ratio": "admin_area",
+    "external_wh_ratio": "external_wh_area",
+    "customer_wh_ratio": "customer_wh_area",
+}
+
+# Yearly factors the quality report covers
+QUALITY_FACTORS = {
+    "productivity_factor": "yearly_productivity_factor",
+    "inventory_days": "yearly_inventory_days",
+    "passage_ratio": "yearly_passage_ratio",
+}
+
+MIN_YEARS = 2
+UNSTABLE_REL_RMSE = 0.25
+
+
+def stack_histories(records):
+    """
+    Pad the histories of several plants into (P, H) arrays.
+
+    Args:
+        records: PlantRecords
+
+    Returns:
+        (hist_sales, historical, present): sales and each historical column
+        as (P, H) float arrays padded with NaN, and per column a (P,) mask
+        of the plants that have it.
+    """
+    lengths = np.array([len(record.hist_fy) for record in records], dtype=np.int64)
+    width = int(lengths.max()) if len(records) else 0
+    rows = np.repeat(np.arange(len(records)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    cols = np.arange(int(lengths.sum())) - np.repeat(offsets, lengths)
+
+    def stack(arrays):
+        matrix = np.full((len(records), width), np.nan)
+        if len(rows):
+            matrix[rows, cols] = np.concatenate(arrays)
+        return matrix
+
+    columns = list(dict.fromkeys(col for record in records for col in record.historical))
+    historical, present = {}, {}
+    for col in columns:
+        present[col] = np.array([col in record.historical for record in records])
+        historical[col] = stack([
+            record.historical[col] if col in record.historical else np.full(len(record.hist_fy), np.nan)
+            for record in records
+        ])
+    hist_sales = stack([record.hist_sales for record in records])
+    return hist_sales, historical, present
+
+
+def fit_quality(calibration, fy, estimator):
+    """
+    Relative RMSE of each yearly factor around its estimate.
+
+    Returns:
+        Dict of factor -> (P,) array (NaN where it is undefined).
+    """
+    quality = {}
+    for factor, yearly_key in QUALITY_FACTORS.items():
+        yearly = calibration[yearly_key]
+        if estimator == "trend":
+            level, slope, last = trend_fit(yearly, fy)
+            fitted = level[:, None] + slope[:, None] * (fy - last[:, None])
+        else:
+            fitted = np.asarray(calibration[factor])[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            quality[factor] = np.sqrt(nanmean((yearly - fitted) ** 2)) / np.abs(calibration[factor])
+    return quality
+
+
+def calibrate_plants(plant_names=None, estimator="mean", operational_params=None):
+    """
+    Calibrate a set of plants (default: all) at once.
+
+    Args:
+        plant_names: Optional list of plants; None calibrates every plant
+        estimator: One of calibration.ESTIMATORS
+        operational_params: Optional dict of plant name -> parameter overrides
+
+    Returns:
+        - estimator: the estimator used
+        - plants: per plant 'calibration' and 'policy_params' (rounded as
+          in forecast results), 'years' of usable history and 'quality'
+          (rel_rmse per factor, max_rel_rmse, flags)
+        - errors: plant name -> reason it could not be calibrated
+    """
+    validate_estimator(estimator)
+    names = resolve_plant_names(plant_names)
+    operational_params = operational_params or {}
+
+    records, errors = [], {}
+    for name in names:
+        record = PLANT_DATA[name]
+        if len(record.hist_fy) == 0:
+            errors[name] = "No historical area data to calibrate from"
+        elif np.isnan(record.hist_sales).any():
+            errors[name] = "Missing sales data for historical years"
+        else:
+            records.append(record)
+    if not records:
+        return {"estimator": estimator, "plants": [], "errors": errors}
+
+    hist_sales, historical, present = stack_histories(records)
+    params = [resolve_operational_params(record.defaults, operational_params.get(record.name)) for record in records]
+    d = {
+        key: np.array([p[key] for p in params], dtype=float)[:, None]
+        for key in CALIBRATION_PARAMS
+    }
+
+    # One pass over every plant and year
+    calibration = calibrate_from_history(hist_sales, historical, d, estimator)
+    for ratio, column in POLICY_COLUMNS.items():
+        if column in present:
+            calibration[ratio] = np.where(present[column], calibration[ratio], DEFAULT_POLICY_RATIOS[ratio])
+        else:
+            calibration[ratio] = np.full(len(records), DEFAULT_POLICY_RATIOS[ratio])
+
+    fy = historical["FY"]
+    quality = fit_quality(calibration, fy, estimator)
+    years = (~np.isnan(calibration["yearly_productivity_factor"])).sum(axis=-1)
+    worst = np.max(np.vstack([np.nan_to_num(q, nan=np.inf) for q in quality.values()]), axis=0)
+
+    plants = []
+    for i, record in enumerate(records):
+        flags = []
+        if years[i] < MIN_YEARS:
+            flags.append("short_history")
+        if worst[i] > UNSTABLE_REL_RMSE:
+            flags.append("unstable")
+        plants.append({
+            "plant": record.name,
+            "years": int(years[i]),
+            **calibration_summary({
+                key: calibration[key][i]
+                for key in ("productivity_factor", "inventory_days", "passage_ratio", *POLICY_COLUMNS)
+            }),
+            "quality": {
+                "rel_rmse": {
+                    factor: None if not np.isfinite(q[i]) else float(round(q[i], 4))
+                    for factor, q in quality.items()
+                },
+                "max_rel_rmse": None if not np.isfinite(worst[i]) else float(round(worst[i], 4)),
+                "flags": flags,
+            },
+        })
+
+    return {"estimator": estimator, "plants": plants, "errors": errors}
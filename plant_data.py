@@ -8,9 +8,15 @@ Future Years: FY2026 onwards
 NOTE:
 - Any borrowed / assumed industrial parameters are marked clearly.
 - Replace them with real plant values when available.
+- PLANT_DATA is a PlantRepository (see plant_repository.py): a read-only
+  mapping of plant name -> PlantRecord, built lazily on first access.
+- Set AREA_FORECAST_PLANT_DIR to load plants from a directory of
+  CSV/Arrow/Parquet files instead of the registry below.
 """
 
-import pandas as pd
+import os
+
+from plant_repository import DirectoryPlantRepository, InMemoryPlantRepository
 
 # =========================================================
 # COMMON INDUSTRIAL DEFAULTS (TEMPORARY / REPLACE LATER)
@@ -24,7 +30,7 @@ INDUSTRIAL_DEFAULTS = {
 # PLANT DATA REGISTRY
 # =========================================================
 
-PLANT_DATA = {
+_RAW_PLANT_DATA = {
 
 # =========================================================
 # DNHA_M
@@ -38,16 +44,16 @@ PLANT_DATA = {
         "total_plant_area": 27900       # approx from SUM area
     },
 
-    "sales_df": pd.DataFrame({
+    "sales": {
         "FY": list(range(2024, 2036)),
         "sales_units": [
             13000000, 14000000, 14400000, 15200000, 16000000,
             17000000, 21000000, 22000000, 22000000, 22000000,
             24000000, 24000000
         ]
-    }),
+    },
 
-    "historical_area_df": pd.DataFrame({
+    "historical_area": {
         "FY": [2024, 2025],
         "production_area": [11763, 9858],
         "vacant_area": [2425, 6770],
@@ -58,7 +64,7 @@ PLANT_DATA = {
         "external_wh_area": [4093, 4100],
         "customer_wh_area": [10935, 10535],
         "total_area": [27947, 23609]
-    })
+    }
 },
 
 # =========================================================
@@ -74,7 +80,7 @@ PLANT_DATA = {
     },
 
     # Sales aggregated from Elfie + Thermal
-    "sales_df": pd.DataFrame({
+    "sales": {
         "FY": list(range(2024, 2036)),
         "sales_units": [
             1000000,        # FY24
@@ -90,9 +96,9 @@ PLANT_DATA = {
             8200000,        # FY34
             8400000         # FY35
         ]
-    }),
+    },
 
-    "historical_area_df": pd.DataFrame({
+    "historical_area": {
         "FY": [2024, 2025],
         "production_area": [5281, 5836],
         "vacant_area": [2458, 2497],
@@ -103,7 +109,7 @@ PLANT_DATA = {
         "external_wh_area": [1500, 1500],
         "customer_wh_area": [1800, 2000],
         "total_area": [15350, 15312]
-    })
+    }
 },
 
 # =========================================================
@@ -118,16 +124,16 @@ PLANT_DATA = {
         "total_plant_area": 29090
     },
 
-    "sales_df": pd.DataFrame({
+    "sales": {
         "FY": list(range(2024, 2036)),
         "sales_units": [
             12666667, 12666667, 12666667, 12666667,
             13366667, 14691667, 14881667, 14666667,
             14666667, 14666667, 14666667, 14666667
         ]
-    }),
+    },
 
-    "historical_area_df": pd.DataFrame({
+    "historical_area": {
         "FY": [2024, 2025],
         "production_area": [8655, 9339],
         "vacant_area": [862, 2304],
@@ -138,7 +144,7 @@ PLANT_DATA = {
         "external_wh_area": [0, 0],
         "customer_wh_area": [875, 875],
         "total_area": [27579, 27517]
-    })
+    }
 },
 
 # =========================================================
@@ -153,15 +159,15 @@ PLANT_DATA = {
         "total_plant_area": 32523
     },
 
-    "sales_df": pd.DataFrame({
+    "sales": {
         "FY": list(range(2024, 2036)),
         "sales_units": [
             2273809, 1940476, 2023809, 2136905, 2251451,
             2370000, 2500000, 2650000, 2800000, 2950000, 3100000, 3250000
         ]
-    }),
+    },
 
-    "historical_area_df": pd.DataFrame({
+    "historical_area": {
         "FY": [2024, 2025],
         "production_area": [6416, 5991],
         "vacant_area": [860, 1691],
@@ -172,7 +178,12 @@ PLANT_DATA = {
         "external_wh_area": [17222, 15165],
         "customer_wh_area": [1838, 2629],
         "total_area": [32656, 29769]
-    })
+    }
 }
 
 }
+
+if os.environ.get("AREA_FORECAST_PLANT_DIR"):
+    PLANT_DATA = DirectoryPlantRepository(os.environ["AREA_FORECAST_PLANT_DIR"])
+else:
+    PLANT_DATA = InMemoryPlantRepository(_RAW_PLANT_DATA)
@@ -0,0 +1,140 @@
+"""
+plant_records.py
+
+Immutable, array-backed plant records.
+
+A PlantRecord holds a plant's defaults, sales and historical areas as
+read-only NumPy arrays. Nothing can mutate a record in place, so the
+forecast consumes them directly instead of deep-copying DataFrames on every
+request. The sales-to-history join and the content hash used by the
+calibration cache are computed once, when the record is built.
+"""
+
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import numpy as np
+
+from calibration import hash_arrays
+
+REQUIRED_HISTORICAL_COLUMNS = ("FY", "production_area", "inventory_area", "passage_area")
+
+
+@dataclass(frozen=True, slots=True)
+class PlantRecord:
+    name: str
+    defaults: MappingProxyType
+    sales_fy: np.ndarray
+    sales_units: np.ndarray
+    historical: MappingProxyType    # column -> array, includes "FY"
+    hist_sales: np.ndarray          # sales joined onto historical years (NaN if missing)
+    data_hash: str                  # content hash of the calibration inputs
+    version: str                    # content hash of all plant data (defaults, sales, history)
+
+    @property
+    def hist_fy(self):
+        return self.historical["FY"]
+
+    def sales_frame(self):
+        """Sales as a new pandas DataFrame (FY, sales_units)."""
+        import pandas as pd
+        return pd.DataFrame({"FY": self.sales_fy, "sales_units": self.sales_units})
+
+    def historical_frame(self):
+        """Historical areas as a new pandas DataFrame."""
+        import pandas as pd
+        return pd.DataFrame(dict(self.historical))
+
+
+def lookup_sales(fy, sales_fy, sales_units):
+    """
+    Left-join sales onto the given years.
+
+    Returns a float array aligned with ``fy``; years without sales are NaN.
+    """
+    fy = np.asarray(fy)
+    sales_fy = np.asarray(sales_fy)
+    sales_units = np.asarray(sales_units, dtype=float)
+
+    result = np.full(fy.shape, np.nan)
+    if len(sales_fy) == 0:
+        return result
+
+    order = np.argsort(sales_fy, kind="stable")
+    sorted_fy = sales_fy[order]
+    pos = np.clip(np.searchsorted(sorted_fy, fy), 0, len(sorted_fy) - 1)
+    found = sorted_fy[pos] == fy
+    result[found] = sales_units[order[pos[found]]]
+    return result
+
+
+def historical_data_hash(hist_fy, hist_sales, historical):
+    """Content hash of everything calibration reads."""
+    return hash_arrays(
+        [("FY", hist_fy), ("sales_units", hist_sales), *historical.items()]
+    )
+
+
+def build_plant_record(name, defaults, sales, historical_area):
+    """
+    Build a PlantRecord from plain column mappings.
+
+    Args:
+        name: Plant name
+        defaults: Mapping of default operational parameters
+        sales: Mapping with 'FY' and 'sales_units' sequences
+        historical_area: Mapping of historical area columns (must include
+                         'FY', 'production_area', 'inventory_area',
+                         'passage_area')
+
+    Returns:
+        Frozen PlantRecord whose arrays are read-only.
+    """
+    missing = [c for c in REQUIRED_HISTORICAL_COLUMNS if c not in historical_area]
+    if missing:
+        raise ValueError(f"Plant '{name}' historical data is missing: {', '.join(missing)}")
+    if "FY" not in sales or "sales_units" not in sales:
+        raise ValueError(f"Plant '{name}' sales data needs 'FY' and 'sales_units'")
+
+    sales_fy = _readonly(sales["FY"], np.int64)
+    sales_units = _readonly(sales["sales_units"], float)
+    historical = {
+        col: _readonly(values, np.int64 if col == "FY" else float)
+        for col, values in historical_area.items()
+    }
+    hist_sales = lookup_sales(historical["FY"], sales_fy, sales_units)
+    hist_sales.setflags(write=False)
+
+    data_hash = historical_data_hash(historical["FY"], hist_sales, historical)
+    version = hash_arrays([
+        ("calibration", np.frombuffer(data_hash.encode(), dtype=np.uint8)),
+        ("defaults", np.frombuffer(json.dumps(dict(defaults), sort_keys=True).encode(), dtype=np.uint8)),
+        ("sales_FY", sales_fy),
+        ("sales_units", sales_units),
+    ])
+
+    return PlantRecord(
+        name=name,
+        defaults=MappingProxyType(dict(defaults)),
+        sales_fy=sales_fy,
+        sales_units=sales_units,
+        historical=MappingProxyType(historical),
+        hist_sales=hist_sales,
+        data_hash=data_hash,
+        version=version,
+    )
+
+
+def _readonly(values, dtype):
+    """
+    Read-only array of the given dtype.
+
+    Arrays that are already read-only with the right dtype (e.g. views of a
+    memory-mapped file) are used as-is; anything else is copied once.
+    """
+    if isinstance(values, np.ndarray) and values.dtype == dtype and not values.flags.writeable:
+        return values
+    values = np.array(values, dtype=dtype)
+    values.setflags(write=False)
+    return values
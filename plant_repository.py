@@ -0,0 +1,259 @@
+"""
+plant_repository.py
+
+Pluggable plant data stores behind plant_data.PLANT_DATA.
+
+A PlantRepository is a read-only Mapping of plant name -> PlantRecord.
+Records are built lazily on first access and cached. Two backends:
+
+- InMemoryPlantRepository: plain column mappings (the in-module registry)
+- DirectoryPlantRepository: one sub-directory per plant, laid out as
+
+      <root>/<PLANT>/defaults.json
+      <root>/<PLANT>/sales.{arrow,feather,parquet,csv}
+      <root>/<PLANT>/historical_area.{arrow,feather,parquet,csv}
+
+  Arrow IPC files are memory-mapped and Parquet is read with memory
+  mapping (both need the optional pyarrow package); CSV needs nothing
+  extra. Files are re-checked at most every `reload_interval` seconds and a
+  plant is rebuilt when any of its files changes, so new data goes live
+  without a restart.
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from abc import abstractmethod
+from collections.abc import Mapping
+
+import numpy as np
+
+from plant_records import build_plant_record
+
+# Preferred file formats, first match wins
+DATA_FILE_EXTENSIONS = (".arrow", ".feather", ".parquet", ".csv")
+
+
+class PlantRepository(Mapping):
+    """Read-only mapping of plant name -> PlantRecord with lazy loading."""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.RLock()
+
+    @abstractmethod
+    def names(self):
+        """Names of the plants available in this repository."""
+
+    @abstractmethod
+    def load(self, name):
+        """Build the PlantRecord for name (uncached)."""
+
+    def is_stale(self, name):
+        """True when the cached record for name must be rebuilt."""
+        return False
+
+    def version(self, name):
+        """Data version of a plant (content hash of all its data)."""
+        return self[name].version
+
+    def __getitem__(self, name):
+        if name not in self.names():
+            raise KeyError(name)
+        with self._lock:
+            record = self._records.get(name)
+            if record is None or self.is_stale(name):
+                record = self.load(name)
+                self._records[name] = record
+            return record
+
+    def __contains__(self, name):
+        return name in self.names()
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __len__(self):
+        return len(self.names())
+
+
+class InMemoryPlantRepository(PlantRepository):
+    """Plants defined as plain column mappings in Python."""
+
+    def __init__(self, raw_plants):
+        super().__init__()
+        self._raw = dict(raw_plants)
+
+    def names(self):
+        return list(self._raw)
+
+    def load(self, name):
+        return build_plant_record(name, **self._raw[name])
+
+
+class DirectoryPlantRepository(PlantRepository):
+    """Plants stored as files, one sub-directory per plant."""
+
+    def __init__(self, root, reload_interval=2.0):
+        super().__init__()
+        self.root = os.path.abspath(root)
+        self.reload_interval = reload_interval
+        self._names = []
+        self._names_checked = None
+        self._signatures = {}
+        self._checked_at = {}
+
+    def names(self):
+        now = time.monotonic()
+        if self._names_checked is None or now - self._names_checked >= self.reload_interval:
+            self._names = sorted(
+                entry.name for entry in os.scandir(self.root)
+                if entry.is_dir() and os.path.exists(os.path.join(entry.path, "defaults.json"))
+            )
+            self._names_checked = now
+        return self._names
+
+    def _plant_files(self, name):
+        plant_dir = os.path.join(self.root, name)
+        files = {"defaults": os.path.join(plant_dir, "defaults.json")}
+        for stem in ("sales", "historical_area"):
+            for ext in DATA_FILE_EXTENSIONS:
+                path = os.path.join(plant_dir, stem + ext)
+                if os.path.exists(path):
+                    files[stem] = path
+                    break
+            else:
+                raise ValueError(f"Plant '{name}' has no {stem} file in {plant_dir}")
+        return files
+
+    def _signature(self, files):
+        signature = []
+        for path in sorted(files.values()):
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def is_stale(self, name):
+        now = time.monotonic()
+        if now - self._checked_at.get(name, 0.0) < self.reload_interval:
+            return False
+        self._checked_at[name] = now
+        try:
+            signature = self._signature(self._plant_files(name))
+        except (OSError, ValueError):
+            return True
+        return signature != self._signatures.get(name)
+
+    def load(self, name):
+        files = self._plant_files(name)
+        signature = self._signature(files)
+        with open(files["defaults"]) as f:
+            defaults = json.load(f)
+        record = build_plant_record(
+            name,
+            defaults=defaults,
+            sales=read_columns(files["sales"]),
+            historical_area=read_columns(files["historical_area"]),
+        )
+        self._signatures[name] = signature
+        self._checked_at[name] = time.monotonic()
+        return record
+
+
+# =========================================================
+# FILE READERS / WRITERS
+# =========================================================
+
+def read_columns(path):
+    """Read a columnar data file into an ordered dict of column -> array."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return _read_csv(path)
+    if ext in (".arrow", ".feather", ".parquet"):
+        return _read_arrow(path, ext)
+    raise ValueError(f"Unsupported plant data file: {path}")
+
+
+def _read_csv(path):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        rows = [row for row in reader if row]
+    return {
+        col: np.array(
+            [float(row[i]) if row[i].strip() else np.nan for row in rows],
+            dtype=float,
+        )
+        for i, col in enumerate(header)
+    }
+
+
+def _read_arrow(path, ext):
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(f"pyarrow is required to read {path}") from e
+
+    if ext == ".parquet":
+        table = pyarrow.parquet.read_table(path, memory_map=True)
+    else:
+        table = pyarrow.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+    # Single-chunk, null-free numeric columns come back as read-only views
+    # of the mapped file, which build_plant_record keeps without copying.
+    return {
+        name: table.column(name).to_numpy()
+        for name in table.column_names
+    }
+
+
+def write_plant_directory(repository, root, fmt="csv"):
+    """
+    Export every plant of a repository into the directory layout.
+
+    Args:
+        repository: Any PlantRepository (e.g. the in-module registry)
+        root: Target directory
+        fmt: "csv", "arrow" or "parquet"
+    """
+    for name in repository:
+        record = repository[name]
+        plant_dir = os.path.join(root, name)
+        os.makedirs(plant_dir, exist_ok=True)
+        with open(os.path.join(plant_dir, "defaults.json"), "w") as f:
+            json.dump(dict(record.defaults), f, indent=2)
+        _write_columns(
+            os.path.join(plant_dir, "sales." + fmt),
+            {"FY": record.sales_fy, "sales_units": record.sales_units},
+        )
+        _write_columns(
+            os.path.join(plant_dir, "historical_area." + fmt),
+            dict(record.historical),
+        )
+
+
+def _write_columns(path, columns):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        names = list(columns)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            writer.writerows(zip(*(columns[n].tolist() for n in names)))
+        return
+
+    import pyarrow as pa
+    table = pa.table({name: np.asarray(values) for name, values in columns.items()})
+    if ext == ".parquet":
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(table, path)
+    elif ext == ".arrow":
+        import pyarrow.ipc
+        with pa.OSFile(path, "wb") as sink, pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unsupported plant data file: {path}")
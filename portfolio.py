@@ -0,0 +1,229 @@
+"""
+portfolio.py
+
+Multi-plant (portfolio) forecasts.
+
+Plants are forecast concurrently across worker processes and combined into
+network-level aggregates: total area by category per FY and the plants
+with the least headroom (total plant area minus allocated area).
+
+Worker processes come from one pool per process, created on first use and
+reused by later calls (backtest.py shares it). Small plant sets run inline:
+a pool round trip costs about as much as forecasting a couple of plants.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from forecast import ALLOCATED_CATEGORIES, OUTPUT_CATEGORIES, PLANT_DATA, run_forecast_for_plant
+
+
+def run_forecasts_for_plants(plant_names, operational_params=None, start_year=None, end_year=None,
+                             granularity="annual", extrapolate="none"):
+    """
+    Forecast a batch of plants sequentially in the current process.
+
+    Args:
+        plant_names: Plants to forecast
+        operational_params: Optional dict of plant name -> parameter overrides
+        start_year: Optional start year for forecast period (inclusive)
+        end_year: Optional end year for forecast period (inclusive)
+        granularity: Forecast periods (see horizon.py)
+        extrapolate: Sales extrapolation method (see horizon.py)
+
+    Returns:
+        Dictionary of plant name -> run_forecast_for_plant result.
+    """
+    operational_params = operational_params or {}
+    return {
+        name: run_forecast_for_plant(
+            name,
+            operational_params=operational_params.get(name),
+            start_year=start_year,
+            end_year=end_year,
+            granularity=granularity,
+            extrapolate=extrapolate
+        )
+        for name in plant_names
+    }
+
+
+def split_batches(items, count):
+    """Split items into at most `count` contiguous, near-equal batches."""
+    items = list(items)
+    count = max(1, min(count, len(items)))
+    size, extra = divmod(len(items), count)
+    batches, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        batches.append(items[start:end])
+        start = end
+    return [batch for batch in batches if batch]
+
+
+# =========================================================
+# SHARED WORKER POOL
+# =========================================================
+
+# Fewer plants than this are processed inline rather than in worker processes
+INLINE_PLANT_THRESHOLD = 16
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """The module-level worker pool (one worker per CPU), created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_plant_batches(fn, plant_names, max_workers=None, *args):
+    """
+    Run fn(batch, *args) over batches of plants and return the batch results.
+
+    Args:
+        fn: Picklable function taking a list of plant names first
+        plant_names: Plants to process
+        max_workers: Batches to split into (default: CPU count); 1 runs inline
+        *args: Further arguments of fn
+
+    Plant sets smaller than INLINE_PLANT_THRESHOLD run inline as one batch;
+    larger ones are split over the shared worker pool.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(plant_names) < INLINE_PLANT_THRESHOLD:
+        return [fn(plant_names, *args)]
+
+    pool = get_process_pool()
+    try:
+        futures = [pool.submit(fn, batch, *args) for batch in split_batches(plant_names, max_workers)]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool on the next call
+        _discard_pool(pool)
+        raise
+
+
+def resolve_plant_names(plant_names=None):
+    """Validate a plant subset; None means every plant in PLANT_DATA."""
+    if not plant_names:
+        return list(PLANT_DATA)
+    unknown = [name for name in plant_names if name not in PLANT_DATA]
+    if unknown:
+        raise ValueError(f"Plant(s) not found in plant_data: {', '.join(unknown)}")
+    return list(dict.fromkeys(plant_names))
+
+
+def aggregate_portfolio(results, top_n=5):
+    """
+    Network-level aggregates over per-plant forecast results.
+
+    Args:
+        results: Dictionary of plant name -> run_forecast_for_plant result
+        top_n: Number of least-headroom plants to report
+
+    Sub-annual results are totalled per period rather than per FY.
+
+    Returns:
+        - totals_by_fy: per FY (or period), summed area per category across plants
+        - headroom: per plant, headroom per FY and its minimum
+        - least_headroom: the top_n plants with the smallest minimum headroom
+    """
+    totals = {}
+    headroom = {}
+    for name, result in results.items():
+        total_plant_area = result["operational_params"]["total_plant_area"]
+        plant_headroom = []
+        for row in result["forecast"]:
+            period = {key: row[key] for key in ("FY", "period") if key in row}
+            fy_totals = totals.setdefault(row.get("period", row["FY"]), {
+                **period, "plant_count": 0, "sales_units": 0,
+                **{f"{c}_m2": 0 for c in OUTPUT_CATEGORIES},
+            })
+            fy_totals["plant_count"] += 1
+            fy_totals["sales_units"] += row["sales_units"]
+            for c in OUTPUT_CATEGORIES:
+                fy_totals[f"{c}_m2"] += row[f"{c}_m2"]
+
+            allocated = sum(row[f"{c}_m2"] for c in ALLOCATED_CATEGORIES)
+            plant_headroom.append({
+                **period,
+                "headroom_m2": int(round(total_plant_area - allocated)),
+            })
+
+        if plant_headroom:
+            tightest = min(plant_headroom, key=lambda h: h["headroom_m2"])
+            headroom[name] = {
+                "total_plant_area": total_plant_area,
+                "min_headroom_m2": tightest["headroom_m2"],
+                "min_headroom_FY": tightest["FY"],
+                **({"min_headroom_period": tightest["period"]} if "period" in tightest else {}),
+                "by_fy": plant_headroom,
+            }
+
+    least_headroom = sorted(
+        ({"plant": name, **{k: v for k, v in h.items() if k != "by_fy"}} for name, h in headroom.items()),
+        key=lambda h: h["min_headroom_m2"],
+    )[:top_n]
+
+    return {
+        "totals_by_fy": [totals[fy] for fy in sorted(totals)],
+        "headroom": headroom,
+        "least_headroom": least_headroom,
+    }
+
+
+def run_portfolio_forecast(
+    plant_names=None,
+    operational_params=None,
+    start_year=None,
+    end_year=None,
+    max_workers=None,
+    top_n=5,
+    granularity="annual",
+    extrapolate="none"
+):
+    """
+    Forecast a set of plants (default: all), in parallel worker processes
+    when there are at least INLINE_PLANT_THRESHOLD of them.
+
+    Args:
+        plant_names: Optional list of plants; None forecasts every plant
+        operational_params: Optional dict of plant name -> parameter overrides
+        start_year: Optional start year for forecast period (inclusive)
+        end_year: Optional end year for forecast period (inclusive)
+        max_workers: Parallel batches (default: CPU count); 1 runs inline
+        top_n: Number of least-headroom plants to report
+        granularity: Forecast periods (see horizon.py)
+        extrapolate: Sales extrapolation method (see horizon.py)
+
+    Returns:
+        Dictionary with per-plant 'results' and network 'aggregate'.
+    """
+    names = resolve_plant_names(plant_names)
+    results = {}
+    for batch_results in run_plant_batches(
+        run_forecasts_for_plants, names, max_workers,
+        operational_params, start_year, end_year, granularity, extrapolate
+    ):
+        results.update(batch_results)
+
+    return {
+        "plants": names,
+        "results": results,
+        "aggregate": aggregate_portfolio(results, top_n=top_n),
+    }
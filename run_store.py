@@ -0,0 +1,463 @@
+"""
+run_store.py
+
+Persistent store of forecast runs (SQLite).
+
+A saved run keeps its inputs (plant, operational parameters, period,
+granularity, extrapolation, dataset, calibration estimator), its calibration and its forecast
+rows, so earlier scenarios can be listed, reloaded and compared without
+recomputing them.
+
+Tables:
+    runs          one row per run: inputs, calibration and history JSON,
+                  the forecast's first/last FY and input_key (hash of the
+                  requested inputs and the plant data version), which finds
+                  an identical earlier run
+    run_params    one row per (run, effective operational parameter)
+    run_forecast  one row per (run, forecast period) with every category
+
+Indexes serve the list and load queries: runs by plant (newest first), by
+forecast FY range and by input_key, runs by parameter value, and forecast
+rows by run and FY.
+
+Configuration (environment variables):
+    AREA_FORECAST_RUN_DB   SQLite file (default data/runs.sqlite)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from forecast import OUTPUT_CATEGORIES
+
+DEFAULT_RUN_DB = os.environ.get(
+    "AREA_FORECAST_RUN_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "runs.sqlite"),
+)
+
+FORECAST_FIELDS = ("sales_units",) + tuple(f"{c}_m2" for c in OUTPUT_CATEGORIES)
+
+# Inputs compared by diff_runs besides parameters and calibration
+RUN_INPUTS = (
+    "plant", "start_year", "end_year", "granularity", "extrapolate", "estimator", "dataset_id",
+    "plant_version",
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    plant TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    start_year INTEGER,
+    end_year INTEGER,
+    granularity TEXT NOT NULL,
+    extrapolate TEXT NOT NULL,
+    estimator TEXT NOT NULL DEFAULT 'mean',
+    dataset_id TEXT,
+    plant_version TEXT,
+    input_key TEXT NOT NULL,
+    first_fy INTEGER,
+    last_fy INTEGER,
+    operational_params TEXT NOT NULL,
+    calibration TEXT NOT NULL,
+    policy_params TEXT NOT NULL,
+    history TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_plant ON runs (plant, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_fy ON runs (first_fy, last_fy);
+CREATE INDEX IF NOT EXISTS idx_runs_input_key ON runs (input_key);
+
+CREATE TABLE IF NOT EXISTS run_params (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_run_params_value ON run_params (name, value, run_id);
+
+CREATE TABLE IF NOT EXISTS run_forecast (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    FY INTEGER NOT NULL,
+    period TEXT,
+    {", ".join(f"{field} INTEGER NOT NULL" for field in FORECAST_FIELDS)},
+    PRIMARY KEY (run_id, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_run_forecast_fy ON run_forecast (run_id, FY);
+"""
+
+RUN_COLUMNS = (
+    "id", "name", "plant", "created_at", "start_year", "end_year", "granularity",
+    "extrapolate", "estimator", "dataset_id", "plant_version", "first_fy", "last_fy",
+    "operational_params", "calibration", "policy_params",
+)
+
+
+# Columns added after the first release: name -> definition for ALTER TABLE
+MIGRATED_COLUMNS = {
+    "estimator": "TEXT NOT NULL DEFAULT 'mean'",
+}
+
+
+def run_input_key(plant_name, operational_params, start_year, end_year, granularity,
+                  extrapolate, dataset_id, plant_version, estimator="mean"):
+    """Hash of everything a run's result depends on."""
+    payload = json.dumps([
+        plant_name,
+        sorted((name, float(value)) for name, value in (operational_params or {}).items() if value is not None),
+        start_year,
+        end_year,
+        granularity,
+        extrapolate,
+        dataset_id,
+        plant_version,
+        estimator,
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RunStore:
+    """Forecast runs in one SQLite file; one connection per thread."""
+
+    def __init__(self, path=DEFAULT_RUN_DB):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+            self._local.conn = conn
+        return conn
+
+    # -----------------------------------------------------
+    # Writing
+    # -----------------------------------------------------
+
+    def record(self, result, inputs, input_key, name=None):
+        """
+        Save a forecast run.
+
+        Args:
+            result: run_forecast_for_plant result built with layout="columns"
+            inputs: Dict with the RUN_INPUTS values of the run
+            input_key: run_input_key of the request
+            name: Optional display name
+
+        Returns:
+            The new run's id.
+        """
+        forecast = result["forecast"]
+        fy = forecast["FY"].tolist()
+        rows = len(fy)
+        periods = forecast.get("period") or [None] * rows
+        history = {
+            "historical_debug": result["historical_debug"],
+            "historical_areas": result.get("historical_areas", []),
+        }
+
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO runs (name, plant, created_at, start_year, end_year, granularity,
+                                  extrapolate, estimator, dataset_id, plant_version, input_key,
+                                  first_fy, last_fy, operational_params, calibration,
+                                  policy_params, history)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    name, inputs["plant"], time.time(), inputs.get("start_year"),
+                    inputs.get("end_year"), inputs.get("granularity", "annual"),
+                    inputs.get("extrapolate", "none"), inputs.get("estimator", "mean"),
+                    inputs.get("dataset_id"),
+                    inputs.get("plant_version"), input_key,
+                    min(fy) if rows else None, max(fy) if rows else None,
+                    json.dumps(result["operational_params"]),
+                    json.dumps(result["calibration"]),
+                    json.dumps(result.get("policy_params", {})),
+                    json.dumps(history),
+                ),
+            )
+            run_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO run_params (run_id, name, value) VALUES (?, ?, ?)",
+                [
+                    (run_id, key, value)
+                    for key, value in result["operational_params"].items()
+                    if isinstance(value, (int, float))
+                ],
+            )
+            conn.executemany(
+                f"""
+                INSERT INTO run_forecast (run_id, row, FY, period, {", ".join(FORECAST_FIELDS)})
+                VALUES (?, ?, ?, ?, {", ".join("?" for _ in FORECAST_FIELDS)})
+                """,
+                zip(
+                    [run_id] * rows, range(rows), fy, periods,
+                    *(forecast[field].tolist() for field in FORECAST_FIELDS),
+                ),
+            )
+        return run_id
+
+    def delete(self, run_id):
+        """Delete a run; raises KeyError if it does not exist."""
+        conn = self._connection()
+        with conn:
+            if conn.execute("DELETE FROM runs WHERE id = ?", (run_id,)).rowcount == 0:
+                raise KeyError(run_id)
+
+    # -----------------------------------------------------
+    # Queries
+    # -----------------------------------------------------
+
+    def summary(self, run_id):
+        """Summary of one run; raises KeyError if it does not exist."""
+        row = self._connection().execute(
+            f"SELECT {', '.join(RUN_COLUMNS)} FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(run_id)
+        return _summary(row)
+
+    def ids(self):
+        """Ids of every stored run, ascending."""
+        return [row[0] for row in self._connection().execute("SELECT id FROM runs ORDER BY id")]
+
+    def find(self, input_key):
+        """Summary of the newest run with these inputs, or None."""
+        row = self._connection().execute(
+            f"SELECT {', '.join(RUN_COLUMNS)} FROM runs WHERE input_key = ? ORDER BY id DESC LIMIT 1",
+            (input_key,),
+        ).fetchone()
+        return _summary(row) if row is not None else None
+
+    def list(self, plant=None, fy_from=None, fy_to=None, params=None, limit=50, offset=0):
+        """
+        Run summaries, newest first.
+
+        Args:
+            plant: Optional plant name
+            fy_from / fy_to: Optional FY range the forecast must overlap
+            params: Optional list of (name, min, max) effective-parameter
+                    filters; min/max may be None for an open bound
+            limit / offset: Paging
+
+        Returns:
+            Dict with the matching 'total' and this page's 'runs'.
+        """
+        where, args = [], []
+        if plant is not None:
+            where.append("plant = ?")
+            args.append(plant)
+        if fy_from is not None:
+            where.append("last_fy >= ?")
+            args.append(fy_from)
+        if fy_to is not None:
+            where.append("first_fy <= ?")
+            args.append(fy_to)
+        for name, low, high in params or ():
+            condition = "name = ?"
+            values = [name]
+            if low is not None:
+                condition += " AND value >= ?"
+                values.append(low)
+            if high is not None:
+                condition += " AND value <= ?"
+                values.append(high)
+            where.append(f"id IN (SELECT run_id FROM run_params WHERE {condition})")
+            args.extend(values)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+        conn = self._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM runs {clause}", args).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(RUN_COLUMNS)} FROM runs {clause} "
+            "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            args + [limit, offset],
+        ).fetchall()
+        return {"total": total, "runs": [_summary(row) for row in rows]}
+
+    def get(self, run_id, fy_from=None, fy_to=None):
+        """
+        A stored run in the /area-forecast result shape plus its summary.
+
+        Raises KeyError if the run does not exist.
+        """
+        conn = self._connection()
+        row = conn.execute(
+            f"SELECT {', '.join(RUN_COLUMNS)}, history FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(run_id)
+
+        where, args = "run_id = ?", [run_id]
+        if fy_from is not None:
+            where += " AND FY >= ?"
+            args.append(fy_from)
+        if fy_to is not None:
+            where += " AND FY <= ?"
+            args.append(fy_to)
+        forecast = [
+            _forecast_row(r)
+            for r in conn.execute(
+                f"SELECT FY, period, {', '.join(FORECAST_FIELDS)} FROM run_forecast "
+                f"WHERE {where} ORDER BY row",
+                args,
+            )
+        ]
+
+        summary = _summary(row)
+        history = json.loads(row["history"])
+        return {
+            "run": summary,
+            "plant": summary["plant"],
+            "operational_params": summary["operational_params"],
+            "calibration": summary["calibration"],
+            "policy_params": summary["policy_params"],
+            "forecast": forecast,
+            "historical_debug": history["historical_debug"],
+            "historical_areas": history["historical_areas"],
+        }
+
+    def diff(self, run_id, other_id):
+        """diff_runs of two stored runs (KeyError if either is missing)."""
+        return diff_runs(self.get(run_id), self.get(other_id))
+
+
+def _migrate(conn):
+    """Add MIGRATED_COLUMNS missing from a run store created by an older version."""
+    existing = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+    for column, definition in MIGRATED_COLUMNS.items():
+        if column in existing:
+            continue
+        try:
+            with conn:
+                conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {definition}")
+        except sqlite3.OperationalError as e:
+            # Another connection added it first
+            if "duplicate column" not in str(e):
+                raise
+
+
+def _summary(row):
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "plant": row["plant"],
+        "created_at": datetime.fromtimestamp(row["created_at"], timezone.utc).isoformat(),
+        "start_year": row["start_year"],
+        "end_year": row["end_year"],
+        "granularity": row["granularity"],
+        "extrapolate": row["extrapolate"],
+        "estimator": row["estimator"],
+        "dataset_id": row["dataset_id"],
+        "plant_version": row["plant_version"],
+        "first_FY": row["first_fy"],
+        "last_FY": row["last_fy"],
+        "operational_params": json.loads(row["operational_params"]),
+        "calibration": json.loads(row["calibration"]),
+        "policy_params": json.loads(row["policy_params"]),
+    }
+
+
+def _forecast_row(r):
+    row = {"FY": r["FY"]}
+    if r["period"] is not None:
+        row["period"] = r["period"]
+    for field in FORECAST_FIELDS:
+        row[field] = r[field]
+    return row
+
+
+# =========================================================
+# DIFF
+# =========================================================
+
+def _changed_values(a, b):
+    """{key: {a, b[, delta]}} for keys whose values differ."""
+    changes = {}
+    for key in list(a) + [k for k in b if k not in a]:
+        value_a, value_b = a.get(key), b.get(key)
+        if value_a == value_b:
+            continue
+        change = {"a": value_a, "b": value_b}
+        if isinstance(value_a, (int, float)) and isinstance(value_b, (int, float)):
+            change["delta"] = value_b - value_a
+        changes[key] = change
+    return changes
+
+
+def diff_runs(run_a, run_b):
+    """
+    Differences between two stored runs (as returned by RunStore.get).
+
+    Returns:
+        - runs: the two run summaries
+        - inputs: changed inputs (plant, period, granularity, ...)
+        - operational_params / calibration / policy_params: changed values
+          as {a, b, delta}
+        - forecast: per period present in both runs, every field as
+          {a, b, delta}, plus 'changed' (fields whose value differs)
+        - only_in_a / only_in_b: periods forecast by one run only
+    """
+    summary_a, summary_b = run_a["run"], run_b["run"]
+
+    def period_key(row):
+        return row.get("period", row["FY"])
+
+    rows_b = {period_key(row): row for row in run_b["forecast"]}
+    keys_a = set()
+    forecast = []
+    for row_a in run_a["forecast"]:
+        key = period_key(row_a)
+        keys_a.add(key)
+        row_b = rows_b.get(key)
+        if row_b is None:
+            continue
+        entry = {"FY": row_a["FY"]}
+        if "period" in row_a:
+            entry["period"] = row_a["period"]
+        changed = []
+        for field in FORECAST_FIELDS:
+            entry[field] = {"a": row_a[field], "b": row_b[field], "delta": row_b[field] - row_a[field]}
+            if row_a[field] != row_b[field]:
+                changed.append(field)
+        entry["changed"] = changed
+        forecast.append(entry)
+
+    return {
+        "runs": [summary_a, summary_b],
+        "inputs": _changed_values(
+            {key: summary_a[key] for key in RUN_INPUTS},
+            {key: summary_b[key] for key in RUN_INPUTS},
+        ),
+        "operational_params": _changed_values(summary_a["operational_params"], summary_b["operational_params"]),
+        "calibration": _changed_values(summary_a["calibration"], summary_b["calibration"]),
+        "policy_params": _changed_values(summary_a["policy_params"], summary_b["policy_params"]),
+        "forecast": forecast,
+        "only_in_a": [period_key(row) for row in run_a["forecast"] if period_key(row) not in rows_b],
+        "only_in_b": [period_key(row) for row in run_b["forecast"] if period_key(row) not in keys_a],
+    }
+
+
+_store = None
+
+
+def get_run_store():
+    global _store
+    if _store is None:
+        _store = RunStore()
+    return _store
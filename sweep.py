@@ -0,0 +1,236 @@
+"""
+sweep.py
+
+Batch scenario sweeps over operational parameters.
+
+Each plant is prepared and its history joined once; every scenario is then
+evaluated as one broadcast array computation through the vectorized engine
+in forecast.py, and the result is returned in a compact columnar layout.
+"""
+
+import numpy as np
+
+from forecast import (
+    CALIBRATION_FACTORS,
+    OUTPUT_CATEGORIES,
+    PLANT_DATA,
+    calibrate_from_history,
+    forecast_area_arrays,
+    prepare_plant_inputs,
+    resolve_operational_params,
+    select_forecast_years,
+)
+
+# Parameters a sweep may vary
+SWEEPABLE_PARAMS = (
+    "cycle_time_hours",
+    "base_oee",
+    "working_hours_year",
+    "machine_size_m2",
+    "safety_buffer",
+    "warehouse_capacity_units_m2",
+    "total_plant_area",
+)
+
+# Upper bound on scenarios evaluated in one call
+MAX_SCENARIOS = 200_000
+
+
+# =========================================================
+# SCENARIO CONSTRUCTION
+# =========================================================
+
+def range_length(spec):
+    """
+    Number of values a range specification expands to, without expanding it.
+
+    Accepted forms are those of expand_range.
+    """
+    if isinstance(spec, dict):
+        if "start" not in spec or "stop" not in spec:
+            raise ValueError("Range needs 'start' and 'stop'")
+        start, stop = float(spec["start"]), float(spec["stop"])
+        if not np.isfinite(start) or not np.isfinite(stop):
+            raise ValueError("Range 'start' and 'stop' must be finite")
+        if "num" in spec:
+            num = int(spec["num"])
+            if num < 0:
+                raise ValueError("Range 'num' must not be negative")
+            return num
+        if "step" in spec:
+            step = float(spec["step"])
+            if step <= 0:
+                raise ValueError("Range 'step' must be positive")
+            return max(int(np.floor((stop - start) / step + 1e-9)) + 1, 0)
+        raise ValueError("Range needs either 'num' or 'step'")
+    return len(spec)
+
+
+def expand_range(spec):
+    """
+    Expand a single parameter range specification into an array of values.
+
+    Accepted forms:
+        - list of explicit values: [0.6, 0.7, 0.8]
+        - {"start": 0.6, "stop": 0.9, "num": 31}    (inclusive, linspace)
+        - {"start": 0.6, "stop": 0.9, "step": 0.05} (inclusive of stop)
+    """
+    count = range_length(spec)
+    if isinstance(spec, dict):
+        start, stop = float(spec["start"]), float(spec["stop"])
+        if "num" in spec:
+            return np.linspace(start, stop, count)
+        return start + float(spec["step"]) * np.arange(count)
+    return np.asarray(list(spec), dtype=float)
+
+
+def build_scenarios(param_ranges=None, scenarios=None):
+    """
+    Build the scenario table as parameter name -> array of values.
+
+    Args:
+        param_ranges: Optional dict of parameter -> range spec; the full
+                      cartesian product of the ranges is evaluated.
+        scenarios: Optional explicit list of parameter dicts. Every scenario
+                   must set the same parameters.
+
+    Returns:
+        Tuple (columns, count) where columns maps parameter -> float array.
+    """
+    if bool(param_ranges) == bool(scenarios):
+        raise ValueError("Provide exactly one of 'param_ranges' or 'scenarios'")
+
+    if param_ranges:
+        names = list(param_ranges)
+        _check_param_names(names)
+        # Size the grid before allocating any axis
+        count = 1
+        for name in names:
+            count *= range_length(param_ranges[name])
+        if count > MAX_SCENARIOS:
+            raise ValueError(f"Sweep has {count} scenarios, limit is {MAX_SCENARIOS}")
+        axes = [expand_range(param_ranges[name]) for name in names]
+        grids = np.meshgrid(*axes, indexing="ij")
+        columns = {name: grid.ravel() for name, grid in zip(names, grids)}
+        return columns, count
+
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"Sweep has {len(scenarios)} scenarios, limit is {MAX_SCENARIOS}")
+    names = list(scenarios[0])
+    _check_param_names(names)
+    for scenario in scenarios:
+        if set(scenario) != set(names):
+            raise ValueError("All scenarios must set the same parameters")
+    columns = {
+        name: np.fromiter((s[name] for s in scenarios), dtype=float, count=len(scenarios))
+        for name in names
+    }
+    return columns, len(scenarios)
+
+
+def _check_param_names(names):
+    unknown = [name for name in names if name not in SWEEPABLE_PARAMS]
+    if unknown:
+        raise ValueError(f"Unknown sweep parameter(s): {', '.join(unknown)}")
+
+
+# =========================================================
+# SWEEP
+# =========================================================
+
+def evaluate_scenarios(inputs, base_params, columns, start_year=None, end_year=None):
+    """
+    Evaluate many scenarios for one prepared plant.
+
+    Args:
+        inputs: Output of forecast.prepare_plant_inputs
+        base_params: Resolved operational parameters shared by all scenarios
+        columns: Parameter name -> array of per-scenario values
+        start_year: Optional start year for forecast period (inclusive)
+        end_year: Optional end year for forecast period (inclusive)
+
+    Returns:
+        Tuple (fy, sales, calibration, areas); calibration values have shape
+        (n,) and areas map category -> array shaped (n, Y).
+    """
+    d = dict(base_params)
+    for name, values in columns.items():
+        d[name] = np.asarray(values, dtype=float)[:, None]
+
+    calibration = calibrate_from_history(inputs["hist_sales"], inputs["historical"], d)
+    factors = {key: np.asarray(calibration[key])[..., None] for key in CALIBRATION_FACTORS}
+
+    future = select_forecast_years(inputs["sales_fy"], inputs["hist_fy"], start_year, end_year)
+    fy = inputs["sales_fy"][future]
+    sales = inputs["sales_units"][future]
+
+    areas = forecast_area_arrays(sales, d, factors)
+    count = len(next(iter(columns.values()))) if columns else 1
+    areas = {key: np.broadcast_to(value, (count, len(fy))) for key, value in areas.items()}
+    return fy, sales, calibration, areas
+
+
+def run_scenario_sweep(
+    plant_name,
+    param_ranges=None,
+    scenarios=None,
+    base_params=None,
+    start_year=None,
+    end_year=None,
+    sales_df=None,
+    historical_area_df=None,
+    as_arrays=False
+):
+    """
+    Run a scenario sweep for a plant.
+
+    Args:
+        plant_name: Name of the plant (must exist in PLANT_DATA)
+        param_ranges: Optional dict of parameter -> range spec (cartesian grid)
+        scenarios: Optional explicit list of parameter dicts
+        base_params: Optional operational parameters shared by all scenarios
+        start_year: Optional start year for forecast period (inclusive)
+        end_year: Optional end year for forecast period (inclusive)
+        sales_df: Optional sales DataFrame override
+        historical_area_df: Optional historical area DataFrame override
+        as_arrays: Return NumPy arrays instead of lists (for encoders that
+                   serialize arrays directly)
+
+    Returns:
+        Columnar dictionary: scenario parameters and calibration as one list
+        per field, areas as one list (per scenario) of per-year values.
+    """
+    if plant_name not in PLANT_DATA:
+        raise ValueError(f"Plant '{plant_name}' not found in plant_data")
+
+    plant = PLANT_DATA[plant_name]
+    columns, count = build_scenarios(param_ranges, scenarios)
+
+    base = resolve_operational_params(plant.defaults, base_params)
+    inputs = prepare_plant_inputs(plant, sales_df, historical_area_df)
+    fy, sales, calibration, areas = evaluate_scenarios(
+        inputs, base, columns, start_year, end_year
+    )
+
+    def _per_scenario(value):
+        return np.broadcast_to(np.asarray(value, dtype=float), (count,))
+
+    convert = (lambda values: values) if as_arrays else (lambda values: values.tolist())
+
+    return {
+        "plant": plant_name,
+        "scenario_count": count,
+        "FY": convert(fy.astype(np.int64)),
+        "sales_units": convert(np.trunc(sales).astype(np.int64)),
+        "base_params": {k: float(v) if isinstance(v, (int, float)) else v for k, v in base.items()},
+        "parameters": {name: convert(values) for name, values in columns.items()},
+        "calibration": {
+            "productivity_factor": convert(np.round(_per_scenario(calibration["productivity_factor"]), 3)),
+            "inventory_days": convert(np.round(_per_scenario(calibration["inventory_days"]), 1)),
+            "passage_ratio": convert(np.round(_per_scenario(calibration["passage_ratio"]), 3)),
+        },
+        "areas": {
+            f"{c}_m2": convert(np.rint(areas[c]).astype(np.int64)) for c in OUTPUT_CATEGORIES
+        },
+    }
+
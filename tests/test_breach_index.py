@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+import breach_index
+from breach_index import MIN_VACANT_SHARE, BreachIndex, find_breach
+from forecast import ALLOCATED_CATEGORIES, run_forecast_for_plant
+from plant_data import PLANT_DATA
+from run_store import RunStore
+
+PLANT = "DNKI"
+
+
+def _row(fy, allocated_each):
+    row = {"FY": fy, **{f"{c}_m2": allocated_each for c in ALLOCATED_CATEGORIES}}
+    row["vacant_area_m2"] = 0
+    return row
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RunStore(str(tmp_path / "runs.sqlite"))
+
+
+def _save_run(store, plant, operational_params=None, name=None):
+    result = run_forecast_for_plant(
+        plant, operational_params=operational_params, start_year=2026, end_year=2030, layout="columns"
+    )
+    return store.record(result, {"plant": plant, "start_year": 2026, "end_year": 2030}, "key", name)
+
+
+def test_find_breach_reports_the_first_breaching_year():
+    total = 1000.0
+    usable = total * (1 - MIN_VACANT_SHARE)
+    per_category = usable / len(ALLOCATED_CATEGORIES)
+    forecast = [_row(2026, per_category * 0.9), _row(2027, per_category * 1.05), _row(2028, per_category * 2)]
+
+    breach = find_breach(forecast, [], total)
+
+    assert breach["breach_FY"] == 2027
+    assert breach["shortfall_m2"] == round(usable * 0.05)
+    assert breach["over_capacity"] is False
+    assert find_breach(forecast[:1], [], total) is None
+
+
+def test_query_orders_by_breach_year_then_shortfall(store):
+    index = BreachIndex(run_store=store)
+    for area in (30000, 25000, 20000):
+        _save_run(store, PLANT, {"total_plant_area": area})
+    index.refresh()
+
+    breaches = index.query(scenario="run")
+    keys = [(b["breach_FY"], -b["shortfall_m2"]) for b in breaches]
+    assert keys == sorted(keys)
+    assert len(breaches) == 3
+    assert index.query(scenario="run", limit=1) == breaches[:1]
+    assert all(b["shortfall_m2"] > 5000 for b in index.query(min_shortfall_m2=5000))
+    assert all(b["breach_FY"] < 2028 for b in index.query(before_fy=2028))
+
+
+def test_refresh_picks_up_saved_and_deleted_runs(store):
+    index = BreachIndex(run_store=store)
+    index.refresh()
+    run_id = _save_run(store, PLANT, {"total_plant_area": 20000})
+
+    index.refresh(force=True)
+    assert [b["run_id"] for b in index.query(scenario="run")] == [run_id]
+
+    store.delete(run_id)
+    index.refresh(force=True)
+    assert index.query(scenario="run") == []
+
+
+def test_failing_plant_is_marked_stale_and_retried(store, monkeypatch):
+    index = BreachIndex(run_store=store)
+    index.refresh()
+    victim, other = list(PLANT_DATA)[:2]
+
+    def failing(plant):
+        if plant == victim:
+            raise RuntimeError("plant data unreadable")
+        return run_forecast_for_plant(plant)
+
+    monkeypatch.setattr(breach_index, "run_forecast_for_plant", failing)
+    index._versions[victim] = index._versions[other] = "outdated"
+    index.refresh(force=True)
+
+    status = index.status()
+    assert status["errors"] == {f"default:{victim}": "plant data unreadable"}
+    assert status["stale"] == 1
+    assert index._entries[("default", victim)]["stale"] is True
+    assert index._entries[("default", other)]["stale"] is False
+
+    monkeypatch.setattr(breach_index, "run_forecast_for_plant", run_forecast_for_plant)
+    index.refresh(force=True)
+    assert index.status()["errors"] == {} and index.status()["stale"] == 0
+
+
+def test_corrupt_run_is_skipped_and_reported(store):
+    good = _save_run(store, PLANT, {"total_plant_area": 20000})
+    bad = _save_run(store, PLANT, {"total_plant_area": 21000})
+    with sqlite3.connect(store.path) as conn:
+        conn.execute("UPDATE runs SET history = '{not json' WHERE id = ?", (bad,))
+
+    index = BreachIndex(run_store=store)
+    index.refresh()
+
+    assert [b["run_id"] for b in index.query(scenario="run")] == [good]
+    assert f"run:{bad}" in index.status()["errors"]
+
+    store.delete(bad)
+    index.refresh(force=True)
+    assert index.status()["errors"] == {}
@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import datasets
+from datasets import CsvChunkReader, DatasetStore, SalesForecastParser
+from main import app
+
+
+def _parse(rows, header=("FY", "sales_units", "month")):
+    parser = SalesForecastParser()
+    parser.feed_row(list(header))
+    for row in rows:
+        parser.feed_row(row)
+    return parser.finish()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets, "_store", DatasetStore(root=str(tmp_path)))
+    return TestClient(app)
+
+
+def _upload(client, text):
+    return client.post("/api/sales-forecasts", files={"file": ("sales.csv", text, "text/csv")})
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 7, 64])
+def test_csv_reader_keeps_quoted_newlines_across_chunks(size):
+    data = 'FY,sales_units,plant\r\n2025,100,"Plant\r\nA"\n2026,"1,200","B ""x"""\n2027,5,C\n'.encode()
+    reader = CsvChunkReader()
+    rows = []
+    for start in range(0, len(data), size):
+        rows += reader.feed(data[start:start + size])
+    rows += reader.close()
+
+    assert rows == [
+        ["FY", "sales_units", "plant"],
+        ["2025", "100", "Plant\r\nA"],
+        ["2026", "1,200", 'B "x"'],
+        ["2027", "5", "C"],
+    ]
+
+
+@pytest.mark.parametrize("row, message", [
+    (["inf", "1", "1"], "FY must be an integer"),
+    (["1e30", "1", "1"], "FY must be an integer"),
+    (["2025.5", "1", "1"], "FY must be an integer"),
+    (["nan", "1", "1"], "FY must be an integer"),
+    (["2025", "1", "inf"], "month must be an integer"),
+    (["2025", "1", "13"], "month must be an integer"),
+    (["2025", "-1", "1"], "sales_units must be a non-negative number"),
+    (["2025", "inf", "1"], "sales_units must be a non-negative number"),
+])
+def test_parser_rejects_invalid_values_with_the_row_number(row, message):
+    with pytest.raises(ValueError, match=f"Row 2: {message}"):
+        _parse([row])
+
+
+def test_parser_rejects_duplicate_rows():
+    with pytest.raises(ValueError, match="duplicate"):
+        _parse([["2025", "1", "1"], ["2025", "2", "1"]])
+
+
+def test_annual_sales_rejects_incomplete_fiscal_years(tmp_path):
+    store = DatasetStore(root=str(tmp_path))
+    rows = [["2025", "10", str(m)] for m in range(1, 13)] + [["2026", "10", str(m)] for m in range(1, 4)]
+    dataset_id = store.put(_parse(rows))
+
+    assert store.summary(dataset_id)["plants"][0]["incomplete_FY"] == [2026]
+    with pytest.raises(ValueError, match="incomplete monthly sales .* FY 2026"):
+        store.annual_sales(dataset_id, "DNKI")
+
+    complete = store.put(_parse(rows[:12]))
+    sales = store.annual_sales(complete, "DNKI")
+    assert sales["FY"].tolist() == [2025] and sales["sales_units"].tolist() == [120.0]
+
+
+def test_dataset_id_ignores_row_order(tmp_path):
+    store = DatasetStore(root=str(tmp_path))
+    rows = [["2025", "10"], ["2026", "20"]]
+    header = ("FY", "sales_units")
+
+    assert store.put(_parse(rows, header)) == store.put(_parse(rows[::-1], header))
+
+
+def test_upload_round_trip(client):
+    response = _upload(client, "FY,sales_units\n2026,100\n2027,110\n")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rows"] == 2 and body["granularity"] == "annual"
+    assert client.get(f"/api/sales-forecasts/{body['dataset_id']}").json()["rows"] == 2
+
+
+@pytest.mark.parametrize("text", [
+    "FY,sales_units\ninf,100\n",
+    "FY,sales_units\n1e30,100\n",
+    "FY,sales_units,month\n2026,100,inf\n",
+    "FY\n2026\n",
+])
+def test_invalid_uploads_return_400(client, text):
+    assert _upload(client, text).status_code == 400
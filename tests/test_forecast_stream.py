@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.forecast_stream import PendingUpdates, merge_deltas
+from forecast import run_forecast_for_plant
+from main import app
+
+PLANT = "DNKI"
+
+
+def test_pending_updates_coalesce_to_the_latest_state():
+    pending = PendingUpdates()
+    pending.add({"type": "open", "plant_name": PLANT, "seq": 1})
+    pending.add({"type": "update", "operational_params": {"base_oee": 0.6}, "sales": {"2027": 10}, "seq": 2})
+    pending.add({"type": "update", "operational_params": {"base_oee": 0.7}, "sales": {2027: 20}, "seq": 3})
+
+    open_message, params, sales, seq = pending.take()
+    assert open_message["plant_name"] == PLANT
+    assert params == {"base_oee": 0.7}
+    assert sales == {2027: 20.0}
+    assert seq == 3
+    assert not pending.has_pending()
+
+
+def test_open_drops_queued_updates():
+    pending = PendingUpdates()
+    pending.add({"type": "update", "operational_params": {"base_oee": 0.6}})
+    pending.add({"type": "open", "plant_name": PLANT})
+
+    _, params, sales, _ = pending.take()
+    assert params == {} and sales == {}
+
+
+@pytest.mark.parametrize("message", [
+    {"type": "update", "operational_params": {"base_oee": [1]}},
+    {"type": "update", "operational_params": {"base_oee": "NaN"}},
+    {"type": "update", "operational_params": {"bogus": 1}},
+    {"type": "update", "sales": {"FY2027": 1}},
+    {"type": "update", "operational_params": [1]},
+    {"type": "open", "plant_name": PLANT, "operational_params": {"base_oee": "x"}},
+    {"type": "open"},
+    {"type": "resize"},
+])
+def test_invalid_messages_are_rejected_without_queueing(message):
+    pending = PendingUpdates()
+    pending.add({"type": "update", "operational_params": {"base_oee": 0.7}})
+
+    with pytest.raises(ValueError):
+        pending.add(message)
+
+    _, params, sales, _ = pending.take()
+    assert params == {"base_oee": 0.7} and sales == {}
+
+
+def test_merge_deltas_merges_forecast_rows_by_fy():
+    older = {"forecast": [{"FY": 2026, "a": 1}], "operational_params": {"x": 1}}
+    newer = {"forecast": [{"FY": 2026, "b": 2}, {"FY": 2027, "a": 3}], "operational_params": {"y": 2}}
+
+    assert merge_deltas(older, newer) == {
+        "forecast": [{"FY": 2026, "a": 1, "b": 2}, {"FY": 2027, "a": 3}],
+        "operational_params": {"x": 1, "y": 2},
+    }
+
+
+def test_stream_survives_malformed_messages():
+    client = TestClient(app)
+    with client.websocket_connect("/api/area-forecast/ws") as ws:
+        ws.send_json({"type": "open", "plant_name": PLANT, "seq": 1})
+        assert ws.receive_json()["type"] == "result"
+
+        ws.send_text("{not json")
+        assert ws.receive_json() == {"type": "error", "seq": None, "detail": "Message is not valid JSON"}
+        ws.send_json({"type": "update", "operational_params": {"base_oee": "fast"}, "seq": 2})
+        frame = ws.receive_json()
+        assert frame["type"] == "error" and frame["seq"] == 2
+
+        # total_plant_area changes the forecast rows (recalibration cancels OEE)
+        ws.send_json({"type": "update", "operational_params": {"total_plant_area": 30000}, "seq": 3})
+        frame = ws.receive_json()
+        assert frame["type"] == "delta" and frame["seq"] == 3
+
+    expected = run_forecast_for_plant(
+        PLANT, operational_params={"total_plant_area": 30000}, start_year=2026, end_year=2030
+    )
+    changed = {row["FY"]: row for row in frame["changed"]["forecast"]}
+    assert changed
+    for row in expected["forecast"]:
+        for key, value in changed.get(row["FY"], {}).items():
+            assert row[key] == value
@@ -0,0 +1,46 @@
+import tracemalloc
+
+import pytest
+
+from goal_seek import _prepare, _verify, solve_parameter, solve_pareto
+
+PLANT = "DNKI"
+
+
+@pytest.mark.parametrize("parameter", ["total_plant_area", "cycle_time_hours", "warehouse_capacity_units_m2"])
+def test_solution_leaves_exactly_the_target_headroom(parameter):
+    result = solve_parameter(PLANT, parameter, start_year=2026, end_year=2030)
+
+    assert result["feasible"]
+    assert result["verified_min_headroom_m2"] == pytest.approx(0, abs=1e-3)
+    assert result["calibration"] == "nominal"
+
+
+def test_pareto_limits_leave_exactly_the_target_headroom():
+    frontier = solve_pareto(
+        PLANT, ["base_oee", "total_plant_area"], [0.6, 0.7, 0.8], start_year=2026, end_year=2030
+    )
+    state = _prepare(PLANT, None, 2026, 2030)
+
+    for oee, area in zip(frontier["base_oee"], frontier["total_plant_area"]):
+        d = {**state["nominal"], "base_oee": oee, "total_plant_area": area}
+        assert _verify(state, d, 0.08, 0.0) == pytest.approx(0, abs=1e-3)
+
+
+@pytest.mark.parametrize("ratio", [1.0, 1.5, -0.1])
+def test_vacant_ratio_outside_unit_interval_is_rejected(ratio):
+    with pytest.raises(ValueError, match="min_vacant_ratio"):
+        solve_parameter(PLANT, "total_plant_area", min_vacant_ratio=ratio)
+
+
+def test_oversized_pareto_range_is_rejected_before_allocating():
+    tracemalloc.start()
+    try:
+        with pytest.raises(ValueError, match="limit is"):
+            solve_pareto(
+                PLANT, ["base_oee", "total_plant_area"], {"start": 0.5, "stop": 0.9, "num": 10**9}
+            )
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 1024 * 1024
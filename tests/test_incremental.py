@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from forecast import run_forecast_for_plant
+from incremental import ForecastGraph
+
+PLANT = "DNKI"
+
+
+def _snapshot(graph):
+    return json.dumps(graph.result(), sort_keys=True, default=str)
+
+
+def test_updates_match_a_full_forecast():
+    graph = ForecastGraph(PLANT, start_year=2026, end_year=2030)
+    graph.update(operational_params={"base_oee": 0.7})
+    graph.update(operational_params={"total_plant_area": 30000, "base_oee": None})
+
+    expected = run_forecast_for_plant(
+        PLANT, operational_params={"total_plant_area": 30000}, start_year=2026, end_year=2030
+    )
+    got = graph.result()
+    got.pop("version")
+    assert json.dumps(got, sort_keys=True, default=str) == json.dumps(expected, sort_keys=True, default=str)
+
+
+@pytest.mark.parametrize("update", [
+    {"operational_params": {"base_oee": [1]}},
+    {"operational_params": {"base_oee": "fast"}},
+    {"operational_params": {"base_oee": float("inf")}},
+    {"operational_params": {"base_oee": True}},
+    {"operational_params": {"not_a_param": 1.0}},
+    {"operational_params": {"base_oee": 0.7, "total_plant_area": float("nan")}},
+    {"sales": {2027: float("inf")}},
+    {"sales": {1990: 100.0}},
+    {"sales": {"2027.5": 100.0}},
+    {"operational_params": {"base_oee": 0.7}, "sales": {2027: "lots"}},
+])
+def test_rejected_update_leaves_graph_unchanged(update):
+    graph = ForecastGraph(PLANT, start_year=2026, end_year=2030)
+    before = _snapshot(graph)
+
+    with pytest.raises(ValueError):
+        graph.update(**update)
+
+    assert _snapshot(graph) == before
+    # The graph still computes from consistent state afterwards
+    graph.update(operational_params={"base_oee": 0.7})
+    expected = run_forecast_for_plant(
+        PLANT, operational_params={"base_oee": 0.7}, start_year=2026, end_year=2030
+    )
+    assert graph.result()["forecast"] == expected["forecast"]
+
+
+def test_numeric_strings_are_coerced():
+    graph = ForecastGraph(PLANT, start_year=2026, end_year=2030)
+    graph.update(operational_params={"base_oee": "0.7"})
+
+    assert graph.params["base_oee"] == 0.7
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from monte_carlo import _HistogramBands, run_monte_carlo_forecast, validate_distributions
+
+PLANT = "DNKI"
+
+
+@pytest.mark.parametrize("distributions", [
+    {"base_oee": {"dist": "normal", "mean": 0.7, "std": 0.1}},
+    {"base_oee": {"dist": "normal", "mean": 0.7, "std": 0.1, "min": 0.3}},
+    {"base_oee": {"dist": "uniform", "low": 0.0, "high": 0.9}},
+    {"working_hours_year": {"dist": "triangular", "low": 5000, "mode": 6000, "high": 9000}},
+    {"total_plant_area": {"dist": "fixed", "value": -1}},
+    {"safety_buffer": {"dist": "normal", "mean": 0.05, "std": 0.01}},
+])
+def test_distributions_reaching_outside_the_domain_are_rejected(distributions):
+    with pytest.raises(ValueError, match="outside its domain"):
+        validate_distributions(distributions, None)
+
+
+@pytest.mark.parametrize("distributions", [
+    {"base_oee": {"dist": "normal", "mean": 0.7, "std": 0.1, "min": 0.3, "max": 1.0}},
+    {"base_oee": {"dist": "uniform", "low": 0.5, "high": 0.9}},
+    {"safety_buffer": {"dist": "uniform", "low": 0.0, "high": 0.2}},
+    {"cycle_time_hours": {"dist": "lognormal", "mean": -1.6, "sigma": 0.2}},
+])
+def test_distributions_inside_the_domain_are_accepted(distributions):
+    validate_distributions(distributions, None)
+
+
+def test_histogram_widens_instead_of_clipping():
+    rng = np.random.default_rng(1)
+    chunks = [
+        rng.normal(100, 1, (1000, 3)),
+        rng.normal(100, 30, (20000, 3)),
+        rng.normal(60, 50, (20000, 3)),
+        rng.normal(300, 5, (500, 3)),
+    ]
+    bands = _HistogramBands({"x": chunks[0]})
+    for chunk in chunks[1:]:
+        bands.add({"x": chunk})
+    values = np.concatenate(chunks)
+
+    assert bands.counts["x"].sum(axis=1).tolist() == [len(values)] * 3
+    assert np.all(bands.lo["x"] <= values.min(axis=0))
+    assert np.all(bands.lo["x"] + bands.width["x"] * bands.bins > values.max(axis=0))
+    for q in (1, 10, 50, 90, 99.5):
+        exact = np.percentile(values, q, axis=0)
+        assert np.all(np.abs(bands.percentile("x", q) - exact) <= bands.width["x"])
+
+
+def test_chunked_run_is_reproducible_and_finite():
+    kwargs = dict(
+        param_distributions={"base_oee": {"dist": "normal", "mean": 0.7, "std": 0.1, "min": 0.3, "max": 1.0}},
+        sales_growth={"dist": "normal", "mean": 0.0, "std": 0.1},
+        n_samples=20000, seed=3, start_year=2026, end_year=2030, chunk_size=2000,
+    )
+    first = run_monte_carlo_forecast(PLANT, **kwargs)
+    second = run_monte_carlo_forecast(PLANT, **kwargs)
+
+    assert first["method"] == "histogram"
+    assert first["bands"] == second["bands"]
+    assert first["calibration"] == "nominal"
+    for band in first["bands"].values():
+        assert all(p10 <= p50 <= p90 for p10, p50, p90 in zip(band["p10"], band["p50"], band["p90"]))
+        assert all(abs(v) < 1e9 for values in band.values() for v in values)
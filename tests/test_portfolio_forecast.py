@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.portfolio_forecast as portfolio_forecast
+import app.execution as execution
+from app.execution import ForecastExecutor
+from main import app
+from portfolio import run_forecasts_for_plants, run_plant_batches
+
+PLANTS = ["DNHA_M", "DNKI"]
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Record the max_workers of every run_plant_batches call made by the endpoint."""
+    calls = []
+
+    def recording(fn, plant_names, max_workers=None, *args):
+        calls.append(max_workers)
+        return run_plant_batches(fn, plant_names, max_workers, *args)
+
+    monkeypatch.setattr(portfolio_forecast, "run_plant_batches", recording)
+    return calls
+
+
+def _use_executor(monkeypatch, mode):
+    executor = ForecastExecutor(mode=mode, max_workers=2)
+    monkeypatch.setattr(execution, "_executor", executor)
+    return executor
+
+
+@pytest.mark.parametrize("mode, max_workers", [("thread", None), ("inline", 1)])
+def test_portfolio_dispatches_through_plant_batches(monkeypatch, dispatched, mode, max_workers):
+    executor = _use_executor(monkeypatch, mode)
+    try:
+        response = TestClient(app).post("/api/portfolio-forecast", json={"plants": PLANTS})
+    finally:
+        executor.shutdown()
+
+    assert response.status_code == 200
+    # One executor slot, batches sized by the shared pool (CPU count) rather than executor threads
+    assert dispatched == [max_workers]
+    expected = run_forecasts_for_plants(PLANTS, None, 2026, 2030)
+    assert response.json()["results"] == expected
+
+
+def test_portfolio_rejects_unknown_plants(monkeypatch, dispatched):
+    executor = _use_executor(monkeypatch, "thread")
+    try:
+        response = TestClient(app).post("/api/portfolio-forecast", json={"plants": ["NOPE"]})
+    finally:
+        executor.shutdown()
+
+    assert response.status_code == 400
+    assert dispatched == []
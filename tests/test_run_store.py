@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import run_store
+from forecast import run_forecast_for_plant
+from main import app
+from run_store import RunStore, run_input_key
+
+PLANT = "DNKI"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RunStore(str(tmp_path / "runs.sqlite"))
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(run_store, "_store", store)
+    return TestClient(app)
+
+
+def _record(store, operational_params=None, estimator="mean", name=None):
+    result = run_forecast_for_plant(
+        PLANT, operational_params=operational_params, start_year=2026, end_year=2030,
+        layout="columns", estimator=estimator
+    )
+    inputs = {"plant": PLANT, "start_year": 2026, "end_year": 2030, "estimator": estimator}
+    key = run_input_key(PLANT, operational_params, 2026, 2030, "annual", "none", None, "v", estimator)
+    return store.record(result, inputs, key, name)
+
+
+def test_input_key_covers_every_input():
+    base = (PLANT, {"base_oee": 0.7}, 2026, 2030, "annual", "none", None, "v1", "mean")
+    key = run_input_key(*base)
+
+    assert run_input_key(PLANT, {"base_oee": 0.70}, *base[2:]) == key
+    for position, value in enumerate(["DNIN", {"base_oee": 0.8}, 2027, 2031, "monthly", "flat", "ds", "v2", "trend"]):
+        changed = list(base)
+        changed[position] = value
+        assert run_input_key(*changed) != key
+
+
+def test_stored_run_round_trips(store):
+    run_id = _record(store, {"total_plant_area": 30000}, name="smaller site")
+    expected = run_forecast_for_plant(
+        PLANT, operational_params={"total_plant_area": 30000}, start_year=2026, end_year=2030
+    )
+
+    run = store.get(run_id)
+    assert run["run"]["name"] == "smaller site"
+    assert run["forecast"] == expected["forecast"]
+    assert run["operational_params"] == expected["operational_params"]
+    assert [row["FY"] for row in store.get(run_id, fy_from=2027, fy_to=2028)["forecast"]] == [2027, 2028]
+
+
+def test_list_filters_by_parameter_value(store):
+    small = _record(store, {"total_plant_area": 20000})
+    _record(store, {"total_plant_area": 40000})
+
+    page = store.list(plant=PLANT, params=[("total_plant_area", None, 25000)])
+    assert page["total"] == 1 and page["runs"][0]["id"] == small
+
+
+def test_diff_reports_changed_inputs_and_areas(store):
+    a = _record(store, {"total_plant_area": 30000})
+    b = _record(store, {"total_plant_area": 30000}, estimator="trend")
+
+    diff = store.diff(a, b)
+    assert diff["inputs"] == {"estimator": {"a": "mean", "b": "trend"}}
+    assert diff["operational_params"] == {}
+    for row in diff["forecast"]:
+        for field in row["changed"]:
+            assert row[field]["delta"] == row[field]["b"] - row[field]["a"]
+
+
+def test_identical_requests_are_deduplicated(client):
+    first = client.post("/api/runs", json={"plant_name": PLANT}).json()
+    again = client.post("/api/runs", json={"plant_name": PLANT}).json()
+    other = client.post("/api/runs", json={"plant_name": PLANT, "estimator": "trend"}).json()
+
+    assert first["existing"] is False
+    assert again["existing"] is True and again["run"]["id"] == first["run"]["id"]
+    assert other["existing"] is False and other["run"]["estimator"] == "trend"
+    assert client.post("/api/runs", json={"plant_name": PLANT, "estimator": "nope"}).status_code == 400
+
+
+def test_store_created_before_the_estimator_column_is_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(run_store.SCHEMA.replace("    estimator TEXT NOT NULL DEFAULT 'mean',\n", ""))
+        conn.execute(
+            "INSERT INTO runs (plant, created_at, granularity, extrapolate, input_key, "
+            "operational_params, calibration, policy_params, history) "
+            "VALUES (?, 0, 'annual', 'none', 'k', '{}', '{}', '{}', '{}')",
+            (PLANT,),
+        )
+
+    store = RunStore(path)
+    assert store.list()["runs"][0]["estimator"] == "mean"
+    assert store.summary(_record(store, estimator="trend"))["estimator"] == "trend"
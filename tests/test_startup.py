@@ -0,0 +1,20 @@
+"""
+Cold-start guard: importing the service in a fresh interpreter must become
+ready within the startup budget without importing pandas (see
+benchmarks/run.py, which runs the same check as part of the benchmark
+suite).
+"""
+
+import statistics
+
+from benchmarks.run import STARTUP_BUDGET_S, startup_runs
+
+
+def test_startup_within_budget_without_pandas():
+    runs = startup_runs(repeat=3)
+
+    assert all(run["ready"] is not None for run in runs), "service never became ready"
+    ready = statistics.median(run["ready"] for run in runs)
+    assert ready <= STARTUP_BUDGET_S, f"ready after {ready:.3f}s, budget {STARTUP_BUDGET_S:.3f}s"
+    for run in runs:
+        assert "pandas" not in run["modules"]